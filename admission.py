@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Admission control for the web API's PDF operations
+
+Each server process runs at most max_active PDF operations (open, fill,
+save, field extraction) at once. Requests beyond that wait in a FIFO queue
+of at most max_queue entries; when the queue is full, or a request has
+waited queue_timeout seconds, it is turned away with 503 and a Retry-After
+estimated from recent operation times. A burst therefore degrades into
+fast rejections instead of every request opening a PDF at once and all of
+them slowing down together.
+
+Each client (by remote address) may have at most per_client operations
+running or queued; beyond that it gets 429, so one bulk caller cannot fill
+the queue ahead of interactive users.
+
+The same controller serves threads (app.py: slot()) and coroutines
+(asgi_app.py: slot_async()). Limits come from the environment:
+PDFFILL_MAX_ACTIVE, PDFFILL_MAX_QUEUE, PDFFILL_PER_CLIENT (0 = no limit) and
+PDFFILL_QUEUE_TIMEOUT (seconds).
+"""
+
+import os
+import math
+import time
+import asyncio
+import threading
+import contextlib
+from collections import deque
+
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_PER_CLIENT = 4
+DEFAULT_QUEUE_TIMEOUT = 30.0
+
+# Weight of the newest operation in the moving average used for Retry-After
+DURATION_SMOOTHING = 0.2
+
+
+class Rejected(Exception):
+    """A request was not admitted; status is 503 (server busy) or 429 (client limit)"""
+
+    def __init__(self, status, message, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """A queued request; granted is only changed under the controller's lock"""
+
+    def __init__(self, client, loop=None):
+        self.client = client
+        self.granted = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+
+    def grant(self):
+        self.granted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class AdmissionController:
+    """Bounded concurrency, bounded FIFO queue and per-client limits"""
+
+    def __init__(self, max_active, max_queue=DEFAULT_MAX_QUEUE, per_client=DEFAULT_PER_CLIENT,
+                 queue_timeout=DEFAULT_QUEUE_TIMEOUT):
+        self.max_active = max(1, max_active)
+        self.max_queue = max(0, max_queue)
+        self.per_client = per_client
+        self.queue_timeout = queue_timeout
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = deque()
+        self._clients = {}
+        self._average_duration = None
+        self.rejected = {503: 0, 429: 0}
+
+    @classmethod
+    def from_env(cls, max_active):
+        """Controller configured from PDFFILL_* variables, max_active being the default"""
+        return cls(int(os.environ.get('PDFFILL_MAX_ACTIVE', max_active)),
+                   int(os.environ.get('PDFFILL_MAX_QUEUE', DEFAULT_MAX_QUEUE)),
+                   int(os.environ.get('PDFFILL_PER_CLIENT', DEFAULT_PER_CLIENT)),
+                   float(os.environ.get('PDFFILL_QUEUE_TIMEOUT', DEFAULT_QUEUE_TIMEOUT)))
+
+    def retry_after(self):
+        """Seconds until a slot is likely to be free, from the average operation time"""
+        average = self._average_duration or 1.0
+        return max(1, math.ceil(average * (len(self._waiters) + 1) / self.max_active))
+
+    def _reject(self, status, message):
+        self.rejected[status] += 1
+        return Rejected(status, message, self.retry_after())
+
+    def _enter(self, client, loop=None):
+        """Take a slot (returns None) or a place in the queue (returns a _Waiter); lock held"""
+        if self.per_client and self._clients.get(client, 0) >= self.per_client:
+            raise self._reject(429, f"Too many concurrent requests from this client "
+                                    f"(limit {self.per_client})")
+
+        if self._active < self.max_active and not self._waiters:
+            self._active += 1
+            self._clients[client] = self._clients.get(client, 0) + 1
+            return None
+
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject(503, "Server busy, try again later")
+
+        waiter = _Waiter(client, loop)
+        self._waiters.append(waiter)
+        self._clients[client] = self._clients.get(client, 0) + 1
+        return waiter
+
+    def _abandon(self, waiter):
+        """
+        Give up waiting; returns True when the slot was granted meanwhile
+        and the caller now holds it
+        """
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            self._drop_client(waiter.client)
+            return False
+
+    def _drop_client(self, client):
+        count = self._clients[client] - 1
+        if count:
+            self._clients[client] = count
+        else:
+            del self._clients[client]
+
+    def release(self, client, duration=None):
+        """Free a slot, handing it straight to the next queued request"""
+        with self._lock:
+            self._drop_client(client)
+            if duration is not None:
+                if self._average_duration is None:
+                    self._average_duration = duration
+                else:
+                    self._average_duration += DURATION_SMOOTHING * (duration - self._average_duration)
+
+            if self._waiters:
+                self._waiters.popleft().grant()
+            else:
+                self._active -= 1
+
+    def acquire(self, client):
+        """Block until a slot is free; raises Rejected"""
+        with self._lock:
+            waiter = self._enter(client)
+        if waiter is None:
+            return
+
+        if not waiter.event.wait(self.queue_timeout) and not self._abandon(waiter):
+            with self._lock:
+                raise self._reject(503, f"Server busy - waited {self.queue_timeout:g}s for a slot")
+
+    async def acquire_async(self, client):
+        """Wait for a slot without blocking the event loop; raises Rejected"""
+        with self._lock:
+            waiter = self._enter(client, asyncio.get_running_loop())
+        if waiter is None:
+            return
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                with self._lock:
+                    raise self._reject(503, f"Server busy - waited {self.queue_timeout:g}s for a slot")
+        except BaseException:
+            # Client went away while queued
+            if self._abandon(waiter):
+                self.release(client)
+            raise
+
+    @contextlib.contextmanager
+    def slot(self, client):
+        self.acquire(client)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(client, time.monotonic() - started)
+
+    @contextlib.asynccontextmanager
+    async def slot_async(self, client):
+        await self.acquire_async(client)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(client, time.monotonic() - started)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active': self._active,
+                'queued': len(self._waiters),
+                'max_active': self.max_active,
+                'max_queue': self.max_queue,
+                'per_client': self.per_client,
+                'rejected': dict(self.rejected),
+            }
+
@@ -6,11 +6,12 @@ Deep inspection of PDF structure to find all types of fillable elements
 
 import sys
 from pathlib import Path
-import PyPDF2
 
 
 def analyze_pdf_structure(pdf_path):
     """Deep analysis of PDF structure"""
+
+    import PyPDF2
     result = {
         "has_acroform": False,
         "has_xfa": False,
@@ -7,293 +7,234 @@ A Flask-based web interface for all PDF form filling tools
 from flask import Flask, render_template, request, jsonify, send_file, session
 from werkzeug.utils import secure_filename
 import os
+import re
 import json
 import tempfile
-import pikepdf
+import functools
 from pathlib import Path
 import uuid
 
+from admission import AdmissionController, Rejected
+from sandbox import Sandbox, SandboxError
+from temp_sweeper import TempSweeper, QuotaExceeded, default_upload_dir
+from chunked_upload import ChunkedUploads, UploadError
+from fill_cache import FillCache
+from template_registry import TemplateRegistry, RegisteredTemplate
+from template_manifest import file_sha256, load_manifest
+from pdf_operations import (get_manifest, get_form_fields, search_fields,
+                            fill_pdf, remove_defaults, remove_void_watermark)
+
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-in-production'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['UPLOAD_FOLDER'] = tempfile.gettempdir()
+app.config['UPLOAD_FOLDER'] = default_upload_dir()
+app.config['TEMPLATE_REGISTRY'] = os.environ.get(
+    'PDF_TEMPLATE_REGISTRY', os.path.join(app.root_path, 'registered_templates.json'))
 
 ALLOWED_EXTENSIONS = {'pdf'}
 
+# Uploads are stored as <upload dir>/<sha256>.pdf
+CONTENT_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# Behind a reverse proxy, per-client limits need the address it forwards
+if os.environ.get('PDFFILL_PROXY_COUNT'):
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=int(os.environ['PDFFILL_PROXY_COUNT']))
 
+# PDF operations this process runs at once; more wait in a bounded queue
+# (see admission.py)
+admission = AdmissionController.from_env(max_active=os.cpu_count() or 1)
 
-def get_form_fields(pdf_path):
-    """Extract all form fields from a PDF (including children)"""
-    try:
-        pdf = pikepdf.open(pdf_path)
-
-        if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
-            return None
-
-        fields = []
-
-        def extract_field_info(field, parent_name=''):
-            """Recursively extract field information"""
-            field_info = {
-                'name': '',
-                'type': '',
-                'tooltip': '',
-                'value': ''
-            }
-
-            # Get field name
-            if '/T' in field:
-                field_name = str(field['/T'])
-                field_info['name'] = f"{parent_name}.{field_name}" if parent_name else field_name
-            elif parent_name:
-                # Child widget without its own name
-                return None
-
-            # Get tooltip
-            if '/TU' in field:
-                field_info['tooltip'] = str(field['/TU'])
-
-            # Get field type
-            if '/FT' in field:
-                ft = str(field['/FT'])
-                type_map = {'/Tx': 'text', '/Btn': 'checkbox', '/Ch': 'choice', '/Sig': 'signature'}
-                field_info['type'] = type_map.get(ft, 'unknown')
-
-            # Get value
-            if '/V' in field:
-                val = field['/V']
-                if isinstance(val, pikepdf.Name):
-                    field_info['value'] = str(val).lstrip('/')
-                else:
-                    field_info['value'] = str(val)
-
-            # Check if this field has children
-            has_children = '/Kids' in field and len(field['/Kids']) > 0
-
-            # If field has /FT, it's a terminal field - add it
-            if '/FT' in field:
-                fields.append(field_info)
-
-            # Recursively process children
-            if has_children:
-                for kid in field['/Kids']:
-                    try:
-                        child_info = extract_field_info(kid, field_info['name'])
-                        if child_info:
-                            fields.append(child_info)
-                    except:
-                        pass
-
-        # Process all top-level fields
-        for field in pdf.Root.AcroForm.Fields:
-            try:
-                extract_field_info(field)
-            except Exception as e:
-                print(f"Error processing field: {e}")
-
-        pdf.close()
-        return fields
+# Uploaded files are untrusted, so operations on them run in worker
+# processes with time and memory limits; one worker per admitted operation
+sandbox = Sandbox.from_env(workers=admission.max_active)
 
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
+# Uploads and outputs expire, and their directory has a size quota
+# (see temp_sweeper.py)
+sweeper = TempSweeper.from_env(app.config['UPLOAD_FOLDER'])
 
+# Files too large for one request are uploaded in chunks (see chunked_upload.py)
+chunked_uploads = ChunkedUploads.from_env(app.config['UPLOAD_FOLDER'])
 
-def search_fields(pdf_path, search_term):
-    """Search for fields by name or tooltip"""
-    fields = get_form_fields(pdf_path)
-    if not fields:
-        return []
-
-    search_lower = search_term.lower()
-    results = []
-
-    for field in fields:
-        if (search_lower in field['name'].lower() or
-            search_lower in field['tooltip'].lower()):
-            results.append(field)
+# Identical fill requests reuse the first one's output (see fill_cache.py)
+fill_cache = FillCache.from_env(app.config['UPLOAD_FOLDER'])
 
-    return results
 
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def fill_pdf(input_pdf, output_pdf, field_data):
-    """Fill PDF form fields"""
-    try:
-        pdf = pikepdf.open(input_pdf)
-
-        if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
-            return False, "No form fields found"
-
-        filled_count = 0
-        fields = pdf.Root.AcroForm.Fields
-
-        for field in fields:
-            if '/T' not in field:
-                continue
-
-            field_name = str(field['/T'])
-
-            if field_name in field_data:
-                value = field_data[field_name]
-
-                # Determine field type
-                field_type = None
-                if '/FT' in field:
-                    field_type = str(field['/FT'])
-                elif '/Kids' in field and len(field['/Kids']) > 0:
-                    try:
-                        first_kid = field['/Kids'][0]
-                        if '/FT' in first_kid:
-                            field_type = str(first_kid['/FT'])
-                    except:
-                        pass
-
-                # Fill based on field type
-                try:
-                    if field_type == '/Btn':
-                        if value in [True, 'Yes', 'yes', 'ON', 'On', 1, '1']:
-                            field['/V'] = pikepdf.Name('/Yes')
-                            field['/AS'] = pikepdf.Name('/Yes')
-                        else:
-                            field['/V'] = pikepdf.Name('/Off')
-                            field['/AS'] = pikepdf.Name('/Off')
-                    else:
-                        field['/V'] = str(value)
-
-                    filled_count += 1
-                except Exception as e:
-                    print(f"Error filling {field_name}: {e}")
-
-        pdf.save(output_pdf)
-        pdf.close()
-
-        return True, f"Filled {filled_count} fields"
 
-    except Exception as e:
-        return False, str(e)
+registry = TemplateRegistry.from_file(app.config['TEMPLATE_REGISTRY'])
+for template_id, error in registry.preload():
+    print(f"Warning: could not load registered template '{template_id}': {error}")
 
 
-def remove_defaults(input_pdf, output_pdf, fields_to_clear=None):
-    """Remove default values from fields"""
-    try:
-        pdf = pikepdf.open(input_pdf)
+def get_source(file_id):
+    """Resolve a file id to a registered template or an uploaded file path"""
+    template = registry.get(file_id)
+    if template is not None:
+        return template
 
-        if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
-            return False, "No form fields found"
+    filepath = session.get(file_id)
+    if not filepath or not os.path.exists(filepath):
+        return None
+    return filepath
 
-        cleared_count = 0
-        fields = pdf.Root.AcroForm.Fields
 
-        for field in fields:
-            if '/T' not in field:
-                continue
+def upload_path(content_hash):
+    return os.path.join(app.config['UPLOAD_FOLDER'], f"{content_hash}.pdf")
 
-            field_name = str(field['/T'])
 
-            should_clear = False
-            if fields_to_clear is None:
-                should_clear = '/V' in field
-            else:
-                should_clear = field_name in fields_to_clear and '/V' in field
+def receive_path():
+    """Temporary path in the upload directory to receive an upload into"""
+    fd, path = tempfile.mkstemp(dir=app.config['UPLOAD_FOLDER'], suffix='.part')
+    os.close(fd)
+    return path
 
-            if should_clear:
-                try:
-                    del field['/V']
-                    if '/AP' in field:
-                        del field['/AP']
-                    cleared_count += 1
-                except:
-                    pass
 
-        pdf.save(output_pdf)
-        pdf.close()
+def store_upload(received_path, content_hash=None):
+    """
+    Move a received upload to its content-addressed path; returns
+    (content_hash, path)
 
-        return True, f"Cleared {cleared_count} fields"
+    content_hash is computed unless the caller already has it. When the
+    same bytes are already stored, the new copy is dropped and the stored
+    one touched, so the sweeper keeps it.
+    """
+    try:
+        content_hash = content_hash or file_sha256(received_path)
+        path = upload_path(content_hash)
+        try:
+            os.utime(path)
+            os.unlink(received_path)
+        except FileNotFoundError:
+            os.replace(received_path, path)
+    except BaseException:
+        if os.path.exists(received_path):
+            os.unlink(received_path)
+        raise
+    return content_hash, path
+
+
+def find_upload(content_hash, session_paths):
+    """
+    Where these bytes can be used without uploading them: a
+    RegisteredTemplate, a stored upload already in the caller's session
+    (session_paths: the paths its file ids point to), or None
+
+    Uploads of other sessions are never offered: knowing a file's hash does
+    not prove having the file, and the answer would reveal that it is stored.
+    """
+    template = registry.find_by_hash(content_hash)
+    if template is not None:
+        return template
+
+    path = upload_path(content_hash)
+    if path not in session_paths:
+        return None
+    try:
+        # Touched, so the sweeper keeps it for the session about to use it
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
 
-    except Exception as e:
-        return False, str(e)
 
+def source_hash(source):
+    """Content hash of a registered template or a content-addressed upload, or None"""
+    if isinstance(source, RegisteredTemplate):
+        return source.content_hash
+    content_hash = os.path.splitext(os.path.basename(source))[0]
+    return content_hash if CONTENT_HASH_PATTERN.match(content_hash) else None
 
-def remove_void_watermark(input_pdf, output_pdf):
-    """Remove VOID watermark by hiding btnVoid field and clearing appearance streams"""
-    try:
-        pdf = pikepdf.open(input_pdf)
-
-        if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
-            return False, "No form fields found"
-
-        fields = pdf.Root.AcroForm.Fields
-        found_btnvoid = False
-        found_h_prop = False
-
-        for field in fields:
-            if '/T' not in field:
-                continue
-
-            field_name = str(field['/T'])
-
-            # Hide the btnVoid button (the VOID watermark)
-            if field_name == 'btnVoid':
-                found_btnvoid = True
-
-                # Set field flags to make it hidden (bit 1 = hidden)
-                current_flags = int(field.get('/Ff', 0))
-                new_flags = current_flags | 2
-                field['/Ff'] = new_flags
-
-                # Clear caption and appearance streams
-                if '/Kids' in field:
-                    for kid in field['/Kids']:
-                        if '/MK' in kid:
-                            kid['/MK']['/CA'] = ''
-                        if '/AP' in kid:
-                            del kid['/AP']
-
-                # Remove parent field appearance
-                if '/AP' in field:
-                    del field['/AP']
-
-            # Clear H_Proposition field
-            if field_name == 'H_Proposition':
-                found_h_prop = True
-
-                # Remove ReadOnly flag
-                if '/Ff' in field:
-                    current_flags = int(field['/Ff'])
-                    new_flags = current_flags & ~1
-                    field['/Ff'] = new_flags
-
-                # Set to empty
-                field['/V'] = ''
-                field['/DV'] = ''
-
-                if '/Kids' in field:
-                    for kid in field['/Kids']:
-                        kid['/V'] = ''
-                        if '/AP' in kid:
-                            del kid['/AP']
-
-        if found_btnvoid or found_h_prop:
-            pdf.Root.AcroForm['/NeedAppearances'] = True
-            pdf.save(output_pdf)
-            pdf.close()
-
-            result_msg = "VOID watermark removed successfully!"
-            if found_btnvoid:
-                result_msg += " (btnVoid field hidden)"
-            if found_h_prop:
-                result_msg += " (H_Proposition cleared)"
-
-            return True, result_msg
-        else:
-            pdf.close()
-            return False, "btnVoid or H_Proposition field not found"
 
-    except Exception as e:
-        return False, str(e)
+def stored_manifest(source):
+    """
+    Stored manifest of an upload, found by its content-addressed name
+    without reading the PDF or starting a sandbox worker; None when the
+    upload has not been analyzed yet
+    """
+    if isinstance(source, RegisteredTemplate):
+        return None
+    content_hash = source_hash(source)
+    return load_manifest(content_hash) if content_hash else None
+
+
+def isolated(operation, source, *args):
+    """
+    Run a pdf_operations function on a source; uploads run in the sandbox,
+    registered templates (checked when they were registered) in-process
+    """
+    if isinstance(source, RegisteredTemplate):
+        return operation(source, *args)
+    return sandbox.run(operation, source, *args)
+
+
+def make_room_for_output(source):
+    """Reserve quota for an output about the size of its source; raises QuotaExceeded"""
+    if isinstance(source, RegisteredTemplate):
+        path = source.path
+    else:
+        # An upload in use counts as new, so making room never evicts it
+        os.utime(source)
+        path = source
+    sweeper.make_room(os.path.getsize(path))
+
+
+def cached_fill(source, output_path, field_data):
+    """
+    Fill source into output_path, reusing an identical earlier fill;
+    returns (success, message, cached)
+    """
+    content_hash = source_hash(source)
+    key = fill_cache.key(content_hash, field_data) if fill_cache.enabled and content_hash else None
+    # A hit is a copy too, so it needs the room as much as a fill
+    make_room_for_output(source)
+    if key:
+        message = fill_cache.get(key, output_path)
+        if message is not None:
+            return True, message, True
+
+    success, message = isolated(fill_pdf, source, output_path, field_data)
+    if success and key:
+        fill_cache.put(key, output_path, message)
+    return success, message, False
+
+
+def storage_full_response(exceeded):
+    """507 answer when the upload directory cannot take another file"""
+    response = jsonify({'error': exceeded.message})
+    response.status_code = 507
+    response.headers['Retry-After'] = str(exceeded.retry_after)
+    return response
+
+
+def rejected_response(rejected):
+    """503/429 answer for a request admission control turned away"""
+    response = jsonify({'error': rejected.message})
+    response.status_code = rejected.status
+    response.headers['Retry-After'] = str(rejected.retry_after)
+    return response
+
+
+def admitted(view):
+    """
+    Run a route that does PDF work only once admission control lets it in;
+    a file the sandbox had to stop is answered with 400, a full upload
+    directory with 507
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            with admission.slot(request.remote_addr):
+                return view(*args, **kwargs)
+        except Rejected as e:
+            return rejected_response(e)
+        except SandboxError as e:
+            return jsonify({'error': e.message}), 400
+        except QuotaExceeded as e:
+            return storage_full_response(e)
+    return wrapper
 
 
 @app.route('/')
@@ -315,52 +256,228 @@ def upload_pdf():
     if not allowed_file(file.filename):
         return jsonify({'error': 'Only PDF files are allowed'}), 400
 
-    # Save file with unique name
-    file_id = str(uuid.uuid4())
-    filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{filename}")
-    file.save(filepath)
+    try:
+        sweeper.make_room(request.content_length or 0)
+    except QuotaExceeded as e:
+        return storage_full_response(e)
+
+    # Store the file by content; identical uploads share one copy
+    received = receive_path()
+    file.save(received)
+    content_hash, filepath = store_upload(received)
 
     # Store file info in session
+    file_id = str(uuid.uuid4())
+    session[file_id] = filepath
+
+    return jsonify({
+        'success': True,
+        'file_id': file_id,
+        'filename': secure_filename(file.filename),
+        'content_hash': content_hash
+    })
+
+
+def upload_error_response(error):
+    response = {'error': error.message}
+    if error.received is not None:
+        response['received'] = error.received
+    return jsonify(response), error.status
+
+
+@app.route('/api/upload/chunked', methods=['POST'])
+def start_chunked_upload():
+    """Start a chunked upload: {filename, size, content_hash (optional)}"""
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+    if not allowed_file(filename):
+        return jsonify({'error': 'Only PDF files are allowed'}), 400
+
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'size (bytes) required'}), 400
+
+    content_hash = data.get('content_hash')
+    if content_hash is not None and not CONTENT_HASH_PATTERN.match(str(content_hash).lower()):
+        return jsonify({'error': 'content_hash must be a hex SHA-256'}), 400
+
+    try:
+        status = chunked_uploads.start(filename, size, content_hash)
+    except UploadError as e:
+        return upload_error_response(e)
+
+    try:
+        sweeper.make_room(size)
+    except QuotaExceeded as e:
+        chunked_uploads.abort(status['upload_id'])
+        return storage_full_response(e)
+
+    return jsonify({'success': True, **status})
+
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['GET'])
+def chunked_upload_status(upload_id):
+    """Progress of a chunked upload, to resume it"""
+    try:
+        return jsonify({'success': True, **chunked_uploads.status(upload_id)})
+    except UploadError as e:
+        return upload_error_response(e)
+
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """Append the request body at ?offset=N; X-Chunk-SHA256 is checked when sent"""
+    offset = request.args.get('offset', type=int)
+    if offset is None or request.content_length is None:
+        return jsonify({'error': 'offset and Content-Length required'}), 400
+
+    try:
+        received = chunked_uploads.write_chunk(upload_id, offset, request.stream, request.content_length,
+                                               request.headers.get('X-Chunk-SHA256'))
+    except UploadError as e:
+        return upload_error_response(e)
+
+    return jsonify({'success': True, 'received': received})
+
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['DELETE'])
+def abort_chunked_upload(upload_id):
+    try:
+        chunked_uploads.abort(upload_id)
+    except UploadError as e:
+        return upload_error_response(e)
+    return jsonify({'success': True})
+
+
+@app.route('/api/upload/chunked/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    """Store a fully received chunked upload; answers like /api/upload"""
+    try:
+        filename, content_hash, part_path = chunked_uploads.complete(upload_id)
+    except UploadError as e:
+        return upload_error_response(e)
+
+    content_hash, filepath = store_upload(part_path, content_hash)
+    file_id = str(uuid.uuid4())
     session[file_id] = filepath
 
     return jsonify({
         'success': True,
         'file_id': file_id,
-        'filename': filename
+        'filename': filename,
+        'content_hash': content_hash
     })
 
 
+@app.route('/api/upload/check', methods=['POST'])
+def check_upload():
+    """
+    Pre-upload handshake: the browser sends the SHA-256 of a file, and when
+    it is a registered template or already uploaded in this session the
+    upload is skipped
+    """
+    data = request.get_json(silent=True) or {}
+    content_hash = str(data.get('content_hash', '')).lower()
+    if not CONTENT_HASH_PATTERN.match(content_hash):
+        return jsonify({'error': 'content_hash (hex SHA-256) required'}), 400
+
+    filename = secure_filename(data.get('filename') or 'upload.pdf')
+    if not allowed_file(filename):
+        return jsonify({'error': 'Only PDF files are allowed'}), 400
+
+    existing = find_upload(content_hash, set(session.values()))
+    if existing is None:
+        return jsonify({'success': True, 'exists': False})
+
+    if isinstance(existing, RegisteredTemplate):
+        file_id = existing.id
+    else:
+        file_id = str(uuid.uuid4())
+        session[file_id] = existing
+
+    return jsonify({
+        'success': True,
+        'exists': True,
+        'file_id': file_id,
+        'filename': filename,
+        'content_hash': content_hash
+    })
+
+
+@app.route('/api/templates')
+def list_templates():
+    """List registered templates that can be used instead of an upload"""
+    templates = registry.list()
+    return jsonify({
+        'success': True,
+        'count': len(templates),
+        'templates': templates
+    })
+
+
+def server_status():
+    """Temp storage usage, admission and sandbox counters of this process"""
+    sandbox_stats = sandbox.stats()
+    # Recent failures name uploaded files; they are for the error log only
+    del sandbox_stats['recent_failures']
+    return {
+        'pid': os.getpid(),
+        'storage': sweeper.usage(),
+        'admission': admission.stats(),
+        'sandbox': sandbox_stats,
+        'fill_cache': fill_cache.stats()
+    }
+
+
+@app.route('/api/status')
+def status():
+    """Usage metrics of the server process that answers"""
+    return jsonify({'success': True, **server_status()})
+
+
 @app.route('/api/fields/<file_id>')
+@admitted
 def get_fields(file_id):
     """Get all fields from a PDF"""
-    filepath = session.get(file_id)
-    if not filepath or not os.path.exists(filepath):
+    source = get_source(file_id)
+    if source is None:
         return jsonify({'error': 'File not found'}), 404
 
-    fields = get_form_fields(filepath)
-    if fields is None:
+    try:
+        manifest = stored_manifest(source) or isolated(get_manifest, source)
+    except SandboxError:
+        raise
+    except Exception as e:
+        print(f"Error: {e}")
+        manifest = None
+
+    if manifest is None or manifest.form_fields is None:
         return jsonify({'error': 'No form fields found'}), 400
 
+    # The content hash is the browser's field cache key
     return jsonify({
         'success': True,
-        'count': len(fields),
-        'fields': fields
+        'count': len(manifest.form_fields),
+        'fields': manifest.form_fields,
+        'content_hash': manifest.content_hash
     })
 
 
 @app.route('/api/search/<file_id>')
+@admitted
 def search_fields_api(file_id):
     """Search for fields"""
-    filepath = session.get(file_id)
-    if not filepath or not os.path.exists(filepath):
+    source = get_source(file_id)
+    if source is None:
         return jsonify({'error': 'File not found'}), 404
 
     search_term = request.args.get('q', '')
     if not search_term:
         return jsonify({'error': 'Search term required'}), 400
 
-    results = search_fields(filepath, search_term)
+    manifest = stored_manifest(source)
+    results = manifest.search(search_term) if manifest else isolated(search_fields, source, search_term)
 
     return jsonify({
         'success': True,
@@ -370,10 +487,11 @@ def search_fields_api(file_id):
 
 
 @app.route('/api/fill/<file_id>', methods=['POST'])
+@admitted
 def fill_pdf_api(file_id):
     """Fill PDF with data"""
-    filepath = session.get(file_id)
-    if not filepath or not os.path.exists(filepath):
+    source = get_source(file_id)
+    if source is None:
         return jsonify({'error': 'File not found'}), 404
 
     data = request.json
@@ -384,7 +502,7 @@ def fill_pdf_api(file_id):
     output_id = str(uuid.uuid4())
     output_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{output_id}_filled.pdf")
 
-    success, message = fill_pdf(filepath, output_path, data['fields'])
+    success, message, cached = cached_fill(source, output_path, data['fields'])
 
     if not success:
         return jsonify({'error': message}), 400
@@ -394,25 +512,28 @@ def fill_pdf_api(file_id):
     return jsonify({
         'success': True,
         'message': message,
-        'output_id': output_id
+        'output_id': output_id,
+        'cached': cached
     })
 
 
 @app.route('/api/remove-defaults/<file_id>', methods=['POST'])
+@admitted
 def remove_defaults_api(file_id):
     """Remove default values"""
-    filepath = session.get(file_id)
-    if not filepath or not os.path.exists(filepath):
+    source = get_source(file_id)
+    if source is None:
         return jsonify({'error': 'File not found'}), 404
 
     data = request.json or {}
     fields_to_clear = data.get('fields')
 
     # Create output file
+    make_room_for_output(source)
     output_id = str(uuid.uuid4())
     output_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{output_id}_clean.pdf")
 
-    success, message = remove_defaults(filepath, output_path, fields_to_clear)
+    success, message = isolated(remove_defaults, source, output_path, fields_to_clear)
 
     if not success:
         return jsonify({'error': message}), 400
@@ -437,15 +558,17 @@ def download_file(file_id):
 
 
 @app.route('/api/template/<file_id>')
+@admitted
 def generate_template_api(file_id):
     """Generate JSON template"""
-    filepath = session.get(file_id)
-    if not filepath or not os.path.exists(filepath):
+    source = get_source(file_id)
+    if source is None:
         return jsonify({'error': 'File not found'}), 404
 
     section = request.args.get('section', '').upper()
 
-    fields = get_form_fields(filepath)
+    manifest = stored_manifest(source)
+    fields = manifest.form_fields if manifest else isolated(get_form_fields, source)
     if not fields:
         return jsonify({'error': 'No form fields found'}), 400
 
@@ -471,17 +594,19 @@ def generate_template_api(file_id):
 
 
 @app.route('/api/remove-void/<file_id>', methods=['POST'])
+@admitted
 def remove_void_api(file_id):
     """Remove VOID watermark from PDF"""
-    filepath = session.get(file_id)
-    if not filepath or not os.path.exists(filepath):
+    source = get_source(file_id)
+    if source is None:
         return jsonify({'error': 'File not found'}), 404
 
     # Create output file
+    make_room_for_output(source)
     output_id = str(uuid.uuid4())
     output_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{output_id}_no_void.pdf")
 
-    success, message = remove_void_watermark(filepath, output_path)
+    success, message = isolated(remove_void_watermark, source, output_path)
 
     if not success:
         return jsonify({'error': message}), 400
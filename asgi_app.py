@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+PDF Form Filler - ASGI variant of the web API
+
+The same routes, responses and session cookie as app.py, served by an ASGI
+server with Quart. Request and response bodies are read and written
+asynchronously, so a slow client uploading a 16 MB file or downloading a
+filled PDF holds a coroutine, not a worker process or thread.
+
+All pikepdf work - opening, filling, saving, extracting fields when no
+manifest is stored - runs in a bounded thread pool (PDF_THREADS, one per CPU
+by default, PDFFILL_PDF_THREADS to change it). Requests waiting for a pool
+thread are queued without holding a thread of their own, so thousands of
+mostly-idle connections cost no more than a few pool threads. The PDF
+operations and registered templates are app.py's, so both front ends
+behave the same and share uploads and session cookies. Admission control
+(admission.py) is also the same: at most PDF_THREADS PDF operations run,
+a bounded queue waits as coroutines, and the rest get 503 or 429. Pool
+threads hand operations on uploads to app.py's sandbox (sandbox.py) and
+wait for the worker process. A chunk of a chunked upload (chunked_upload.py)
+is read into memory before it is written, so at most CHUNK_SIZE per request.
+
+    python asgi_app.py [--host 127.0.0.1] [--port 5000]    # Single process (uvicorn)
+    python serve.py --asgi --workers 4                     # Pre-forked workers (gunicorn)
+"""
+
+import sys
+import os
+import io
+import uuid
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Quart, render_template, request, jsonify, send_file, session
+from werkzeug.utils import secure_filename
+
+import app as wsgi
+from app import registry, allowed_file, chunked_uploads
+from admission import AdmissionController, Rejected
+from chunked_upload import UploadError
+from sandbox import SandboxError
+from temp_sweeper import QuotaExceeded
+from template_registry import RegisteredTemplate
+
+PDF_THREADS = int(os.environ.get('PDFFILL_PDF_THREADS', os.cpu_count() or 1))
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+app = Quart(__name__)
+app.secret_key = wsgi.app.secret_key
+app.config['MAX_CONTENT_LENGTH'] = wsgi.app.config['MAX_CONTENT_LENGTH']
+app.config['UPLOAD_FOLDER'] = wsgi.app.config['UPLOAD_FOLDER']
+# Slow uploads only cost a coroutine here, so give them longer than Quart's 60s
+app.config['BODY_TIMEOUT'] = 300
+
+# Threads start on first use, so the pool is safe to create before a pre-fork
+pdf_executor = ThreadPoolExecutor(max_workers=PDF_THREADS, thread_name_prefix='pdf')
+
+# By default one admitted request per pool thread, so admitted work does not
+# queue again in the pool
+admission = AdmissionController.from_env(max_active=PDF_THREADS)
+
+
+async def run_pdf(func, *args):
+    """Run blocking PDF work in the bounded pool and wait for it"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pdf_executor, functools.partial(func, *args))
+
+
+async def get_source(file_id):
+    """Resolve a file id to a registered template or an uploaded file path"""
+    if file_id in registry:
+        # Reloads a template whose file changed, so keep it off the event loop
+        return await run_pdf(registry.get, file_id)
+
+    filepath = session.get(file_id)
+    if not filepath or not os.path.exists(filepath):
+        return None
+    return filepath
+
+
+def rejected_response(rejected):
+    """503/429 answer for a request admission control turned away"""
+    response = jsonify({'error': rejected.message})
+    response.status_code = rejected.status
+    response.headers['Retry-After'] = str(rejected.retry_after)
+    return response
+
+
+def storage_full_response(exceeded):
+    """507 answer when the upload directory cannot take another file"""
+    response = jsonify({'error': exceeded.message})
+    response.status_code = 507
+    response.headers['Retry-After'] = str(exceeded.retry_after)
+    return response
+
+
+def upload_error_response(error):
+    response = jsonify({'error': error.message} if error.received is None
+                       else {'error': error.message, 'received': error.received})
+    response.status_code = error.status
+    return response
+
+
+def admitted(view):
+    """
+    Run a route that does PDF work only once admission control lets it in;
+    a file the sandbox had to stop is answered with 400, a full upload
+    directory with 507
+    """
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        # Read the body first, so a slow client does not hold a slot meanwhile
+        await request.get_data()
+        try:
+            async with admission.slot_async(request.remote_addr):
+                return await view(*args, **kwargs)
+        except Rejected as e:
+            return rejected_response(e)
+        except SandboxError as e:
+            return jsonify({'error': e.message}), 400
+        except QuotaExceeded as e:
+            return storage_full_response(e)
+    return wrapper
+
+
+async def run_output_operation(operation, source, suffix, *args):
+    """Run an app.py operation that writes a new PDF, and answer like app.py"""
+    # May rescan the upload directory, so keep it off the event loop
+    await run_pdf(wsgi.make_room_for_output, source)
+    output_id = str(uuid.uuid4())
+    output_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{output_id}_{suffix}.pdf")
+
+    success, message = await run_pdf(wsgi.isolated, operation, source, output_path, *args)
+
+    if not success:
+        return jsonify({'error': message}), 400
+
+    session[output_id] = output_path
+
+    return jsonify({
+        'success': True,
+        'message': message,
+        'output_id': output_id
+    })
+
+
+@app.route('/')
+async def index():
+    return await render_template('index.html')
+
+
+@app.route('/api/upload', methods=['POST'])
+async def upload_pdf():
+    """Upload a PDF file"""
+    files = await request.files
+    if 'file' not in files:
+        return jsonify({'error': 'No file provided'}), 400
+
+    file = files['file']
+
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Only PDF files are allowed'}), 400
+
+    try:
+        await run_pdf(wsgi.sweeper.make_room, request.content_length or 0)
+    except QuotaExceeded as e:
+        return storage_full_response(e)
+
+    # Store the file by content; identical uploads share one copy
+    received = wsgi.receive_path()
+    await file.save(received)
+    content_hash, filepath = await run_pdf(wsgi.store_upload, received)
+
+    # Store file info in session
+    file_id = str(uuid.uuid4())
+    session[file_id] = filepath
+
+    return jsonify({
+        'success': True,
+        'file_id': file_id,
+        'filename': secure_filename(file.filename),
+        'content_hash': content_hash
+    })
+
+
+@app.route('/api/upload/chunked', methods=['POST'])
+async def start_chunked_upload():
+    """Start a chunked upload; see app.py"""
+    data = await request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+    if not allowed_file(filename):
+        return jsonify({'error': 'Only PDF files are allowed'}), 400
+
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'size (bytes) required'}), 400
+
+    content_hash = data.get('content_hash')
+    if content_hash is not None and not wsgi.CONTENT_HASH_PATTERN.match(str(content_hash).lower()):
+        return jsonify({'error': 'content_hash must be a hex SHA-256'}), 400
+
+    try:
+        status = await run_pdf(chunked_uploads.start, filename, size, content_hash)
+    except UploadError as e:
+        return upload_error_response(e)
+
+    try:
+        await run_pdf(wsgi.sweeper.make_room, size)
+    except QuotaExceeded as e:
+        await run_pdf(chunked_uploads.abort, status['upload_id'])
+        return storage_full_response(e)
+
+    return jsonify({'success': True, **status})
+
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['GET'])
+async def chunked_upload_status(upload_id):
+    """Progress of a chunked upload, to resume it"""
+    try:
+        return jsonify({'success': True, **await run_pdf(chunked_uploads.status, upload_id)})
+    except UploadError as e:
+        return upload_error_response(e)
+
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['PUT'])
+async def upload_chunk(upload_id):
+    """Append the request body at ?offset=N; X-Chunk-SHA256 is checked when sent"""
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'offset required'}), 400
+
+    chunk = await request.get_data()
+    try:
+        received = await run_pdf(chunked_uploads.write_chunk, upload_id, offset, io.BytesIO(chunk),
+                                 len(chunk), request.headers.get('X-Chunk-SHA256'))
+    except UploadError as e:
+        return upload_error_response(e)
+
+    return jsonify({'success': True, 'received': received})
+
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['DELETE'])
+async def abort_chunked_upload(upload_id):
+    try:
+        await run_pdf(chunked_uploads.abort, upload_id)
+    except UploadError as e:
+        return upload_error_response(e)
+    return jsonify({'success': True})
+
+
+@app.route('/api/upload/chunked/<upload_id>/complete', methods=['POST'])
+async def complete_chunked_upload(upload_id):
+    """Store a fully received chunked upload; answers like /api/upload"""
+    try:
+        filename, content_hash, part_path = await run_pdf(chunked_uploads.complete, upload_id)
+    except UploadError as e:
+        return upload_error_response(e)
+
+    content_hash, filepath = await run_pdf(wsgi.store_upload, part_path, content_hash)
+    file_id = str(uuid.uuid4())
+    session[file_id] = filepath
+
+    return jsonify({
+        'success': True,
+        'file_id': file_id,
+        'filename': filename,
+        'content_hash': content_hash
+    })
+
+
+@app.route('/api/upload/check', methods=['POST'])
+async def check_upload():
+    """Pre-upload handshake; see app.py"""
+    data = await request.get_json(silent=True) or {}
+    content_hash = str(data.get('content_hash', '')).lower()
+    if not wsgi.CONTENT_HASH_PATTERN.match(content_hash):
+        return jsonify({'error': 'content_hash (hex SHA-256) required'}), 400
+
+    filename = secure_filename(data.get('filename') or 'upload.pdf')
+    if not allowed_file(filename):
+        return jsonify({'error': 'Only PDF files are allowed'}), 400
+
+    existing = await run_pdf(wsgi.find_upload, content_hash, set(session.values()))
+    if existing is None:
+        return jsonify({'success': True, 'exists': False})
+
+    if isinstance(existing, RegisteredTemplate):
+        file_id = existing.id
+    else:
+        file_id = str(uuid.uuid4())
+        session[file_id] = existing
+
+    return jsonify({
+        'success': True,
+        'exists': True,
+        'file_id': file_id,
+        'filename': filename,
+        'content_hash': content_hash
+    })
+
+
+@app.route('/api/templates')
+async def list_templates():
+    """List registered templates that can be used instead of an upload"""
+    templates = await run_pdf(registry.list)
+    return jsonify({
+        'success': True,
+        'count': len(templates),
+        'templates': templates
+    })
+
+
+@app.route('/api/status')
+async def status():
+    """Usage metrics of the server process that answers"""
+    # Admission counters are this app's own; storage and sandbox are app.py's
+    return jsonify({'success': True, **wsgi.server_status(), 'admission': admission.stats()})
+
+
+@app.route('/api/fields/<file_id>')
+@admitted
+async def get_fields(file_id):
+    """Get all fields from a PDF"""
+    source = await get_source(file_id)
+    if source is None:
+        return jsonify({'error': 'File not found'}), 404
+
+    try:
+        manifest = (await run_pdf(wsgi.stored_manifest, source)
+                    or await run_pdf(wsgi.isolated, wsgi.get_manifest, source))
+    except SandboxError:
+        raise
+    except Exception as e:
+        print(f"Error: {e}")
+        manifest = None
+
+    if manifest is None or manifest.form_fields is None:
+        return jsonify({'error': 'No form fields found'}), 400
+
+    return jsonify({
+        'success': True,
+        'count': len(manifest.form_fields),
+        'fields': manifest.form_fields,
+        'content_hash': manifest.content_hash
+    })
+
+
+@app.route('/api/search/<file_id>')
+@admitted
+async def search_fields_api(file_id):
+    """Search for fields"""
+    source = await get_source(file_id)
+    if source is None:
+        return jsonify({'error': 'File not found'}), 404
+
+    search_term = request.args.get('q', '')
+    if not search_term:
+        return jsonify({'error': 'Search term required'}), 400
+
+    manifest = await run_pdf(wsgi.stored_manifest, source)
+    if manifest:
+        results = manifest.search(search_term)
+    else:
+        results = await run_pdf(wsgi.isolated, wsgi.search_fields, source, search_term)
+
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'results': results
+    })
+
+
+@app.route('/api/fill/<file_id>', methods=['POST'])
+@admitted
+async def fill_pdf_api(file_id):
+    """Fill PDF with data"""
+    source = await get_source(file_id)
+    if source is None:
+        return jsonify({'error': 'File not found'}), 404
+
+    data = await request.get_json(silent=True)
+    if not data or 'fields' not in data:
+        return jsonify({'error': 'Field data required'}), 400
+
+    output_id = str(uuid.uuid4())
+    output_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{output_id}_filled.pdf")
+    success, message, cached = await run_pdf(wsgi.cached_fill, source, output_path, data['fields'])
+
+    if not success:
+        return jsonify({'error': message}), 400
+
+    session[output_id] = output_path
+
+    return jsonify({
+        'success': True,
+        'message': message,
+        'output_id': output_id,
+        'cached': cached
+    })
+
+
+@app.route('/api/remove-defaults/<file_id>', methods=['POST'])
+@admitted
+async def remove_defaults_api(file_id):
+    """Remove default values"""
+    source = await get_source(file_id)
+    if source is None:
+        return jsonify({'error': 'File not found'}), 404
+
+    data = await request.get_json(silent=True) or {}
+    return await run_output_operation(wsgi.remove_defaults, source, 'clean', data.get('fields'))
+
+
+@app.route('/api/download/<file_id>')
+async def download_file(file_id):
+    """Download a processed PDF"""
+    filepath = session.get(file_id)
+    if not filepath or not os.path.exists(filepath):
+        return jsonify({'error': 'File not found'}), 404
+
+    response = await send_file(filepath, as_attachment=True, attachment_filename=f"output_{file_id}.pdf")
+    # Quart reads files 8 KB at a time, each read a hop to a thread; a filled
+    # form is a few MB, so read it in fewer, larger chunks
+    response.response.buffer_size = DOWNLOAD_CHUNK_SIZE
+    return response
+
+
+@app.route('/api/template/<file_id>')
+@admitted
+async def generate_template_api(file_id):
+    """Generate JSON template"""
+    source = await get_source(file_id)
+    if source is None:
+        return jsonify({'error': 'File not found'}), 404
+
+    section = request.args.get('section', '').upper()
+
+    manifest = await run_pdf(wsgi.stored_manifest, source)
+    if manifest:
+        fields = manifest.form_fields
+    else:
+        fields = await run_pdf(wsgi.isolated, wsgi.get_form_fields, source)
+    if not fields:
+        return jsonify({'error': 'No form fields found'}), 400
+
+    # Filter by section if specified
+    if section:
+        fields = [f for f in fields if f['name'].startswith(section)]
+
+    template_list = [{
+        'name': field['name'],
+        'value': '' if field['type'] != 'checkbox' else 'Off',
+        'type': field['type'],
+        'description': field['tooltip']
+    } for field in fields]
+
+    return jsonify({
+        'success': True,
+        'template': template_list,
+        'count': len(template_list)
+    })
+
+
+@app.route('/api/remove-void/<file_id>', methods=['POST'])
+@admitted
+async def remove_void_api(file_id):
+    """Remove VOID watermark"""
+    source = await get_source(file_id)
+    if source is None:
+        return jsonify({'error': 'File not found'}), 404
+
+    return await run_output_operation(wsgi.remove_void_watermark, source, 'no_void')
+
+
+def main():
+    from serve import take_option
+
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print("Usage: python asgi_app.py [--host HOST] [--port PORT]")
+        print("\nRuns one uvicorn process. For pre-forked workers: python serve.py --asgi --workers N")
+        sys.exit(0)
+
+    host = take_option(args, '--host', default='127.0.0.1')
+    port = take_option(args, '--port', int, 5000)
+    if args:
+        print(f"Error: Unknown arguments - {' '.join(args)} (see --help)")
+        sys.exit(1)
+
+    import uvicorn
+    uvicorn.run(app, host=host, port=port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Fill a PDF template once per record
+
+Records come from a JSON file (a list of field name -> value objects) or a
+CSV file whose header row holds the field names. Empty CSV cells are left
+unfilled.
+
+By default each record is written to its own file in an output directory.
+
+With --merge every record goes into one document for print runs. Each copy
+of a template page refers to the template's own content streams and
+resources, so fonts, images and page content are stored once. Only the form
+fields and their widget annotations are copied per record, grouped under a
+parent field per copy: "A04t" of the first record becomes "copy_0001.A04t".
+File size grows with the data, not with the number of copies.
+"""
+
+import sys
+import csv
+import copy
+import json
+from pathlib import Path
+from pdf_template import Template, open_pdf, close_pdf, SAVE_OPTIONS
+from fill_pdf import FillReport, fill_fields, fields_to_fill
+from fill_schema import FillSchema, print_errors
+
+# Page attributes a page may inherit from the page tree
+INHERITABLE_PAGE_KEYS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+# Page keys that are rebuilt per copy or tie the page to the template's
+# structure tree and page-level scripts
+DROPPED_PAGE_KEYS = ('/Annots', '/Parent', '/StructParents', '/AA')
+
+# Catalog entries that point at the template's own pages or fields. Keeping
+# them would pull the template pages back into the merged file.
+DROPPED_CATALOG_KEYS = ('/Outlines', '/StructTreeRoot', '/MarkInfo', '/OpenAction',
+                        '/AA', '/PageLabels', '/Dests')
+
+
+def load_records(records_path):
+    """Load records from a .csv file or a JSON list; raises ValueError on bad input"""
+    path = Path(records_path)
+
+    if path.suffix.lower() == '.csv':
+        with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+            return [{name: value for name, value in row.items() if name and value != ''}
+                    for row in csv.DictReader(f)]
+
+    with open(path, 'r') as f:
+        records = json.load(f)
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError("JSON records must be a list of objects")
+    return records
+
+
+def _top_level_fields(pdf):
+    fields = {}
+    if '/AcroForm' in pdf.Root and '/Fields' in pdf.Root.AcroForm:
+        for field in pdf.Root.AcroForm.Fields:
+            if '/T' in field:
+                fields.setdefault(str(field['/T']), field)
+    return fields
+
+
+def fill_separately(template_path, records, output_dir):
+    """
+    Write one filled PDF per record; returns a FillReport per record
+
+    records is a list of (number, record) pairs - the number names the
+    output file, so files still match input rows when records were rejected.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    template = Template(template_path)
+    stem = Path(template_path).stem
+    reports = []
+
+    try:
+        for i, record in records:
+            # Records were validated as a batch before
+            with template.fill(record, validate=False) as document:
+                if document:
+                    document.save(output_dir / f"{stem}_{i:04d}.pdf")
+                reports.append(document.report)
+    finally:
+        template.close()
+
+    return reports
+
+
+def _inherited(page, key):
+    node = page
+    while node is not None:
+        if key in node:
+            return node[key]
+        node = node.get('/Parent')
+    return None
+
+
+def _shallow_copy(obj, dropped_keys):
+    """Direct copy of a dictionary without dropped_keys; values are shared, not copied"""
+    new_obj = copy.copy(obj)
+    for key in dropped_keys:
+        if key in new_obj:
+            del new_obj[key]
+    return new_obj
+
+
+def _copy_page(pdf, page):
+    """New page sharing the template page's contents and resources by reference"""
+    new_page = _shallow_copy(page, DROPPED_PAGE_KEYS)
+    for key in INHERITABLE_PAGE_KEYS:
+        if key not in new_page:
+            value = _inherited(page, key)
+            if value is not None:
+                new_page[key] = value
+    return pdf.make_indirect(new_page)
+
+
+def _remap_destination(dest, page_map):
+    """Point an explicit [page /XYZ ...] destination at the same copy's page"""
+    import pikepdf
+
+    if isinstance(dest, pikepdf.Array) and len(dest) and dest[0].is_indirect:
+        new_page = page_map.get(dest[0].objgen)
+        if new_page is not None:
+            dest = pikepdf.Array(list(dest))
+            dest[0] = new_page
+    return dest
+
+
+def _copy_annotation(pdf, annot, page_map):
+    """Copy a non-field annotation (links etc.) onto the copied page"""
+    import pikepdf
+
+    new_annot = _shallow_copy(annot, ('/P', '/Parent', '/Popup', '/StructParent'))
+
+    if '/Dest' in annot:
+        new_annot['/Dest'] = _remap_destination(annot['/Dest'], page_map)
+    if '/A' in annot and '/D' in annot['/A']:
+        action = pikepdf.Dictionary(annot['/A'])
+        action['/D'] = _remap_destination(action['/D'], page_map)
+        new_annot['/A'] = action
+    return pdf.make_indirect(new_annot)
+
+
+# Field keys rebuilt for each copy
+FIELD_COPY_DROPPED_KEYS = ('/Kids', '/Parent', '/P', '/StructParent')
+
+
+def _plan_field_tree(template_fields):
+    """
+    Flatten the template's field tree once, parents before kids
+
+    Each entry is [objgen, stripped node, parent index, page objgen, kid
+    indices]. The stripped node is a direct copy without the keys that differ
+    per copy, so copying a field for a record is a single shallow copy.
+    """
+    plan = []
+
+    def add(node, parent_index):
+        index = len(plan)
+        page = node.get('/P')
+        plan.append([node.objgen, _shallow_copy(node, FIELD_COPY_DROPPED_KEYS), parent_index,
+                     page.objgen if page is not None else None, []])
+        if parent_index is not None:
+            plan[parent_index][4].append(index)
+        for kid in node.get('/Kids', []):
+            add(kid, index)
+
+    for field in template_fields:
+        add(field, None)
+    return plan
+
+
+def _copy_field_tree(pdf, plan, parent, page_map):
+    """
+    Copy every field and widget of the template under parent
+
+    Appearance streams and other indirect values stay shared with the
+    template. Returns a dict of template objgen -> copied node.
+    """
+    import pikepdf
+
+    nodes = []
+    for _, stripped, parent_index, page_objgen, _ in plan:
+        node = pdf.make_indirect(copy.copy(stripped))
+        node['/Parent'] = parent if parent_index is None else nodes[parent_index]
+        if page_objgen in page_map:
+            node['/P'] = page_map[page_objgen]
+        nodes.append(node)
+
+    for node, entry in zip(nodes, plan):
+        if entry[4]:
+            node['/Kids'] = pikepdf.Array([nodes[i] for i in entry[4]])
+
+    return {entry[0]: node for entry, node in zip(plan, nodes)}
+
+
+def merge_records(template_path, records, output_pdf):
+    """
+    Write all records into one PDF whose copies share the template's pages' content
+
+    records is a list of (number, record) pairs; the number names each
+    copy's parent field. Returns a FillReport per record; they share the
+    merged output file.
+    """
+    import pikepdf
+
+    pdf = open_pdf(template_path, writable=True)
+    try:
+        template_pages = [page.obj for page in pdf.pages]
+        template_fields = _top_level_fields(pdf)
+
+        # Shared objects must be indirect, or every copy would embed its own copy
+        for page in template_pages:
+            for key in ('/Contents', '/Resources'):
+                value = page.get(key) if key == '/Contents' else _inherited(page, key)
+                if value is not None and not value.is_indirect:
+                    page[key] = pdf.make_indirect(value)
+
+        plan = _plan_field_tree(template_fields.values())
+        top_level = [(name, field.objgen) for name, field in template_fields.items()]
+
+        # Per page: the template objgen of each widget, or the annotation itself
+        # when it is not part of the field tree (links etc.)
+        in_tree = {entry[0] for entry in plan}
+        page_annots = []
+        for page in template_pages:
+            annots = []
+            for annot in page.get('/Annots', []):
+                if annot.is_indirect and annot.objgen in in_tree:
+                    annots.append(annot.objgen)
+                elif annot.get('/Subtype') != pikepdf.Name('/Widget'):
+                    annots.append(annot)
+            page_annots.append(annots)
+
+        parents = []
+        reports = []
+
+        for i, record in records:
+            page_map = {page.objgen: _copy_page(pdf, page) for page in template_pages}
+
+            parent = pdf.make_indirect(pikepdf.Dictionary(T=pikepdf.String(f"copy_{i:04d}")))
+            copies = _copy_field_tree(pdf, plan, parent, page_map)
+            parent['/Kids'] = pikepdf.Array([copies[objgen] for _, objgen in top_level])
+            parents.append(parent)
+
+            for page, annots in zip(template_pages, page_annots):
+                new_page = page_map[page.objgen]
+                if annots:
+                    new_page['/Annots'] = pikepdf.Array([
+                        copies[annot] if isinstance(annot, tuple) else _copy_annotation(pdf, annot, page_map)
+                        for annot in annots
+                    ])
+                pdf.pages.append(pikepdf.Page(new_page))
+
+            report = FillReport(template_path, output_pdf)
+            report.field_count = len(top_level)
+            with report.phase('fill'):
+                fill_fields((copies[objgen] for _, objgen in top_level), fields_to_fill(record, report), report)
+            reports.append(report)
+
+        # Drop the template's own pages and everything that points at them
+        for _ in range(len(template_pages)):
+            del pdf.pages[0]
+        for key in DROPPED_CATALOG_KEYS:
+            if key in pdf.Root:
+                del pdf.Root[key]
+        if '/Names' in pdf.Root and '/Dests' in pdf.Root.Names:
+            del pdf.Root.Names['/Dests']
+
+        acroform = pdf.Root.AcroForm
+        acroform['/Fields'] = pikepdf.Array(parents)
+        # The calculation order and XFA describe the single template form
+        for key in ('/CO', '/XFA'):
+            if key in acroform:
+                del acroform[key]
+        acroform['/NeedAppearances'] = True
+
+        pdf.save(output_pdf, object_stream_mode=pikepdf.ObjectStreamMode.generate, **SAVE_OPTIONS)
+        for report in reports:
+            report.saved = True
+    finally:
+        close_pdf(pdf)
+
+    return reports
+
+
+def main():
+    args = sys.argv[1:]
+    merge = '--merge' in args
+    validate = '--no-validate' not in args
+    quiet = '--quiet' in args
+    args = [arg for arg in args if arg not in ('--merge', '--no-validate', '--quiet')]
+
+    if len(args) < 3:
+        print("Usage: python batch_fill.py <template.pdf> <records.json|records.csv> <output_dir>")
+        print("       python batch_fill.py <template.pdf> <records.json|records.csv> <output.pdf> --merge")
+        print("\nExamples:")
+        print('  python batch_fill.py CLEAN_TEMPLATE.pdf clients.csv filled/')
+        print('  python batch_fill.py CLEAN_TEMPLATE.pdf clients.json print_run.pdf --merge')
+        print("\nRecords that fail validation against the template are skipped;")
+        print("--no-validate fills every record with whatever fields match.")
+        print("--quiet prints only the totals, not a line per record.")
+        sys.exit(1)
+
+    template_path, records_path, output_path = args[:3]
+
+    if not Path(template_path).exists():
+        print(f"Error: Template not found - {template_path}")
+        sys.exit(1)
+    if not Path(records_path).exists():
+        print(f"Error: Records file not found - {records_path}")
+        sys.exit(1)
+
+    try:
+        records = load_records(records_path)
+    except (ValueError, json.JSONDecodeError, csv.Error) as e:
+        print(f"Error: Invalid records - {e}")
+        sys.exit(1)
+
+    numbered = list(enumerate(records, 1))
+
+    # Reject bad records before any of them costs a fill and a save
+    if validate:
+        errors = FillSchema.from_file(template_path).validate_records(records)
+        if errors:
+            print_errors(errors)
+            print(f"⚠️  Skipping {len(errors)} invalid records\n")
+            numbered = [(i, record) for i, record in numbered if i - 1 not in errors]
+
+    if not numbered:
+        print("✗ No valid records to fill")
+        sys.exit(1)
+
+    print(f"Filling {template_path} with {len(numbered)} records\n")
+
+    if merge:
+        reports = merge_records(template_path, numbered, output_path)
+        size_kb = Path(output_path).stat().st_size / 1024
+        print(f"✓ Merged {len(numbered)} copies into {output_path} ({size_kb:.1f} KB)")
+    else:
+        reports = fill_separately(template_path, numbered, output_path)
+        if quiet:
+            print(f"✓ Wrote {len(reports)} files to {output_path}")
+        else:
+            for (i, _), report in zip(numbered, reports):
+                print(f"✓ Record {i}: {len(report.filled)} fields → {report.output_pdf}")
+
+    not_found = set()
+    for report in reports:
+        not_found.update(report.not_found)
+    if not_found:
+        names = sorted(not_found)
+        print(f"\n⚠️  Fields not found in template: {', '.join(names[:10])}"
+              f"{f' ... and {len(names) - 10} more' if len(names) > 10 else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the core PDF operations
+
+Each benchmark runs one operation (fill_pdf, get_form_fields, ...) against a
+template and records:
+- time: wall-clock seconds of every repeat, after one warm-up run
+- peak_memory: growth of the peak RSS while the operation runs once in a
+  fresh process (pikepdf allocates outside the Python heap, so tracemalloc
+  would miss most of it). The child resets its high-water mark through
+  /proc/self/clear_refs just before the operation and reads VmHWM after it:
+  ru_maxrss would carry over the parent's peak across fork/exec, making
+  the result depend on what the suite ran before.
+- size: bytes of the output file, for operations that write one
+
+Results can be saved as a baseline for perf_gate.py, which reruns the suite
+and fails when an operation gets slower, uses more memory or writes larger
+files than the baseline.
+"""
+
+import sys
+import os
+import gc
+import io
+import json
+import math
+import time
+import platform
+import tempfile
+import statistics
+import subprocess
+import contextlib
+from pathlib import Path
+
+DEFAULT_TEMPLATE = 'CLEAN_TEMPLATE.pdf'
+DEFAULT_DATA = 'correct_sample_data.json'
+DEFAULT_BASELINE = 'perf_baseline.json'
+DEFAULT_REPEATS = 5
+DEFAULT_MEMORY_REPEATS = 3
+
+# Two-sided 95% critical values of Student's t for 1-30 degrees of freedom
+T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def t_critical(df):
+    if df is None or df > len(T_95):
+        return 1.96
+    return T_95[max(1, int(df)) - 1]
+
+
+def mean_ci(samples):
+    """(mean, half-width of the 95% confidence interval of the mean)"""
+    mean = statistics.fmean(samples)
+    if len(samples) < 2:
+        return mean, 0.0
+    return mean, t_critical(len(samples) - 1) * statistics.stdev(samples) / math.sqrt(len(samples))
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Swallow the progress prints of the scripts being measured"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _bench_fill_pdf(ctx):
+    from fill_pdf import fill_pdf
+
+    output = os.path.join(ctx['workdir'], 'fill_pdf.pdf')
+    with _quiet():
+        fill_pdf(ctx['template'], output, ctx['data'])
+    return output
+
+
+def _bench_template_fill(ctx):
+    from pdf_template import Template
+
+    # Parsed once per context, as a service embedding the library would
+    if 'template_obj' not in ctx:
+        ctx['template_obj'] = Template(ctx['template'])
+
+    output = os.path.join(ctx['workdir'], 'template_fill.pdf')
+    with ctx['template_obj'].fill(ctx['data']) as document:
+        document.save(output)
+    return output
+
+
+def _bench_get_form_fields(ctx):
+    with _quiet():
+        from app import get_form_fields
+        get_form_fields(ctx['template'])
+
+
+def _bench_app_fill_pdf(ctx):
+    output = os.path.join(ctx['workdir'], 'app_fill_pdf.pdf')
+    with _quiet():
+        from app import fill_pdf
+        fill_pdf(ctx['template'], output, ctx['data'])
+    return output
+
+
+def _bench_compile_schema(ctx):
+    from fill_schema import FillSchema
+
+    FillSchema.from_file(ctx['template'])
+
+
+def _bench_merge_records(ctx):
+    from batch_fill import merge_records
+
+    output = os.path.join(ctx['workdir'], 'merge_records.pdf')
+    with _quiet():
+        merge_records(ctx['template'], [(i, ctx['data']) for i in range(1, 4)], output)
+    return output
+
+
+def _bench_extract_values(ctx):
+    from bulk_extract import extract_file
+
+    extract_file(ctx['template'])
+
+
+# Benchmark name -> (function, modules, description). A function takes the
+# context dict and returns the path of the file it wrote, or None. The
+# modules are imported before peak memory is measured, so imports (and the
+# web app's template preload) are not counted as the operation's memory.
+BENCHMARKS = {
+    'fill_pdf': (_bench_fill_pdf, ('fill_pdf',), 'fill_pdf.fill_pdf() with the sample data'),
+    'template_fill': (_bench_template_fill, ('pdf_template', 'fill_pdf'),
+                      'Template.fill() on a template parsed once'),
+    'get_form_fields': (_bench_get_form_fields, ('app',), 'app.get_form_fields() on an uploaded file'),
+    'app_fill_pdf': (_bench_app_fill_pdf, ('app',), 'app.fill_pdf() on an uploaded file'),
+    'compile_schema': (_bench_compile_schema, ('fill_schema',), 'FillSchema.from_file()'),
+    'merge_records': (_bench_merge_records, ('batch_fill',), 'batch_fill.merge_records() with 3 records'),
+    'extract_values': (_bench_extract_values, ('bulk_extract',), 'bulk_extract.extract_file()'),
+}
+
+
+def make_context(template, data_path, workdir):
+    with open(data_path, 'r') as f:
+        data = json.load(f)
+    return {'template': str(template), 'data': data, 'workdir': workdir}
+
+
+def time_benchmark(name, ctx, repeats):
+    """Run a benchmark once to warm up, then `repeats` timed runs"""
+    func = BENCHMARKS[name][0]
+    output = func(ctx)
+
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        output = func(ctx)
+        times.append(time.perf_counter() - start)
+
+    size = os.path.getsize(output) if output else None
+    return times, size
+
+
+def _max_rss_bytes():
+    import resource
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _current_rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return _max_rss_bytes()
+
+
+def _reset_peak_rss():
+    """Reset VmHWM to the current RSS; False where the kernel does not support it"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes():
+    """VmHWM (peak RSS since the last reset), or ru_maxrss without /proc"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return _max_rss_bytes()
+
+
+def peak_memory(name, template, data_path):
+    """Peak RSS growth of one run of a benchmark, measured in a fresh process"""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--peak-memory', name, str(template), str(data_path)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"{name}: memory run failed\n{result.stderr.strip()}")
+    return int(result.stdout.strip().splitlines()[-1])
+
+
+def _peak_memory_child(name, template, data_path):
+    import importlib
+    import pikepdf  # noqa: F401
+
+    _, modules, _ = BENCHMARKS[name]
+    with _quiet():
+        for module in modules:
+            importlib.import_module(module)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = make_context(template, data_path, workdir)
+        gc.collect()
+        _reset_peak_rss()
+        before = _current_rss_bytes()
+        BENCHMARKS[name][0](ctx)
+        print(_peak_rss_bytes() - before)
+
+
+def run_suite(names=None, template=DEFAULT_TEMPLATE, data_path=DEFAULT_DATA,
+              repeats=DEFAULT_REPEATS, memory_repeats=DEFAULT_MEMORY_REPEATS, progress=True):
+    """Run the selected benchmarks; returns the results dict saved as a baseline"""
+    names = names or list(BENCHMARKS)
+    results = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'template': Path(template).name,
+        'repeats': repeats,
+        'benchmarks': {},
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = make_context(template, data_path, workdir)
+        for name in names:
+            if progress:
+                print(f"  {name}...", flush=True)
+            times, size = time_benchmark(name, ctx, repeats)
+            memory = [peak_memory(name, template, data_path) for _ in range(memory_repeats)]
+            results['benchmarks'][name] = {'time': times, 'peak_memory': memory, 'size': size}
+
+    return results
+
+
+def print_results(results):
+    print(f"\n{'Benchmark':18s} {'Time (ms)':>20s} {'Peak memory (MB)':>18s} {'Output (KB)':>12s}")
+    for name, result in results['benchmarks'].items():
+        mean, ci = mean_ci(result['time'])
+        memory = statistics.fmean(result['peak_memory']) / (1024 * 1024) if result['peak_memory'] else 0.0
+        size = f"{result['size'] / 1024:.1f}" if result['size'] is not None else '-'
+        print(f"{name:18s} {mean * 1000:11.1f} ± {ci * 1000:6.1f} {memory:18.1f} {size:>12s}")
+
+
+def parse_names(value):
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Error: Unknown benchmark - {', '.join(unknown)} (available: {', '.join(BENCHMARKS)})")
+        sys.exit(1)
+    return names
+
+
+def take_option(args, name, convert=str, default=None):
+    """Remove `name value` from args and return the converted value"""
+    if name not in args:
+        return default
+    i = args.index(name)
+    try:
+        value = convert(args[i + 1])
+    except (IndexError, ValueError):
+        print(f"Error: {name} needs a {'number' if convert is not str else 'value'}")
+        sys.exit(1)
+    del args[i:i + 2]
+    return value
+
+
+def main():
+    args = sys.argv[1:]
+
+    if args[:1] == ['--peak-memory']:
+        _peak_memory_child(*args[1:4])
+        return
+
+    if '--help' in args or '-h' in args:
+        print("Usage: python benchmark.py [--only name,...] [--repeats N] [--memory-repeats N]")
+        print("                           [--template file.pdf] [--data data.json] [--save baseline.json]")
+        print("\nBenchmarks:")
+        for name, (_, _, description) in BENCHMARKS.items():
+            print(f"  {name:18s} {description}")
+        print("\nExamples:")
+        print("  python benchmark.py")
+        print(f"  python benchmark.py --save {DEFAULT_BASELINE}    # Record a new baseline")
+        sys.exit(0)
+
+    only = take_option(args, '--only')
+    repeats = take_option(args, '--repeats', int, DEFAULT_REPEATS)
+    memory_repeats = take_option(args, '--memory-repeats', int, DEFAULT_MEMORY_REPEATS)
+    template = take_option(args, '--template', default=DEFAULT_TEMPLATE)
+    data_path = take_option(args, '--data', default=DEFAULT_DATA)
+    save_path = take_option(args, '--save')
+    if args:
+        print(f"Error: Unknown arguments - {' '.join(args)} (see --help)")
+        sys.exit(1)
+
+    for path in (template, data_path):
+        if not Path(path).exists():
+            print(f"Error: File not found - {path}")
+            sys.exit(1)
+
+    print(f"Benchmarking {template} ({repeats} repeats)...")
+    results = run_suite(parse_names(only) if only else None, template, data_path,
+                        repeats, memory_repeats)
+    print_results(results)
+
+    if save_path:
+        with open(save_path, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"\n✓ Baseline saved to: {save_path}")
+
+
+if __name__ == "__main__":
+    main()
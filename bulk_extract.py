@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Extract the field values of many filled PDFs into one table
+
+Reads a directory of PDFs, a text file listing PDF paths (one per line,
+relative paths taken from the list file's directory), or PDF paths given
+directly, and writes a single CSV or Parquet file with one row per PDF and
+one column per fully-qualified field name ("Parent.Child.Field"). The first
+column, "@file", holds the source file; a form field that happens to have
+that name is written to "field:@file" instead.
+
+Only the AcroForm field tree is read. pikepdf loads objects lazily, so page
+content streams are never parsed or decoded. Files are processed across a
+pool of worker processes.
+
+Parquet output needs pyarrow (pip install pyarrow).
+"""
+
+import sys
+import os
+import csv
+import time
+from pathlib import Path
+
+# Metadata column; field columns never take this name (see field_column)
+FILE_COLUMN = '@file'
+RESERVED_COLUMNS = {FILE_COLUMN}
+
+# Separator for multi-select list box values
+MULTI_VALUE_SEPARATOR = ';'
+
+
+def _value_to_str(value):
+    import pikepdf
+
+    if isinstance(value, pikepdf.Name):
+        return str(value).lstrip('/')
+    if isinstance(value, pikepdf.Array):
+        return MULTI_VALUE_SEPARATOR.join(_value_to_str(v) for v in value)
+    return str(value)
+
+
+def field_values(pdf):
+    """Map every terminal field's fully-qualified name to its value as a string"""
+    values = {}
+
+    def walk(field, parent_name, inherited_value):
+        name = parent_name
+        if '/T' in field:
+            name = f"{parent_name}.{field['/T']}" if parent_name else str(field['/T'])
+        value = field['/V'] if '/V' in field else inherited_value
+
+        kids = [kid for kid in field.get('/Kids', []) if '/T' in kid]
+        if kids:
+            for kid in kids:
+                walk(kid, name, value)
+        elif name:
+            values[name] = '' if value is None else _value_to_str(value)
+
+    acroform = pdf.Root.get('/AcroForm')
+    if acroform is not None and '/Fields' in acroform:
+        for field in acroform.Fields:
+            walk(field, '', None)
+    return values
+
+
+def field_column(name):
+    """Column for a field, moved aside when it would clash with a metadata column"""
+    return f"field:{name}" if name in RESERVED_COLUMNS else name
+
+
+def extract_file(pdf_path):
+    """Return (pdf_path, values, error) for one PDF"""
+    import pikepdf
+
+    try:
+        # Each form is read exactly once, so it is opened directly rather
+        # than through the resident template cache
+        with pikepdf.open(pdf_path) as pdf:
+            return pdf_path, field_values(pdf), None
+    except Exception as e:
+        return pdf_path, None, str(e)
+
+
+def collect_inputs(paths):
+    """Expand directories and .txt file lists into a list of PDF paths"""
+    pdf_paths = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            pdf_paths.extend(str(p) for p in sorted(path.iterdir())
+                             if p.is_file() and p.suffix.lower() == '.pdf')
+        elif path.suffix.lower() == '.txt':
+            with open(path, 'r') as f:
+                pdf_paths.extend(str(path.parent / line.strip()) for line in f if line.strip())
+        else:
+            pdf_paths.append(str(path))
+    return pdf_paths
+
+
+def extract_all(pdf_paths, workers=None):
+    """Extract every PDF across a process pool; results keep the input order"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or min(len(pdf_paths), os.cpu_count() or 1)
+    if workers <= 1:
+        return [extract_file(path) for path in pdf_paths]
+
+    # Small jobs - hand them out in batches to keep pool overhead down
+    chunksize = max(1, len(pdf_paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(extract_file, pdf_paths, chunksize=chunksize))
+
+
+def build_columns(rows):
+    """Union of field names in order of first appearance"""
+    columns = {FILE_COLUMN: None}
+    for row in rows:
+        for name in row:
+            columns.setdefault(name, None)
+    return list(columns)
+
+
+def write_csv(output_path, columns, rows):
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, restval='')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_parquet(output_path, columns, rows):
+    import pyarrow
+    import pyarrow.parquet
+
+    table = pyarrow.table({
+        column: pyarrow.array([row.get(column, '') for row in rows], type=pyarrow.string())
+        for column in columns
+    })
+    pyarrow.parquet.write_table(table, output_path)
+
+
+def main():
+    args = sys.argv[1:]
+    workers = None
+    if '--workers' in args:
+        i = args.index('--workers')
+        try:
+            workers = int(args[i + 1])
+        except (IndexError, ValueError):
+            print("Error: --workers needs a number")
+            sys.exit(1)
+        del args[i:i + 2]
+
+    if len(args) < 2:
+        print("Usage: python bulk_extract.py <pdf_dir|file_list.txt|file.pdf ...> <output.csv|output.parquet> [--workers N]")
+        print("\nExamples:")
+        print("  python bulk_extract.py completed/ values.csv")
+        print("  python bulk_extract.py completed_forms.txt values.parquet --workers 8")
+        sys.exit(1)
+
+    output_path = args[-1]
+    parquet = Path(output_path).suffix.lower() == '.parquet'
+    if parquet:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("Error: Parquet output needs pyarrow - pip install pyarrow (or write .csv)")
+            sys.exit(1)
+
+    missing = [p for p in args[:-1] if not Path(p).exists()]
+    if missing:
+        print(f"Error: Input not found - {', '.join(missing)}")
+        sys.exit(1)
+
+    pdf_paths = collect_inputs(args[:-1])
+    if not pdf_paths:
+        print("✗ No PDF files found")
+        sys.exit(1)
+
+    print(f"Extracting field values from {len(pdf_paths)} PDFs...")
+    start = time.perf_counter()
+    results = extract_all(pdf_paths, workers)
+
+    rows = []
+    failed = []
+    for pdf_path, values, error in results:
+        if error is not None:
+            failed.append((pdf_path, error))
+            continue
+        row = {FILE_COLUMN: pdf_path}
+        row.update((field_column(name), value) for name, value in values.items())
+        rows.append(row)
+
+    columns = build_columns(rows)
+    if parquet:
+        write_parquet(output_path, columns, rows)
+    else:
+        write_csv(output_path, columns, rows)
+
+    for pdf_path, error in failed:
+        print(f"✗ {pdf_path}: {error}")
+    print(f"✓ Wrote {len(rows)} rows x {len(columns) - 1} fields to: {output_path} "
+          f"({time.perf_counter() - start:.1f}s)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
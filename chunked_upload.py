@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Chunked, resumable uploads for the web API
+
+A single multipart upload is capped by MAX_CONTENT_LENGTH and lost
+entirely when the connection drops. A chunked upload is a sequence of
+requests instead:
+
+    POST /api/upload/chunked                {filename, size, content_hash?}
+        -> {upload_id, chunk_size, received: 0}
+    PUT  /api/upload/chunked/<id>?offset=N  raw bytes, X-Chunk-SHA256 header
+        -> {received}
+    GET  /api/upload/chunked/<id>           -> {received, size}  (to resume)
+    POST /api/upload/chunked/<id>/complete  -> like /api/upload
+
+Chunks are appended to <upload dir>/<id>.part in order; the file's size is
+the upload's progress, so any server process can take the next chunk and a
+client that lost its connection asks for `received` and continues from
+there. Each chunk is streamed to disk and checked against its SHA-256;
+a chunk that does not match, or whose body ends or fails early, is cut off
+again. The content hash of the whole file is computed as the chunks
+arrive, so completing an upload does not read it again (unless other
+processes took some of its chunks - then only those bytes are read).
+Nothing is ever held in memory beyond one read block.
+
+An upload's settings live in <id>.upload next to its .part file, so the
+temp sweeper (temp_sweeper.py) expires abandoned uploads like any other
+file. Limits: PDFFILL_MAX_UPLOAD_MB (default 512) for the whole file,
+CHUNK_SIZE per chunk.
+"""
+
+import os
+import re
+import json
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development server only
+    fcntl = None
+
+CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_MAX_UPLOAD_MB = 512
+
+# Bytes read from the request or the disk at a time
+READ_BLOCK = 1024 * 1024
+
+# Running hashes kept per process
+MAX_TRACKED = 256
+
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    """A chunked upload request that cannot be applied; status is the HTTP status"""
+
+    def __init__(self, status, message, received=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.received = received
+
+
+class ChunkedUploads:
+    """Chunked uploads in progress, stored in one directory"""
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_UPLOAD_MB * 1024 * 1024, chunk_size=CHUNK_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, directory):
+        return cls(directory, int(os.environ.get('PDFFILL_MAX_UPLOAD_MB', DEFAULT_MAX_UPLOAD_MB)) * 1024 * 1024)
+
+    def _paths(self, upload_id):
+        if not UPLOAD_ID_PATTERN.match(upload_id or ''):
+            raise UploadError(404, "Upload not found")
+        base = os.path.join(self.directory, upload_id)
+        return base + '.part', base + '.upload'
+
+    def _info(self, upload_id):
+        part_path, info_path = self._paths(upload_id)
+        try:
+            with open(info_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            info['received'] = os.path.getsize(part_path)
+        except (OSError, ValueError):
+            raise UploadError(404, "Upload not found or expired")
+        return info
+
+    def start(self, filename, size, content_hash=None):
+        """Create an upload of `size` bytes; returns its status"""
+        if size <= 0:
+            raise UploadError(400, "size must be a positive number of bytes")
+        if size > self.max_size:
+            raise UploadError(413, f"File too large (limit {self.max_size // (1024 * 1024)} MB)")
+
+        upload_id = uuid.uuid4().hex
+        part_path, info_path = self._paths(upload_id)
+        info = {'filename': filename, 'size': size, 'content_hash': content_hash}
+        open(part_path, 'xb').close()
+        temp_path = info_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        os.replace(temp_path, info_path)
+        return self.status(upload_id)
+
+    def status(self, upload_id):
+        info = self._info(upload_id)
+        return {'upload_id': upload_id, 'chunk_size': self.chunk_size,
+                'size': info['size'], 'received': info['received']}
+
+    def write_chunk(self, upload_id, offset, stream, length, checksum=None):
+        """
+        Append `length` bytes read from stream at `offset`; returns the new
+        received count
+
+        offset must equal what has been received so far (409 otherwise,
+        with the actual count); checksum, the chunk's hex SHA-256, is
+        verified when given.
+        """
+        info = self._info(upload_id)
+        if length <= 0 or length > self.chunk_size:
+            raise UploadError(400, f"Chunks must be 1 to {self.chunk_size} bytes")
+        if offset + length > info['size']:
+            raise UploadError(400, "Chunk goes past the declared file size")
+
+        part_path, info_path = self._paths(upload_id)
+        with open(part_path, 'r+b') as f:
+            if fcntl is not None:
+                # Serializes chunks and completion of one upload across
+                # server processes
+                fcntl.flock(f, fcntl.LOCK_EX)
+            if not os.path.exists(info_path):
+                # Completed or aborted while this chunk waited for the lock
+                raise UploadError(404, "Upload not found or expired")
+            received = os.fstat(f.fileno()).st_size
+            if offset != received:
+                raise UploadError(409, f"Expected offset {received}", received)
+
+            chunk_hash = hashlib.sha256()
+            running = self._running_hash(upload_id, offset)
+            f.seek(offset)
+            remaining = length
+            try:
+                while remaining:
+                    block = stream.read(min(READ_BLOCK, remaining))
+                    if not block:
+                        break
+                    f.write(block)
+                    chunk_hash.update(block)
+                    if running is not None:
+                        running.update(block)
+                    remaining -= len(block)
+            except BaseException:
+                # A client that disconnects mid-chunk leaves no unverified bytes
+                f.truncate(offset)
+                raise
+
+            if remaining or (checksum and chunk_hash.hexdigest() != checksum.lower()):
+                f.truncate(offset)
+                if remaining:
+                    raise UploadError(400, "Chunk body shorter than its Content-Length", offset)
+                raise UploadError(400, "Chunk checksum mismatch", offset)
+            f.flush()
+
+        # Keep the settings file as fresh as the data for the sweeper
+        os.utime(info_path)
+        if running is not None:
+            self._track(upload_id, offset + length, running)
+        return offset + length
+
+    def _running_hash(self, upload_id, offset):
+        """Copy of this process's running hash if it covers exactly `offset` bytes"""
+        with self._lock:
+            tracked = self._hashes.get(upload_id)
+            if offset == 0:
+                return hashlib.sha256()
+            if tracked is not None and tracked[0] == offset:
+                return tracked[1].copy()
+            return None
+
+    def _track(self, upload_id, offset, running):
+        with self._lock:
+            self._hashes[upload_id] = (offset, running)
+            self._hashes.move_to_end(upload_id)
+            while len(self._hashes) > MAX_TRACKED:
+                self._hashes.popitem(last=False)
+
+    def complete(self, upload_id):
+        """
+        Finish an upload; returns (filename, content_hash, part_path) - the
+        caller moves the .part file into place
+
+        Raises UploadError 409 while bytes are missing, 400 when the file
+        does not match the content_hash given at the start.
+        """
+        info = self._info(upload_id)
+        part_path, info_path = self._paths(upload_id)
+        try:
+            f = open(part_path, 'rb')
+        except FileNotFoundError:
+            raise UploadError(404, "Upload not found or expired")
+
+        # Held from the size check to the handoff, so no chunk can change
+        # the file between them (write_chunk takes the same lock)
+        with f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            if not os.path.exists(info_path):
+                raise UploadError(404, "Upload not found or expired")
+            received = os.fstat(f.fileno()).st_size
+            if received != info['size']:
+                raise UploadError(409, f"Upload incomplete: {received} of {info['size']} bytes", received)
+
+            with self._lock:
+                offset, running = self._hashes.pop(upload_id, (0, None))
+            running = running or hashlib.sha256()
+            # Catch up on chunks another process received
+            f.seek(offset)
+            for block in iter(lambda: f.read(READ_BLOCK), b''):
+                running.update(block)
+            content_hash = running.hexdigest()
+
+            expected = info.get('content_hash')
+            if expected and expected.lower() != content_hash:
+                self.abort(upload_id)
+                raise UploadError(400, "Uploaded file does not match its content_hash - upload it again")
+
+            # Without its settings file no further chunk is accepted
+            os.unlink(info_path)
+        return info['filename'], content_hash, part_path
+
+    def abort(self, upload_id):
+        """Delete an upload and everything received for it"""
+        for path in self._paths(upload_id):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._hashes.pop(upload_id, None)
@@ -10,15 +10,16 @@ This creates a production-ready template for form filling.
 
 import sys
 from pathlib import Path
-import pikepdf
-from pikepdf import Name
+from pdf_template import open_pdf, close_pdf
 
 
 def create_clean_template(input_pdf, output_pdf):
     """Create a clean template without VOID watermark"""
 
+    from pikepdf import Name
+
     print(f"Opening: {input_pdf}\n")
-    pdf = pikepdf.open(input_pdf)
+    pdf = open_pdf(input_pdf, writable=True)
 
     # Step 1: Remove VOID watermark images
     print("Step 1: Removing VOID watermark images...")
@@ -78,7 +79,7 @@ def create_clean_template(input_pdf, output_pdf):
     # Step 3: Save
     print(f"Saving to: {output_pdf}")
     pdf.save(output_pdf)
-    pdf.close()
+    close_pdf(pdf)
 
     print("\n" + "="*60)
     print("✅ SUCCESS! Clean template created")
@@ -6,7 +6,7 @@ Export all form fields to a JSON template file
 import sys
 import json
 from pathlib import Path
-import pikepdf
+from pdf_template import open_pdf, close_pdf
 
 
 def export_fields_to_json(pdf_path, output_json=None, include_empty=True):
@@ -19,12 +19,14 @@ def export_fields_to_json(pdf_path, output_json=None, include_empty=True):
         include_empty: Include fields with no current value
     """
 
+    import pikepdf
+
     try:
-        pdf = pikepdf.open(pdf_path)
+        pdf = open_pdf(pdf_path)
 
         if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
             print("✗ No form fields found in this PDF")
-            pdf.close()
+            close_pdf(pdf)
             return None
 
         fields = pdf.Root.AcroForm.Fields
@@ -52,7 +54,7 @@ def export_fields_to_json(pdf_path, output_json=None, include_empty=True):
             if value or include_empty:
                 field_data[field_name] = value
 
-        pdf.close()
+        close_pdf(pdf)
 
         # Determine output file
         if output_json is None:
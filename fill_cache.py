@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Cache of filled PDFs for the web API
+
+Upstream systems resubmit identical fill requests - retries, re-downloads.
+Filling is deterministic (fields are written in name order and saved with
+pdf_template.SAVE_OPTIONS), so a result can be reused for any request with
+the same inputs. The cache key is the SHA-256 of:
+- the template's content hash
+- the field data as canonical JSON (sorted keys, no whitespace)
+- the save options and the qpdf version that wrote the file
+
+Entries are <key>.pdf plus <key>.json (the fill's message) in
+<upload dir>/fill-cache. A fill is cached by hard-linking its output into
+the cache (same file system, no copy). A hit is copied to the request's
+output path, so the result served gets a lifetime of its own and stays
+downloadable when the entry is evicted.
+
+Entries are evicted least recently used first once the cache is over
+PDFFILL_FILL_CACHE_MB (default 256, 0 disables it), and expire with the
+temp files' TTL (PDFFILL_TEMP_TTL), counted from when they were cached:
+cached fills hold submitted data and should not outlive the uploads they
+came from, however often they are hit. A hit therefore records its use in
+the entry's access time and leaves the modification time, which the TTL
+is measured from, alone.
+The cache also counts toward the upload directory's quota (temp_sweeper.py),
+whose oldest-first eviction removes cached fills like any other file when
+new uploads need the room.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+from pdf_template import SAVE_OPTIONS
+from temp_sweeper import DEFAULT_TTL
+
+DEFAULT_MAX_MB = 256
+
+# Part of every key; bump it when the same inputs start filling to different
+# bytes, so entries written by older code are not served
+FORMAT_VERSION = 2
+
+
+def canonical_json(data):
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+class FillCache:
+    """Filled PDFs keyed by template, field data and save options"""
+
+    def __init__(self, directory, max_mb=DEFAULT_MAX_MB, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.ttl = ttl
+        if self.enabled:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @classmethod
+    def from_env(cls, upload_dir):
+        """Cache in <upload_dir>/fill-cache, configured from PDFFILL_FILL_CACHE_MB"""
+        return cls(os.path.join(upload_dir, 'fill-cache'),
+                   int(os.environ.get('PDFFILL_FILL_CACHE_MB', DEFAULT_MAX_MB)),
+                   int(os.environ.get('PDFFILL_TEMP_TTL', DEFAULT_TTL)))
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(content_hash, field_data):
+        import pikepdf
+
+        digest = hashlib.sha256()
+        for part in (str(FORMAT_VERSION), content_hash, canonical_json(field_data),
+                     canonical_json(SAVE_OPTIONS), pikepdf.__libqpdf_version__):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + '.pdf', base + '.json'
+
+    def get(self, key, output_path):
+        """
+        Put the cached result for key at output_path and return its message,
+        or return None on a miss
+        """
+        pdf_path, info_path = self._paths(key)
+        message = None
+        try:
+            if self.ttl and time.time() - os.path.getmtime(pdf_path) > self.ttl:
+                self._remove(key)
+            else:
+                with open(info_path, 'r', encoding='utf-8') as f:
+                    message = json.load(f)['message']
+                shutil.copyfile(pdf_path, output_path)
+                self._touch(pdf_path)
+        except (OSError, ValueError, KeyError):
+            message = None
+
+        if message is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return message
+
+    def put(self, key, output_path, message):
+        """Keep a successful fill's output and message, then evict down to the limit"""
+        pdf_path, info_path = self._paths(key)
+        temp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            # The message first: get() only trusts a .pdf whose .json exists
+            with open(info_path + temp_suffix, 'w', encoding='utf-8') as f:
+                json.dump({'message': message}, f)
+            os.replace(info_path + temp_suffix, info_path)
+            os.link(output_path, pdf_path + temp_suffix)
+            os.replace(pdf_path + temp_suffix, pdf_path)
+        except OSError as e:
+            # Caching is an optimization; the fill itself succeeded
+            print(f"⚠️  Fill cache: {e}")
+            for path in (info_path + temp_suffix, pdf_path + temp_suffix):
+                if os.path.exists(path):
+                    os.unlink(path)
+            return
+        self._evict()
+
+    @staticmethod
+    def _touch(pdf_path):
+        """Mark an entry as just used: its access time, keeping the mtime the TTL runs from"""
+        stat = os.stat(pdf_path)
+        os.utime(pdf_path, ns=(time.time_ns(), stat.st_mtime_ns))
+
+    def _remove(self, key):
+        for path in self._paths(key):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def _entries(self):
+        """(atime, mtime, size, key) of every cached PDF, least recently used first"""
+        entries = []
+        try:
+            it = os.scandir(self.directory)
+        except FileNotFoundError:
+            return entries
+        with it:
+            for entry in it:
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_mtime, stat.st_size, entry.name[:-4]))
+        entries.sort()
+        return entries
+
+    def _evict(self):
+        now = time.time()
+        kept = []
+        for entry in self._entries():
+            if self.ttl and now - entry[1] > self.ttl:
+                self._remove(entry[3])
+                with self._lock:
+                    self.evicted += 1
+            else:
+                kept.append(entry)
+
+        total = sum(size for _, _, size, _ in kept)
+        for _, _, size, key in kept:
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+            with self._lock:
+                self.evicted += 1
+
+    def stats(self):
+        entries = self._entries() if self.enabled else []
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'entries': len(entries),
+                'bytes': sum(size for _, _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evicted': self.evicted,
+            }
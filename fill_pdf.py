@@ -5,11 +5,285 @@ Fill PDF form fields programmatically
 
 import sys
 import json
+import time
+from contextlib import contextmanager
 from pathlib import Path
-import pikepdf
+from pdf_template import open_pdf, close_pdf, get_manifest, SAVE_OPTIONS
+from xfa_fill import fill_xfa_datasets
 
 
-def fill_pdf(input_pdf, output_pdf, field_data):
+CHECKED_VALUES = [True, 'Yes', 'yes', 'ON', 'On', 1, '1']
+
+
+def get_field_type(field):
+    """
+    Return a field's /FT ("/Btn", "/Tx", "/Ch", ...), looking at its first
+    kid, then at the parents it inherits from, if needed
+    """
+    if '/FT' in field:
+        return str(field['/FT'])
+    if '/Kids' in field and len(field['/Kids']) > 0:
+        first_kid = field['/Kids'][0]
+        if '/FT' in first_kid:
+            return str(first_kid['/FT'])
+    parent = field.get('/Parent')
+    while parent is not None:
+        if '/FT' in parent:
+            return str(parent['/FT'])
+        parent = parent.get('/Parent')
+    return None
+
+
+def named_fields(fields):
+    """
+    (name, field) of every top-level field, then of every terminal field
+    below it under its fully-qualified name ("Parent.Child")
+
+    A top-level field with named kids is listed under its own name too:
+    filling it sets the value its kids inherit.
+    """
+    def terminal(field, name):
+        for kid in field.get('/Kids', []):
+            if '/T' not in kid:
+                continue  # A widget, not a field
+            kid_name = f"{name}.{kid['/T']}"
+            if any('/T' in grandkid for grandkid in kid.get('/Kids', [])):
+                yield from terminal(kid, kid_name)
+            else:
+                yield kid_name, kid
+
+    for field in fields:
+        if '/T' not in field:
+            continue
+        name = str(field['/T'])
+        yield name, field
+        yield from terminal(field, name)
+
+
+def field_widgets(field):
+    """A field's widget annotations: its kids that are not fields, or itself"""
+    if '/Kids' in field:
+        return [kid for kid in field['/Kids'] if '/T' not in kid]
+    return [field]
+
+
+def widget_states(widget):
+    """On-state names of one widget's normal appearance (e.g. "Yes", "1")"""
+    appearance = widget.get('/AP')
+    if appearance is None or '/N' not in appearance:
+        return []
+    return [name for name in (str(state).lstrip('/') for state in appearance.N.keys()) if name != 'Off']
+
+
+def checkbox_states(field):
+    """On-state names a checkbox or radio group declares, in widget order"""
+    states = []
+    for widget in field_widgets(field):
+        for name in widget_states(widget):
+            if name not in states:
+                states.append(name)
+    return states
+
+
+def set_field_value(field, value, field_type):
+    """Write one value into a field according to its type; returns the value written"""
+    import pikepdf
+
+    if field_type == '/Btn':
+        # Checkbox or radio group: a declared on-state is written as is; other
+        # checked values select the field's first on-state
+        states = checkbox_states(field)
+        if isinstance(value, str) and value in states:
+            state = value
+        elif value in CHECKED_VALUES:
+            state = states[0] if states else 'Yes'
+        else:
+            state = 'Off'
+        field['/V'] = pikepdf.Name('/' + state)
+        for widget in field_widgets(field):
+            # Each widget shows the state only if it has an appearance for it
+            shown = state if not states or state in widget_states(widget) else 'Off'
+            widget['/AS'] = pikepdf.Name('/' + shown)
+        return state
+
+    if field_type == '/Ch' and isinstance(value, list):
+        # Multiple selection in a list box
+        selected = [str(v) for v in value]
+        field['/V'] = pikepdf.Array([pikepdf.String(v) for v in selected])
+        return selected
+
+    # Text, choice (dropdown/list) and unknown types are all set as text
+    text = str(value)
+    field['/V'] = text
+    return text
+
+
+class FillReport:
+    """
+    What a fill did
+
+    filled:     (name, value) of every field written
+    written:    name -> value as written into each filled field (the
+                checkbox state, the text, ...)
+    skipped:    (name, reason) of data keys that were not fields to fill
+    not_found:  names in the data that the form does not have
+    errors:     messages - validation failures and fields that could not be set
+    coercions:  (name, given, written) where the value written differs from
+                the one given, e.g. True -> "Yes" or 42 -> "42"
+    timings:    seconds per phase (open, validate, fill, xfa, save, total)
+
+    A report is truthy when the document was filled and saved.
+    """
+
+    def __init__(self, input_pdf=None, output_pdf=None):
+        self.input_pdf = str(input_pdf) if input_pdf is not None else None
+        self.output_pdf = str(output_pdf) if output_pdf is not None else None
+        self.field_count = 0
+        self.filled = []
+        self.written = {}
+        self.skipped = []
+        self.not_found = []
+        self.errors = []
+        self.coercions = []
+        self.field_types = {}
+        self.xfa_updated = []
+        self.timings = {}
+        self.saved = False
+
+    def __bool__(self):
+        return self.saved
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block as one phase of the fill"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def to_dict(self):
+        return {
+            'input': self.input_pdf,
+            'output': self.output_pdf,
+            'saved': self.saved,
+            'field_count': self.field_count,
+            'filled': [{'name': name, 'value': value} for name, value in self.filled],
+            'skipped': [{'name': name, 'reason': reason} for name, reason in self.skipped],
+            'not_found': self.not_found,
+            'errors': self.errors,
+            'coercions': [{'name': name, 'given': given, 'written': written}
+                          for name, given, written in self.coercions],
+            'xfa_updated': len(self.xfa_updated),
+            'timings': self.timings,
+        }
+
+
+def fill_fields(fields, field_data, report):
+    """
+    Fill every field below the top-level `fields` whose name (see
+    named_fields()) is a key of field_data
+
+    Records filled fields, coercions, errors and names the fields lack in
+    report, and returns it.
+    """
+    return fill_named_fields(named_fields(fields), field_data, report)
+
+
+def fill_named_fields(named, field_data, report):
+    """fill_fields() over (name, field) pairs that are already resolved"""
+    seen = set()
+
+    for field_name, field in named:
+        if field_name not in field_data:
+            continue
+        seen.add(field_name)
+
+        value = field_data[field_name]
+        field_type = get_field_type(field)
+        try:
+            written = set_field_value(field, value, field_type)
+        except Exception as e:
+            report.errors.append(f"{field_name}: {e}")
+            continue
+
+        report.filled.append((field_name, value))
+        report.written[field_name] = written
+        report.field_types[field_name] = field_type
+        if written != value:
+            report.coercions.append((field_name, value, written))
+
+    report.not_found.extend(name for name in field_data if name not in seen)
+    return report
+
+
+def fields_to_fill(field_data, report):
+    """
+    field_data without the instruction and description keys of generated
+    templates (recorded in report.skipped), in name order - so the output
+    does not depend on the order of the caller's keys
+    """
+    # Imported here - fill_schema imports this module
+    from fill_schema import is_annotation
+
+    data = {}
+    for name, value in sorted(field_data.items()):
+        if is_annotation(name):
+            report.skipped.append((name, 'template annotation'))
+        else:
+            data[name] = value
+    return data
+
+
+def fill_document(pdf, field_data, report, validate=True, schema=None, field_refs=None):
+    """
+    Fill an open, writable document in place, recording what happened in report
+
+    Args:
+        schema: Compiled FillSchema to validate against, instead of compiling
+                one from the document
+        field_refs: Field name (see named_fields()) -> (objnum, gen) map;
+                    when given, only the requested fields are looked up
+                    instead of walking every field
+
+    Returns False, leaving the document unchanged, when it has no form or
+    the data is invalid (report.errors says why).
+    """
+    # Imported here - fill_schema imports this module
+    from fill_schema import FillSchema
+
+    data = fields_to_fill(field_data, report)
+
+    if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
+        report.errors.append("No form fields found in this PDF")
+        return False
+
+    fields = pdf.Root.AcroForm.Fields
+    report.field_count = len(fields)
+
+    if validate:
+        with report.phase('validate'):
+            errors = (schema or FillSchema.from_pdf(pdf)).validate(data)
+        if errors:
+            report.errors.extend(errors)
+            return False
+
+    with report.phase('fill'):
+        if field_refs is not None:
+            fill_named_fields([(name, pdf.get_object(field_refs[name])) for name in data if name in field_refs],
+                              data, report)
+        else:
+            fill_fields(fields, data, report)
+
+    # Hybrid forms: viewers that prefer XFA read the datasets packet, so keep
+    # it in sync with the AcroForm values - only for the fields actually
+    # written, with the values written, so both layers show the same thing
+    with report.phase('xfa'):
+        report.xfa_updated, _ = fill_xfa_datasets(pdf, report.written, report.field_types)
+    return True
+
+
+def fill_pdf(input_pdf, output_pdf, field_data, validate=True):
     """
     Fill PDF form fields with provided data
 
@@ -18,111 +292,123 @@ def fill_pdf(input_pdf, output_pdf, field_data):
         output_pdf: Path to save filled PDF
         field_data: Dictionary mapping field names to values
                     Example: {"A04t": "John Doe", "A06t": "123 Main St"}
+        validate: Check the data against the template's schema first and
+                  refuse to fill if anything is invalid (see fill_schema.py)
+
+    Returns a FillReport, truthy when the PDF was saved. Nothing is printed;
+    use print_fill_report() for console output. To fill one template many
+    times, use pdf_template.Template.fill() instead.
     """
+    report = FillReport(input_pdf, output_pdf)
+    started = time.perf_counter()
 
-    print(f"Opening: {input_pdf}")
-    pdf = pikepdf.open(input_pdf)
+    try:
+        if validate:
+            # Against the stored manifest's schema, before the PDF is opened
+            with report.phase('validate'):
+                schema = get_manifest(input_pdf).schema
+                errors = schema.validate(field_data)
+            # A PDF without a form is reported by fill_document
+            if errors and schema.fields:
+                report.field_count = len(schema.fields)
+                report.errors.extend(errors)
+                return report
 
-    if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
-        print("✗ No form fields found in this PDF")
-        pdf.close()
-        return False
+        with report.phase('open'):
+            pdf = open_pdf(input_pdf, writable=True)
+        try:
+            if fill_document(pdf, field_data, report, validate=False):
+                with report.phase('save'):
+                    pdf.save(output_pdf, **SAVE_OPTIONS)
+                report.saved = True
+            return report
+        finally:
+            close_pdf(pdf)
+    finally:
+        report.timings['total'] = time.perf_counter() - started
 
-    fields = pdf.Root.AcroForm.Fields
-    filled_count = 0
-    not_found = []
 
-    print(f"Found {len(fields)} form fields")
-    print(f"Attempting to fill {len(field_data)} fields...\n")
+def print_fill_report(report, quiet=False):
+    """
+    Print a FillReport
+
+    The full form lists every field filled; quiet prints one summary line
+    (plus any errors) whatever the number of fields.
+    """
+    if quiet:
+        if report.saved:
+            print(f"✓ Filled {len(report.filled)}/{len(report.filled) + len(report.not_found)} fields"
+                  f" → {report.output_pdf}")
+        else:
+            print(f"✗ {report.input_pdf}: nothing was filled")
+        for message in report.errors:
+            print(f"    - {message}")
+        return
 
-    for field in fields:
-        # Get field name
-        if '/T' not in field:
-            continue
+    print(f"Opening: {report.input_pdf}")
+    if not report.field_count:
+        for message in report.errors:
+            print(f"✗ {message}")
+        return
+    if not report.filled and report.errors and not report.saved:
+        print("✗ Invalid field data - nothing was filled:")
+        for message in report.errors:
+            print(f"    - {message}")
+        return
 
-        field_name = str(field['/T'])
-
-        # Check if this field should be filled
-        if field_name in field_data:
-            value = field_data[field_name]
-
-            # Determine field type
-            field_type = None
-            if '/FT' in field:
-                field_type = str(field['/FT'])
-            elif '/Kids' in field and len(field['/Kids']) > 0:
-                # Check first kid for type
-                first_kid = field['/Kids'][0]
-                if '/FT' in first_kid:
-                    field_type = str(first_kid['/FT'])
-
-            # Fill based on field type
-            try:
-                if field_type == '/Btn':
-                    # Button/Checkbox field
-                    if value in [True, 'Yes', 'yes', 'ON', 'On', 1, '1']:
-                        field['/V'] = pikepdf.Name('/Yes')
-                        field['/AS'] = pikepdf.Name('/Yes')
-                    else:
-                        field['/V'] = pikepdf.Name('/Off')
-                        field['/AS'] = pikepdf.Name('/Off')
-                elif field_type == '/Tx':
-                    # Text field
-                    field['/V'] = str(value)
-                elif field_type == '/Ch':
-                    # Choice field (dropdown/list)
-                    field['/V'] = str(value)
-                else:
-                    # Unknown type, try as text
-                    field['/V'] = str(value)
-
-                print(f"✓ Filled: {field_name} = {value}")
-                filled_count += 1
-
-            except Exception as e:
-                print(f"✗ Error filling {field_name}: {e}")
-
-    # Check for fields in data that weren't found
-    for field_name in field_data:
-        found = False
-        for field in fields:
-            if '/T' in field and str(field['/T']) == field_name:
-                found = True
-                break
-        if not found:
-            not_found.append(field_name)
+    attempted = len(report.filled) + len(report.not_found)
+    print(f"Found {report.field_count} form fields")
+    print(f"Attempting to fill {attempted} fields...\n")
+
+    for name, value in report.filled:
+        print(f"✓ Filled: {name} = {value}")
+    for message in report.errors:
+        print(f"✗ Error filling {message}")
 
     print(f"\n{'='*80}")
     print(f"Summary:")
-    print(f"  Fields filled: {filled_count}/{len(field_data)}")
+    print(f"  Fields filled: {len(report.filled)}/{attempted}")
+    if report.xfa_updated:
+        print(f"  XFA data nodes updated: {len(report.xfa_updated)}")
+    if report.coercions:
+        print(f"  Values converted: {len(report.coercions)}")
+        for name, given, written in report.coercions[:10]:
+            print(f"    - {name}: {given!r} → {written!r}")
 
-    if not_found:
+    if report.not_found:
         print(f"\n  Fields not found in PDF:")
-        for fname in not_found[:10]:  # Show first 10
+        for fname in report.not_found[:10]:  # Show first 10
             print(f"    - {fname}")
-        if len(not_found) > 10:
-            print(f"    ... and {len(not_found) - 10} more")
-
-    # Save the filled PDF
-    print(f"\nSaving to: {output_pdf}")
-    pdf.save(output_pdf)
-    pdf.close()
+        if len(report.not_found) > 10:
+            print(f"    ... and {len(report.not_found) - 10} more")
 
-    print("✓ Done!")
-    return True
+    print(f"\nSaving to: {report.output_pdf}")
+    if report.saved:
+        print("✓ Done!")
+    timings = ', '.join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in report.timings.items())
+    print(f"  Timings: {timings}")
 
 
 def main():
-    if len(sys.argv) < 4:
-        print("Usage: python fill_pdf.py <input_pdf> <output_pdf> <field_data_json>")
+    args = sys.argv[1:]
+    validate = '--no-validate' not in args
+    quiet = '--quiet' in args
+    as_json = '--json' in args
+    args = [arg for arg in args if arg not in ('--no-validate', '--quiet', '--json')]
+
+    if len(args) < 3:
+        print("Usage: python fill_pdf.py <input_pdf> <output_pdf> <field_data_json> [--no-validate] [--quiet|--json]")
         print("\nExamples:")
         print('  python fill_pdf.py input.pdf output.pdf \'{"A04t": "John Doe", "A06t": "123 Main St"}\'')
         print('  python fill_pdf.py input.pdf output.pdf data.json')
+        print("\nData is checked against the form (field names, lengths, choices, checkbox")
+        print("values) before filling. --no-validate fills whatever matches instead.")
+        print("--quiet prints one summary line; --json prints the fill report as JSON.")
         sys.exit(1)
 
-    input_pdf = sys.argv[1]
-    output_pdf = sys.argv[2]
-    field_data_arg = sys.argv[3]
+    input_pdf = args[0]
+    output_pdf = args[1]
+    field_data_arg = args[2]
 
     if not Path(input_pdf).exists():
         print(f"Error: Input file not found - {input_pdf}")
@@ -144,7 +430,13 @@ def main():
         print(f"Error: {e}")
         sys.exit(1)
 
-    fill_pdf(input_pdf, output_pdf, field_data)
+    report = fill_pdf(input_pdf, output_pdf, field_data, validate)
+    if as_json:
+        print(json.dumps(report.to_dict(), indent=2, ensure_ascii=False, default=str))
+    else:
+        print_fill_report(report, quiet)
+    if not report:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
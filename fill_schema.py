@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Validation schema for fill data, compiled from a PDF template
+
+The schema records what each field accepts - every top-level field, and
+every terminal field below one under its fully-qualified name
+("Parent.Child", see fill_pdf.named_fields): its kind (text,
+checkbox, choice, ...), /MaxLen and comb layout for text fields, the /Opt
+choices of list and combo boxes, the on-states of checkboxes and the
+read-only flag. Records are checked against it before any PDF is opened for
+filling, so a bad record costs a few dict lookups instead of an open and a
+save.
+
+Batches are validated column by column: each field name is looked up once
+and its checker runs over that field's values in every record.
+
+Usage:
+    python fill_schema.py template.pdf                 # Show the compiled schema
+    python fill_schema.py template.pdf records.json    # Validate records (JSON or CSV)
+    python fill_schema.py template.pdf records.json --strict   # ... and reject read-only fields
+"""
+
+import sys
+import json
+from pathlib import Path
+from pdf_template import open_pdf, close_pdf
+from fill_pdf import CHECKED_VALUES, checkbox_states, named_fields
+
+# Values fill_pdf writes as an unchecked box
+UNCHECKED_VALUES = [False, 'No', 'no', 'OFF', 'Off', 'off', 0, '0', '']
+
+# Keys generate_template.py writes for instructions and descriptions
+ANNOTATION_PREFIXES = ('_', '//')
+
+# Field flags (/Ff) - PDF 1.7 tables 221, 226, 228, 230
+FLAG_READONLY = 1 << 0
+FLAG_RADIO = 1 << 15
+FLAG_PUSHBUTTON = 1 << 16
+FLAG_COMBO = 1 << 17
+FLAG_EDIT = 1 << 18
+FLAG_MULTISELECT = 1 << 21
+FLAG_COMB = 1 << 24
+
+
+def is_annotation(name):
+    """True for template instruction / description keys that are not field names"""
+    return name.startswith(ANNOTATION_PREFIXES)
+
+
+def _inherited(field, key):
+    """
+    A field attribute, falling back to its first kid (merged field/widget),
+    then to the parents it inherits from
+    """
+    if key in field:
+        return field[key]
+    if '/Kids' in field and len(field['/Kids']) > 0 and key in field['/Kids'][0]:
+        return field['/Kids'][0][key]
+    parent = field.get('/Parent')
+    while parent is not None:
+        if key in parent:
+            return parent[key]
+        parent = parent.get('/Parent')
+    return None
+
+
+def _choice_options(opt):
+    """Export values of an /Opt array (entries are strings or [export, display] pairs)"""
+    import pikepdf
+
+    options = []
+    for entry in opt:
+        if isinstance(entry, pikepdf.Array) and len(entry) > 0:
+            options.append(str(entry[0]))
+        else:
+            options.append(str(entry))
+    return options
+
+
+def compile_field(field):
+    """Compile the constraints of one field into a dict"""
+    field_type = _inherited(field, '/FT')
+    field_type = str(field_type) if field_type is not None else None
+    flags = int(_inherited(field, '/Ff') or 0)
+
+    spec = {'readonly': bool(flags & FLAG_READONLY)}
+
+    if field_type == '/Tx':
+        spec['kind'] = 'text'
+        max_len = _inherited(field, '/MaxLen')
+        spec['max_len'] = int(max_len) if max_len is not None else None
+        spec['comb'] = bool(flags & FLAG_COMB) and spec['max_len'] is not None
+    elif field_type == '/Btn':
+        if flags & FLAG_PUSHBUTTON:
+            spec['kind'] = 'pushbutton'
+        else:
+            spec['kind'] = 'radio' if flags & FLAG_RADIO else 'checkbox'
+            spec['states'] = checkbox_states(field)
+    elif field_type == '/Ch':
+        spec['kind'] = 'choice'
+        opt = _inherited(field, '/Opt')
+        spec['options'] = _choice_options(opt) if opt is not None else []
+        # An editable combo box also takes text that is not in the list
+        spec['editable'] = bool(flags & FLAG_COMBO and flags & FLAG_EDIT)
+        spec['multiselect'] = bool(flags & FLAG_MULTISELECT)
+    elif field_type == '/Sig':
+        spec['kind'] = 'signature'
+    else:
+        spec['kind'] = 'unknown'
+
+    return spec
+
+
+def _check_text(spec, value):
+    if isinstance(value, (dict, list)):
+        return "expects text, got a JSON object or list"
+    max_len = spec.get('max_len')
+    if max_len is not None and len(str(value)) > max_len:
+        layout = f"comb field of {max_len} boxes" if spec['comb'] else f"MaxLen {max_len}"
+        return f"{len(str(value))} characters exceeds {layout}"
+    return None
+
+
+def _check_checkbox(spec, value):
+    if value in CHECKED_VALUES or value in UNCHECKED_VALUES:
+        return None
+    if isinstance(value, str) and value in spec['states']:
+        return None
+    return f"{value!r} is not a checkbox value (use Yes/Off or true/false)"
+
+
+def _check_choice(spec, value):
+    if isinstance(value, list) and not spec['multiselect']:
+        return "expects one choice, got a list"
+    values = value if isinstance(value, list) else [value]
+    if spec['editable'] or not spec['options']:
+        return None
+    invalid = [v for v in values if str(v) not in spec['options_set']]
+    if invalid:
+        shown = ', '.join(spec['options'][:5]) + (' ...' if len(spec['options']) > 5 else '')
+        return f"{invalid[0]!r} is not one of the choices ({shown})"
+    return None
+
+
+def _check_no_value(spec, value):
+    if value in UNCHECKED_VALUES:
+        return None
+    return f"{spec['kind']} fields cannot be filled"
+
+
+_CHECKERS = {
+    'text': _check_text,
+    'checkbox': _check_checkbox,
+    'radio': _check_checkbox,
+    'choice': _check_choice,
+    'pushbutton': _check_no_value,
+    'signature': _check_no_value,
+    'unknown': _check_text,
+}
+
+
+class FillSchema:
+    """Constraints of every fillable field of a template"""
+
+    def __init__(self, fields):
+        """fields: dict of field name -> spec dict from compile_field()"""
+        self.fields = fields
+        for spec in fields.values():
+            if spec['kind'] == 'choice':
+                spec['options_set'] = set(spec['options'])
+
+    @classmethod
+    def from_pdf(cls, pdf):
+        """Compile the schema of an open pikepdf.Pdf"""
+        fields = {}
+        acroform = pdf.Root.get('/AcroForm')
+        if acroform is not None and '/Fields' in acroform:
+            for name, field in named_fields(acroform.Fields):
+                fields.setdefault(name, compile_field(field))
+        return cls(fields)
+
+    @classmethod
+    def from_file(cls, pdf_path):
+        pdf = open_pdf(str(pdf_path))
+        try:
+            return cls.from_pdf(pdf)
+        finally:
+            close_pdf(pdf)
+
+    def to_dict(self):
+        return {name: {key: value for key, value in spec.items() if key != 'options_set'}
+                for name, spec in self.fields.items()}
+
+    def validate_records(self, records, allow_readonly=True):
+        """
+        Validate a batch of records column by column
+
+        Empty values (the defaults in generated templates) and annotation
+        keys are skipped. Read-only fields can only be changed
+        programmatically, which is usually the point of filling them, so they
+        are accepted unless allow_readonly is False.
+
+        Returns a dict of record index -> list of error messages; records
+        without errors are absent.
+        """
+        columns = {}
+        for index, record in enumerate(records):
+            for name, value in record.items():
+                if value is not None and value != '' and not is_annotation(name):
+                    columns.setdefault(name, []).append((index, value))
+
+        errors = {}
+        for name, cells in columns.items():
+            spec = self.fields.get(name)
+            if spec is None:
+                for index, _ in cells:
+                    errors.setdefault(index, []).append(f"{name}: unknown field")
+                continue
+
+            if spec['readonly'] and not allow_readonly:
+                for index, _ in cells:
+                    errors.setdefault(index, []).append(f"{name}: field is read-only")
+                continue
+
+            check = _CHECKERS[spec['kind']]
+            for index, value in cells:
+                message = check(spec, value)
+                if message is not None:
+                    errors.setdefault(index, []).append(f"{name}: {message}")
+
+        return errors
+
+    def validate(self, record, allow_readonly=True):
+        """Validate one record; returns a list of error messages"""
+        return self.validate_records([record], allow_readonly).get(0, [])
+
+
+def print_errors(errors, limit=10):
+    """Print validation errors ({record index: [messages]}) with 1-based record numbers"""
+    for index in sorted(errors)[:limit]:
+        for message in errors[index]:
+            print(f"✗ Record {index + 1}: {message}")
+    if len(errors) > limit:
+        print(f"  ... and {len(errors) - limit} more invalid records")
+
+
+def print_schema(schema):
+    kinds = {}
+    for spec in schema.fields.values():
+        kinds[spec['kind']] = kinds.get(spec['kind'], 0) + 1
+    print(f"Fields: {len(schema.fields)} ({', '.join(f'{n} {k}' for k, n in sorted(kinds.items()))})")
+    print(f"  With MaxLen: {sum(1 for s in schema.fields.values() if s.get('max_len') is not None)}")
+    print(f"  Comb:        {sum(1 for s in schema.fields.values() if s.get('comb'))}")
+    print(f"  Read-only:   {sum(1 for s in schema.fields.values() if s['readonly'])}")
+
+
+def main():
+    args = sys.argv[1:]
+    as_json = '--json' in args
+    strict = '--strict' in args
+    args = [arg for arg in args if arg not in ('--json', '--strict')]
+
+    if len(args) < 1:
+        print("Usage: python fill_schema.py <template.pdf> [records.json|records.csv] [--json] [--strict]")
+        print("\nExamples:")
+        print("  python fill_schema.py CLEAN_TEMPLATE.pdf                # Summary of the schema")
+        print("  python fill_schema.py CLEAN_TEMPLATE.pdf --json         # Full schema as JSON")
+        print("  python fill_schema.py CLEAN_TEMPLATE.pdf clients.csv    # Validate records")
+        print("\n--strict also rejects values for read-only fields")
+        sys.exit(1)
+
+    template_path = args[0]
+    if not Path(template_path).exists():
+        print(f"Error: File not found - {template_path}")
+        sys.exit(1)
+
+    schema = FillSchema.from_file(template_path)
+
+    if len(args) < 2:
+        if as_json:
+            print(json.dumps(schema.to_dict(), indent=2, ensure_ascii=False))
+        else:
+            print_schema(schema)
+        return
+
+    from batch_fill import load_records
+
+    records_path = args[1]
+    if not Path(records_path).exists():
+        print(f"Error: Records file not found - {records_path}")
+        sys.exit(1)
+
+    try:
+        records = load_records(records_path)
+    except (ValueError, json.JSONDecodeError) as e:
+        print(f"Error: Invalid records - {e}")
+        sys.exit(1)
+
+    errors = schema.validate_records(records, allow_readonly=not strict)
+    print_errors(errors)
+    print(f"\n{len(records) - len(errors)}/{len(records)} records valid")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,14 @@ Search for fields by their tooltip/label text
 
 import sys
 from pathlib import Path
-import pikepdf
 import json
 
 
 def search_fields(pdf_path, search_term=None):
     """Search fields by tooltip or name"""
 
+    import pikepdf
+
     try:
         pdf = pikepdf.open(pdf_path)
 
@@ -6,7 +6,7 @@ Generate a commented JSON template with field descriptions
 import sys
 import json
 from pathlib import Path
-import pikepdf
+from pdf_template import get_manifest
 
 
 def generate_template(pdf_path, output_file=None, sections=None):
@@ -20,59 +20,39 @@ def generate_template(pdf_path, output_file=None, sections=None):
     """
 
     try:
-        pdf = pikepdf.open(pdf_path)
+        # Answered from the stored manifest when this PDF has been seen before
+        manifest = get_manifest(pdf_path)
 
-        if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
+        if manifest.fields is None:
             print("✗ No form fields found")
             return
 
-        fields = pdf.Root.AcroForm.Fields
         field_map = {}
 
-        for field in fields:
-            if '/T' not in field:
+        for field in manifest.fields:
+            if field['name'] is None:
                 continue
 
-            field_name = str(field['/T'])
+            field_name = field['name']
 
             # Filter by sections if specified
             if sections:
                 if not any(field_name.startswith(s) for s in sections):
                     continue
 
-            # Get tooltip
-            tooltip = ""
-            if '/TU' in field:
-                tooltip = str(field['/TU'])
-
-            # Get field type
+            # Get field type (of the field or its first kid)
             field_type = "text"
-            if '/FT' in field:
-                ft = str(field['/FT'])
-                if ft == '/Btn':
-                    field_type = "checkbox"
-                elif ft == '/Ch':
-                    field_type = "choice"
-            elif '/Kids' in field and len(field['/Kids']) > 0:
-                try:
-                    first_kid = field['/Kids'][0]
-                    if '/FT' in first_kid:
-                        ft = str(first_kid['/FT'])
-                        if ft == '/Btn':
-                            field_type = "checkbox"
-                        elif ft == '/Ch':
-                            field_type = "choice"
-                except:
-                    pass
+            if field['ft'] == '/Btn':
+                field_type = "checkbox"
+            elif field['ft'] == '/Ch':
+                field_type = "choice"
 
             field_map[field_name] = {
                 "value": "" if field_type != "checkbox" else "Off",
-                "description": tooltip,
+                "description": field['tooltip'],
                 "type": field_type
             }
 
-        pdf.close()
-
         # Determine output file
         if output_file is None:
             pdf_name = Path(pdf_path).stem
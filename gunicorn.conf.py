@@ -0,0 +1,66 @@
+"""
+Gunicorn configuration for serving the web UI in production
+
+    gunicorn -c gunicorn.conf.py app:app
+    python serve.py --workers 4          # the same, with overrides
+
+The app is imported once in the master before any worker is forked
+(preload_app), so registered templates are loaded, hashed and analyzed
+(see template_registry.py) a single time. Workers inherit them
+copy-on-write: template bytes and their memfd, manifests, schemas and field
+maps are shared instead of being rebuilt per worker. gc.freeze() before each
+fork keeps the collector from touching - and so copying - those objects.
+
+Each worker is replaced gracefully after max_requests requests (with jitter
+so workers do not all restart at once), which caps the memory a worker can
+accumulate.
+
+Each worker runs at most PDFFILL_MAX_ACTIVE PDF operations at once and
+queues at most PDFFILL_MAX_QUEUE more (see admission.py); its other threads
+serve uploads, downloads and cheap requests, and turn PDF requests beyond
+the queue away with 503 instead of letting them pile up.
+
+Every setting can be overridden from the environment (PDFFILL_BIND,
+PDFFILL_WORKERS, PDFFILL_THREADS, PDFFILL_MAX_REQUESTS, PDFFILL_TIMEOUT) or
+on the command line.
+"""
+
+import gc
+import os
+
+bind = os.environ.get('PDFFILL_BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('PDFFILL_WORKERS', os.cpu_count() or 1))
+
+# Template.fill() is thread-safe, so each worker can take several requests at
+# once; with 1 thread gunicorn uses plain sync workers
+threads = int(os.environ.get('PDFFILL_THREADS', 12))
+
+# Admission limits per worker, read when the app is imported. Threads must
+# outnumber active + queued operations, or the queue never fills and excess
+# requests wait in gunicorn's backlog instead of getting a fast 503
+os.environ.setdefault('PDFFILL_MAX_ACTIVE', '2')
+os.environ.setdefault('PDFFILL_MAX_QUEUE', '6')
+
+preload_app = True
+
+max_requests = int(os.environ.get('PDFFILL_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+# A fill of a large template takes well under a second; anything near the
+# timeout is stuck
+timeout = int(os.environ.get('PDFFILL_TIMEOUT', 60))
+graceful_timeout = 30
+
+accesslog = os.environ.get('PDFFILL_ACCESS_LOG')
+errorlog = '-'
+
+# The control socket (gunicorn 24+) lives at one fixed path per user, which
+# several local servers - e.g. load tests - would fight over
+control_socket_disable = True
+
+
+def pre_fork(server, worker):
+    # Move everything the master has loaded into the permanent generation, so
+    # collections in the worker never write to those pages
+    gc.freeze()
+
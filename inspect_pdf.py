@@ -7,12 +7,13 @@ Shows EVERYTHING in the PDF structure
 import sys
 import json
 from pathlib import Path
-import pikepdf
 
 
 def inspect_pdf(pdf_path):
     """Comprehensive inspection of PDF structure"""
 
+    import pikepdf
+
     print(f"\n{'='*80}")
     print(f"COMPLETE PDF INSPECTION: {Path(pdf_path).name}")
     print(f"{'='*80}\n")
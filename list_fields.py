@@ -5,7 +5,7 @@ List all form fields in a PDF
 
 import sys
 from pathlib import Path
-import pikepdf
+from pdf_template import get_manifest
 
 
 def list_fields(pdf_path):
@@ -16,93 +16,54 @@ def list_fields(pdf_path):
     print(f"{'='*80}\n")
 
     try:
-        pdf = pikepdf.open(pdf_path)
+        # Answered from the stored manifest when this PDF has been seen before
+        manifest = get_manifest(pdf_path)
 
         # Check AcroForm
-        if '/AcroForm' not in pdf.Root:
+        if not manifest.has_acroform:
             print("✗ No AcroForm found in this PDF")
             return
 
-        acroform = pdf.Root.AcroForm
-
-        if '/Fields' not in acroform:
+        if manifest.fields is None:
             print("✗ No /Fields array found")
             return
 
-        fields = acroform.Fields
+        fields = manifest.fields
         print(f"Found {len(fields)} form fields\n")
         print(f"{'─'*80}\n")
 
+        field_types = {
+            '/Tx': 'Text',
+            '/Btn': 'Button/Checkbox',
+            '/Ch': 'Choice (dropdown/list)',
+            '/Sig': 'Signature'
+        }
+
         # List all fields
         for i, field in enumerate(fields, 1):
-            field_info = {}
-
-            # Get field name
-            if '/T' in field:
-                field_info['name'] = str(field['/T'])
-            else:
-                field_info['name'] = f"<unnamed_{i}>"
-
-            # Get field type
-            if '/FT' in field:
-                ft = str(field['/FT'])
-                field_types = {
-                    '/Tx': 'Text',
-                    '/Btn': 'Button/Checkbox',
-                    '/Ch': 'Choice (dropdown/list)',
-                    '/Sig': 'Signature'
-                }
-                field_info['type'] = field_types.get(ft, ft)
-            elif '/Kids' in field:
-                # Check first kid for type
-                try:
-                    first_kid = field['/Kids'][0]
-                    if '/FT' in first_kid:
-                        ft = str(first_kid['/FT'])
-                        field_types = {
-                            '/Tx': 'Text',
-                            '/Btn': 'Button/Checkbox',
-                            '/Ch': 'Choice (dropdown/list)',
-                            '/Sig': 'Signature'
-                        }
-                        field_info['type'] = field_types.get(ft, ft)
-                    else:
-                        field_info['type'] = 'Parent field'
-                except:
-                    field_info['type'] = 'Parent field'
-            else:
-                field_info['type'] = 'Unknown'
+            name = field['name'] if field['name'] is not None else f"<unnamed_{i}>"
 
-            # Get current value
-            if '/V' in field:
-                field_info['value'] = str(field['/V'])
+            # Type of the field, or of its first kid
+            if field['ft'] is not None:
+                field_type = field_types.get(field['ft'], field['ft'])
+            elif field['kids'] is not None:
+                field_type = 'Parent field'
             else:
-                field_info['value'] = '<empty>'
-
-            # Get default value
-            if '/DV' in field:
-                field_info['default'] = str(field['/DV'])
-
-            # Check if it has kids (is a parent field)
-            if '/Kids' in field:
-                field_info['kids'] = len(field['/Kids'])
+                field_type = 'Unknown'
 
             # Print field info
-            print(f"{i:4d}. {field_info['name']}")
-            print(f"       Type: {field_info['type']}")
-            if 'value' in field_info:
-                val = field_info['value']
-                if len(val) > 50:
-                    val = val[:50] + "..."
-                print(f"       Value: {val}")
-            if 'default' in field_info:
-                print(f"       Default: {field_info['default']}")
-            if 'kids' in field_info:
-                print(f"       Children: {field_info['kids']}")
+            print(f"{i:4d}. {name}")
+            print(f"       Type: {field_type}")
+            val = field['value'] if field['value'] is not None else '<empty>'
+            if len(val) > 50:
+                val = val[:50] + "..."
+            print(f"       Value: {val}")
+            if field['default'] is not None:
+                print(f"       Default: {field['default']}")
+            if field['kids'] is not None:
+                print(f"       Children: {field['kids']}")
             print()
 
-        pdf.close()
-
     except Exception as e:
         print(f"\n✗ Error: {e}")
         import traceback
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Load test for the web UI's API
+
+Drives the real upload -> fields -> fill -> download flow against a running
+server at a fixed concurrency (closed loop: every worker starts its next
+flow as soon as the last one finishes) or at a fixed arrival rate (open loop:
+flows start on schedule whether or not the server keeps up).
+
+Reports p50/p95/p99 latency, throughput and error rate per route, plus the
+server's RSS and the growth of its temp directory over the run. In open-loop
+runs the "flow" row is timed from each flow's scheduled start, so time spent
+queued behind a saturated server is counted instead of hidden.
+
+Only the standard library is used, so it runs from any Python 3 install.
+"""
+
+import sys
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+import subprocess
+import tempfile
+import urllib.request
+import urllib.error
+import http.cookiejar
+from pathlib import Path
+
+ROUTES = ('upload', 'fields', 'fill', 'download', 'flow')
+
+DEFAULT_URL = 'http://127.0.0.1:5000'
+DEFAULT_TEMPLATE = 'CLEAN_TEMPLATE.pdf'
+DEFAULT_DATA = 'correct_sample_data.json'
+
+REQUEST_TIMEOUT = 120
+RSS_SAMPLE_INTERVAL = 0.25
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Stats:
+    """Thread-safe latency and error counters per route"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {route: [] for route in ROUTES}
+        self.errors = {route: 0 for route in ROUTES}
+        self.error_messages = {}
+
+    def record(self, route, seconds, error=None):
+        with self.lock:
+            if error is None:
+                self.latencies[route].append(seconds)
+            else:
+                self.errors[route] += 1
+                key = f"{route}: {error}"
+                self.error_messages[key] = self.error_messages.get(key, 0) + 1
+
+    def summary(self, elapsed):
+        rows = {}
+        for route in ROUTES:
+            latencies = sorted(self.latencies[route])
+            total = len(latencies) + self.errors[route]
+            if total == 0:
+                continue
+            rows[route] = {
+                'requests': total,
+                'errors': self.errors[route],
+                'error_rate': self.errors[route] / total,
+                'throughput': len(latencies) / elapsed if elapsed else 0.0,
+                'p50_ms': percentile(latencies, 50) * 1000,
+                'p95_ms': percentile(latencies, 95) * 1000,
+                'p99_ms': percentile(latencies, 99) * 1000,
+                'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+            }
+        return rows
+
+
+def encode_multipart(field_name, filename, data):
+    """Encode one file as a multipart/form-data body"""
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+        f"Content-Type: application/pdf\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class FlowClient:
+    """One user session - the app keeps file ids in the session cookie"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, path, body=None, content_type=None):
+        """Return (status, body bytes); HTTP errors are returned, not raised"""
+        headers = {'Content-Type': content_type} if content_type else {}
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers)
+        try:
+            with self.opener.open(req, timeout=REQUEST_TIMEOUT) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+def _error_text(status, body):
+    try:
+        message = json.loads(body).get('error', '')
+    except (ValueError, AttributeError):
+        message = ''
+    return f"HTTP {status}" + (f" {message[:60]}" if message else '')
+
+
+def run_flow(base_url, config, stats):
+    """Run upload -> fields -> fill -> download once; returns True on success"""
+    client = FlowClient(base_url)
+
+    def step(route, path, body=None, content_type=None, check=None):
+        start = time.perf_counter()
+        try:
+            status, payload = client.request(path, body, content_type)
+        except Exception as e:
+            stats.record(route, 0, type(e).__name__)
+            return None
+        elapsed = time.perf_counter() - start
+        if status >= 400:
+            stats.record(route, elapsed, _error_text(status, payload))
+            return None
+        if check is not None and not check(payload):
+            stats.record(route, elapsed, 'unexpected response')
+            return None
+        stats.record(route, elapsed)
+        return payload
+
+    file_id = config['template_id']
+    if file_id is None:
+        body, content_type = config['upload_body']
+        payload = step('upload', '/api/upload', body, content_type)
+        if payload is None:
+            return False
+        file_id = json.loads(payload)['file_id']
+
+    if step('fields', f'/api/fields/{file_id}') is None:
+        return False
+
+    payload = step('fill', f'/api/fill/{file_id}', config['fill_body'], 'application/json')
+    if payload is None:
+        return False
+    output_id = json.loads(payload)['output_id']
+
+    payload = step('download', f'/api/download/{output_id}',
+                   check=lambda data: data.startswith(b'%PDF'))
+    return payload is not None
+
+
+def process_tree_rss(pid):
+    """
+    RSS in bytes of a process and its children (Linux /proc), or None
+
+    Uses each process's PSS where the kernel reports it, so pages that
+    pre-forked workers share copy-on-write are counted once, not per worker.
+    """
+    def rss_of(p):
+        try:
+            with open(f'/proc/{p}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Pss:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+        return 0
+
+    total = rss_of(pid)
+    if total is None:
+        return None
+
+    # Worker processes (e.g. a multi-worker server) are children of pid
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            total += rss_of(int(entry)) or 0
+    return total
+
+
+def temp_dir_usage(path):
+    """(file count, total bytes) of the files directly inside path"""
+    count = 0
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        count += 1
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass  # Removed while scanning
+    except OSError:
+        pass
+    return count, total
+
+
+class ResourceMonitor(threading.Thread):
+    """Samples server RSS in the background while the load runs"""
+
+    def __init__(self, pid):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.samples = []
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            rss = process_tree_rss(self.pid)
+            if rss is not None:
+                self.samples.append(rss)
+            self.stop_event.wait(RSS_SAMPLE_INTERVAL)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+        rss = process_tree_rss(self.pid)
+        if rss is not None:
+            self.samples.append(rss)
+
+
+def wait_for_server(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base_url.rstrip('/') + '/api/templates', timeout=2):
+                return True
+        except urllib.error.HTTPError:
+            return True
+        except OSError:
+            time.sleep(0.25)
+    return False
+
+
+def spawn_server(base_url, workers=None, asgi=False):
+    """
+    Start the app locally, so its pid is the server's
+
+    With workers, runs the production configuration (serve.py: gunicorn
+    with pre-forked workers), serving asgi_app.py when asgi is set;
+    otherwise app.py's Flask server without the debug reloader. Every
+    simulated client comes from the same address, so the server's
+    per-client limit is turned off unless PDFFILL_PER_CLIENT is set.
+    """
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(base_url)
+    if workers or asgi:
+        from serve import gunicorn_command
+        command = gunicorn_command(bind=f"{parts.hostname}:{parts.port or 80}",
+                                   workers=workers or 1, asgi=asgi)
+    else:
+        code = (f"from app import app; "
+                f"app.run(host={parts.hostname!r}, port={parts.port or 80}, threaded=True)")
+        command = [sys.executable, '-c', code]
+    env = dict(os.environ)
+    env.setdefault('PDFFILL_PER_CLIENT', '0')
+    return subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def run_load(base_url, config, concurrency, duration, rate=None):
+    """
+    Run flows for `duration` seconds
+
+    Without a rate, `concurrency` workers run flows back to back. With a rate
+    (flows per second) flows are started on a fixed schedule and picked up by
+    up to `concurrency` workers; flows still queued at the end are reported
+    as not started.
+    """
+    stats = Stats()
+    stop = threading.Event()
+    schedule = queue.Queue() if rate else None
+    started = [0]
+    count_lock = threading.Lock()
+
+    def worker():
+        while not stop.is_set():
+            if schedule is not None:
+                try:
+                    scheduled = schedule.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if stop.is_set():
+                    break
+            else:
+                scheduled = time.perf_counter()
+            with count_lock:
+                started[0] += 1
+            ok = run_flow(base_url, config, stats)
+            stats.record('flow', time.perf_counter() - scheduled, None if ok else 'failed')
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    end = start + duration
+    if schedule is not None:
+        next_start = start
+        while next_start < end:
+            schedule.put(next_start)
+            next_start += 1 / rate
+            time.sleep(max(0.0, min(next_start, end) - time.perf_counter()))
+    else:
+        time.sleep(duration)
+    stop.set()
+
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    not_started = schedule.qsize() if schedule is not None else 0
+    return stats, elapsed, started[0], not_started
+
+
+def _take_option(args, name, convert=str, default=None):
+    """Remove `name value` from args and return the converted value"""
+    if name not in args:
+        return default
+    i = args.index(name)
+    try:
+        value = convert(args[i + 1])
+    except (IndexError, ValueError):
+        print(f"Error: {name} needs a {'number' if convert is not str else 'value'}")
+        sys.exit(1)
+    del args[i:i + 2]
+    return value
+
+
+def print_report(results):
+    print(f"\n{'Route':10s} {'Requests':>9s} {'Errors':>7s} {'Err %':>6s} {'Req/s':>7s} "
+          f"{'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    for route, row in results['routes'].items():
+        print(f"{route:10s} {row['requests']:9d} {row['errors']:7d} {row['error_rate'] * 100:6.1f} "
+              f"{row['throughput']:7.2f} {row['p50_ms']:8.1f} {row['p95_ms']:8.1f} "
+              f"{row['p99_ms']:8.1f} {row['max_ms']:8.1f}")
+
+    if results['not_started']:
+        print(f"\n⚠️  {results['not_started']} scheduled flows never started - the server "
+              f"could not keep up with {results['rate']}/s")
+
+    for message, count in sorted(results['error_messages'].items(), key=lambda item: -item[1])[:5]:
+        print(f"✗ {count} x {message}")
+
+    server = results['server']
+    if server.get('rss_start') is not None:
+        mb = 1024 * 1024
+        print(f"\nServer RSS: {server['rss_start'] / mb:.1f} MB → {server['rss_end'] / mb:.1f} MB "
+              f"(peak {server['rss_peak'] / mb:.1f} MB)")
+    print(f"Temp dir:   +{server['temp_files_added']} files, "
+          f"+{server['temp_bytes_added'] / (1024 * 1024):.1f} MB ({server['temp_dir']})")
+
+
+def main():
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print("Usage: python loadtest.py [--url URL] [--concurrency N] [--rate FLOWS_PER_SEC]")
+        print("                          [--duration SECONDS] [--template file.pdf | --template-id ID]")
+        print("                          [--data data.json] [--server-pid PID | --spawn [--workers N] [--asgi]]")
+        print("                          [--temp-dir DIR] [--json results.json]")
+        print("\nExamples:")
+        print("  python loadtest.py --spawn --concurrency 4 --duration 30")
+        print("  python loadtest.py --spawn --workers 4 --concurrency 8   # production config (gunicorn)")
+        print("  python loadtest.py --spawn --asgi --workers 2 --concurrency 64   # ASGI variant")
+        print("  python loadtest.py --server-pid 1234 --rate 2 --concurrency 16 --duration 60")
+        print("  python loadtest.py --template-id clean --concurrency 8   # skip the upload step")
+        sys.exit(0)
+
+    spawn = '--spawn' in args
+    asgi = '--asgi' in args
+    args = [arg for arg in args if arg not in ('--spawn', '--asgi')]
+    base_url = _take_option(args, '--url', default=DEFAULT_URL)
+    concurrency = _take_option(args, '--concurrency', int, 4)
+    rate = _take_option(args, '--rate', float)
+    duration = _take_option(args, '--duration', float, 30.0)
+    template = _take_option(args, '--template', default=DEFAULT_TEMPLATE)
+    template_id = _take_option(args, '--template-id')
+    data_path = _take_option(args, '--data', default=DEFAULT_DATA)
+    server_pid = _take_option(args, '--server-pid', int)
+    workers = _take_option(args, '--workers', int)
+    temp_dir = _take_option(args, '--temp-dir')
+    json_path = _take_option(args, '--json')
+
+    if args:
+        print(f"Error: Unknown arguments - {' '.join(args)} (see --help)")
+        sys.exit(1)
+    if (workers or asgi) and not spawn:
+        print("Error: --workers and --asgi only apply with --spawn")
+        sys.exit(1)
+
+    if temp_dir is None:
+        # The server's upload directory, when it runs from this checkout
+        try:
+            from temp_sweeper import default_upload_dir
+            temp_dir = default_upload_dir()
+        except ImportError:
+            temp_dir = tempfile.gettempdir()
+
+    for path in ([data_path] if template_id else [data_path, template]):
+        if not Path(path).exists():
+            print(f"Error: File not found - {path}")
+            sys.exit(1)
+
+    with open(data_path, 'r') as f:
+        field_data = json.load(f)
+    config = {
+        'template_id': template_id,
+        'upload_body': None if template_id else encode_multipart(
+            'file', Path(template).name, Path(template).read_bytes()),
+        'fill_body': json.dumps({'fields': field_data}).encode(),
+    }
+
+    server = None
+    if spawn:
+        print(f"Starting {'ASGI ' if asgi else ''}server at {base_url}"
+              + (f" ({workers} workers)..." if workers else "..."))
+        server = spawn_server(base_url, workers, asgi)
+        server_pid = server.pid
+
+    try:
+        if not wait_for_server(base_url):
+            print(f"✗ No server responding at {base_url}")
+            sys.exit(1)
+
+        mode = f"{rate}/s arrival rate, up to {concurrency} concurrent" if rate else f"{concurrency} concurrent"
+        print(f"Load testing {base_url} for {duration:.0f}s ({mode})...")
+
+        temp_before = temp_dir_usage(temp_dir)
+        monitor = ResourceMonitor(server_pid) if server_pid else None
+        if monitor:
+            monitor.start()
+
+        stats, elapsed, flows, not_started = run_load(base_url, config, concurrency, duration, rate)
+
+        if monitor:
+            monitor.stop()
+        temp_after = temp_dir_usage(temp_dir)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    samples = monitor.samples if monitor else []
+    results = {
+        'url': base_url,
+        'concurrency': concurrency,
+        'rate': rate,
+        'duration': elapsed,
+        'flows': flows,
+        'not_started': not_started,
+        'routes': stats.summary(elapsed),
+        'error_messages': stats.error_messages,
+        'server': {
+            'pid': server_pid,
+            'rss_start': samples[0] if samples else None,
+            'rss_end': samples[-1] if samples else None,
+            'rss_peak': max(samples) if samples else None,
+            'temp_dir': temp_dir,
+            'temp_files_added': temp_after[0] - temp_before[0],
+            'temp_bytes_added': temp_after[1] - temp_before[1],
+        },
+    }
+
+    print_report(results)
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to: {json_path}")
+
+    if any(row['errors'] for row in results['routes'].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
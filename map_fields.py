@@ -5,12 +5,13 @@ Create a detailed field mapping showing field names, types, positions, and toolt
 
 import sys
 from pathlib import Path
-import pikepdf
 
 
 def map_fields(pdf_path):
     """Create detailed field mapping"""
 
+    import pikepdf
+
     print(f"\n{'='*100}")
     print(f"DETAILED FIELD MAPPING: {Path(pdf_path).name}")
     print(f"{'='*100}\n")
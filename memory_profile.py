@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+Memory profiling for the PDF operations
+
+Profile mode runs each operation repeatedly and records the memory traced by
+tracemalloc, the number of open file descriptors and RSS around every call,
+and tracemalloc snapshots and the number of live pikepdf.Pdf objects around
+the whole series. An operation is flagged when any of them keeps growing
+across calls - the usual sign of a document that is never closed - and the
+allocation sites that grew are listed.
+
+Soak mode runs the operations round-robin (10,000 calls by default) and
+exits with status 1 unless memory, descriptors and live documents stay
+bounded.
+
+The operations include the early-return and exception paths (a PDF without
+a form, a file that is not a PDF, data that fails validation), since those
+are where documents used to be left open. The web.* operations go through
+the Flask test client instead - upload, chunked upload, fields, fill (cache
+hits, and new data every call so the sandbox and cache eviction run) and
+remove-void - with uploads, outputs and a small fill cache in a temporary
+directory.
+
+By default a small generated form is used so soak runs finish in minutes;
+pass --template / --data to profile a real template.
+"""
+
+import sys
+import os
+import gc
+import json
+import time
+import tempfile
+import tracemalloc
+import contextlib
+from pathlib import Path
+
+DEFAULT_CALLS = 20
+WARMUP_CALLS = 3
+SOAK_OPERATIONS = 10000
+SOAK_SAMPLE_EVERY = 250
+
+# Growth allowed per call in profile mode before an operation is flagged
+TRACED_GROWTH_PER_CALL = 4 * 1024
+
+# Growth allowed over a soak run, measured from the end of the warm-up
+SOAK_TRACED_TOLERANCE = 1024 * 1024
+SOAK_RSS_TOLERANCE = 16 * 1024 * 1024
+
+# Fields of the generated sample form
+SAMPLE_DATA = {'A05t': 'Doe', 'A09c': 'Yes'}
+
+# Fill cache size for the web operations - small, so eviction runs too
+WEB_FILL_CACHE_MB = 1
+
+
+def make_sample_form(path, with_form=True):
+    """Write a one-page PDF with a text field, a checkbox and the VOID fields"""
+    import pikepdf
+    from pikepdf import Name, Dictionary, Array
+
+    pdf = pikepdf.new()
+    pdf.add_blank_page(page_size=(612, 792))
+    page = pdf.pages[0].obj
+
+    if with_form:
+        def appearance(content):
+            return pdf.make_stream(content, Type=Name.XObject, Subtype=Name.Form, BBox=[0, 0, 12, 12])
+
+        def field(name, field_type, rect, **extra):
+            return pdf.make_indirect(Dictionary(Type=Name.Annot, Subtype=Name.Widget, FT=Name(field_type),
+                                                T=name, Rect=rect, P=page, **extra))
+
+        fields = [
+            field('A05t', '/Tx', [72, 700, 300, 720], MaxLen=30),
+            field('A09c', '/Btn', [72, 660, 84, 672], V=Name.Off, AS=Name.Off,
+                  AP=Dictionary(N=Dictionary(Yes=appearance(b'0 0 12 12 re f'), Off=appearance(b'')))),
+            field('btnVoid', '/Btn', [100, 300, 500, 500], Ff=1 << 16,
+                  MK=Dictionary(CA='VOID'), AP=Dictionary(N=appearance(b'BT /F1 72 Tf (VOID) Tj ET'))),
+            field('H_Proposition', '/Tx', [72, 620, 300, 640], Ff=1, V='VOID'),
+        ]
+        page.Annots = pdf.make_indirect(Array(fields))
+        pdf.Root.AcroForm = pdf.make_indirect(Dictionary(Fields=Array(fields)))
+
+    pdf.save(path)
+
+
+def make_context(workdir, template=None, data_path=None):
+    """Input files and data shared by all operations"""
+    ctx = {'workdir': workdir}
+
+    if template:
+        ctx['form'] = str(template)
+        with open(data_path, 'r') as f:
+            ctx['data'] = json.load(f)
+    else:
+        ctx['form'] = os.path.join(workdir, 'sample_form.pdf')
+        make_sample_form(ctx['form'])
+        ctx['data'] = SAMPLE_DATA
+
+    ctx['no_form'] = os.path.join(workdir, 'no_form.pdf')
+    make_sample_form(ctx['no_form'], with_form=False)
+
+    ctx['not_pdf'] = os.path.join(workdir, 'not_a_pdf.pdf')
+    with open(ctx['not_pdf'], 'wb') as f:
+        f.write(b'This is not a PDF file\n')
+
+    ctx['invalid_data'] = {'__not_a_field__': 'x'}
+    ctx['output'] = os.path.join(workdir, 'output.pdf')
+
+    # A text value to vary for fills the cache has not seen
+    ctx['vary_field'] = next((name for name, value in ctx['data'].items()
+                              if isinstance(value, str) and value not in ('Yes', 'Off')), None)
+    ctx['fills'] = 0
+    return ctx
+
+
+def _get_form_fields(ctx):
+    from app import get_form_fields
+    get_form_fields(ctx['form'])
+
+
+def _get_form_fields_not_pdf(ctx):
+    from app import get_form_fields
+    get_form_fields(ctx['not_pdf'])
+
+
+def _app_fill_pdf(ctx):
+    from app import fill_pdf
+    fill_pdf(ctx['form'], ctx['output'], ctx['data'])
+
+
+def _app_fill_pdf_invalid(ctx):
+    from app import fill_pdf
+    fill_pdf(ctx['form'], ctx['output'], ctx['invalid_data'])
+
+
+def _app_fill_pdf_no_form(ctx):
+    from app import fill_pdf
+    fill_pdf(ctx['no_form'], ctx['output'], ctx['data'])
+
+
+def _app_remove_void(ctx):
+    from app import remove_void_watermark
+    remove_void_watermark(ctx['form'], ctx['output'])
+
+
+def _app_remove_void_no_form(ctx):
+    from app import remove_void_watermark
+    remove_void_watermark(ctx['no_form'], ctx['output'])
+
+
+def _remove_void_actual(ctx):
+    from remove_void import remove_void_actual
+    remove_void_actual(ctx['form'], ctx['output'])
+
+
+def _remove_void_actual_no_form(ctx):
+    from remove_void import remove_void_actual
+    remove_void_actual(ctx['no_form'], ctx['output'])
+
+
+def _fill_pdf(ctx):
+    from fill_pdf import fill_pdf
+    fill_pdf(ctx['form'], ctx['output'], ctx['data'])
+
+
+def _web_json(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.request.path}: {response.status_code} {response.get_data(as_text=True)}")
+    return response.get_json()
+
+
+def _web_client(ctx):
+    """A new test client (so its session cookie does not grow) with the form uploaded"""
+    from app import app
+
+    client = app.test_client()
+    with open(ctx['form'], 'rb') as f:
+        uploaded = _web_json(client.post('/api/upload', data={'file': (f, 'form.pdf')}))
+    return client, uploaded['file_id']
+
+
+def _web_output(client, response):
+    """Download an operation's output, then delete it so the upload directory stays small"""
+    from app import app
+
+    output_id = _web_json(response)['output_id']
+    client.get(f"/api/download/{output_id}").close()
+    # Not glob(): fnmatch caches a compiled pattern per unique output id
+    for name in os.listdir(app.config['UPLOAD_FOLDER']):
+        if name.startswith(f"{output_id}_"):
+            os.unlink(os.path.join(app.config['UPLOAD_FOLDER'], name))
+
+
+def _web_fields(ctx):
+    client, file_id = _web_client(ctx)
+    _web_json(client.get(f"/api/fields/{file_id}"))
+
+
+def _web_fill(ctx):
+    client, file_id = _web_client(ctx)
+    _web_output(client, client.post(f"/api/fill/{file_id}", json={'fields': ctx['data']}))
+
+
+def _web_fill_new_data(ctx):
+    client, file_id = _web_client(ctx)
+    ctx['fills'] += 1
+    data = dict(ctx['data'])
+    if ctx['vary_field']:
+        data[ctx['vary_field']] = str(ctx['fills'])
+    _web_output(client, client.post(f"/api/fill/{file_id}", json={'fields': data}))
+
+
+def _web_remove_void(ctx):
+    client, file_id = _web_client(ctx)
+    _web_output(client, client.post(f"/api/remove-void/{file_id}"))
+
+
+def _web_chunked_upload(ctx):
+    from app import app
+
+    client = app.test_client()
+    with open(ctx['form'], 'rb') as f:
+        content = f.read()
+    upload = _web_json(client.post('/api/upload/chunked', json={'filename': 'form.pdf', 'size': len(content)}))
+    half = len(content) // 2
+    for offset, chunk in ((0, content[:half]), (half, content[half:])):
+        _web_json(client.put(f"/api/upload/chunked/{upload['upload_id']}?offset={offset}", data=chunk))
+    _web_json(client.post(f"/api/upload/chunked/{upload['upload_id']}/complete"))
+
+
+# Operation name -> function taking the context dict
+OPERATIONS = {
+    'get_form_fields': _get_form_fields,
+    'get_form_fields[not pdf]': _get_form_fields_not_pdf,
+    'app.fill_pdf': _app_fill_pdf,
+    'app.fill_pdf[invalid]': _app_fill_pdf_invalid,
+    'app.fill_pdf[no form]': _app_fill_pdf_no_form,
+    'remove_void_watermark': _app_remove_void,
+    'remove_void_watermark[no form]': _app_remove_void_no_form,
+    'remove_void_actual': _remove_void_actual,
+    'remove_void_actual[no form]': _remove_void_actual_no_form,
+    'fill_pdf': _fill_pdf,
+    'web.fields': _web_fields,
+    'web.fill': _web_fill,
+    'web.fill[new data]': _web_fill_new_data,
+    'web.remove_void': _web_remove_void,
+    'web.chunked_upload': _web_chunked_upload,
+}
+
+
+def open_fds():
+    """Number of open file descriptors (Linux / macOS), or None"""
+    for fd_dir in ('/proc/self/fd', '/dev/fd'):
+        if os.path.isdir(fd_dir):
+            return len(os.listdir(fd_dir))
+    return None
+
+
+def live_pdfs():
+    """Number of pikepdf.Pdf objects still alive"""
+    import pikepdf
+    return sum(1 for obj in gc.get_objects() if type(obj) is pikepdf.Pdf)
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def measure(count_pdfs=True):
+    """Collect garbage, then read traced memory, descriptors, live documents and RSS"""
+    gc.collect()
+    return {
+        'traced': tracemalloc.get_traced_memory()[0],
+        'fds': open_fds(),
+        'pdfs': live_pdfs() if count_pdfs else None,
+        'rss': rss_bytes(),
+    }
+
+
+def _snapshot():
+    """Snapshot without the profiler's own allocations"""
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen *>'),
+    ))
+
+
+def _traced_total(snapshot):
+    return sum(stat.size for stat in snapshot.statistics('filename'))
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silence the operations' progress prints without buffering them"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def profile_operation(name, ctx, calls=DEFAULT_CALLS):
+    """
+    Run one operation `calls` times after a short warm-up
+
+    Traced memory, open descriptors and RSS are read before and after every
+    call; live pikepdf.Pdf objects and tracemalloc snapshots (which exclude
+    this script's own bookkeeping) before the first and after the last call.
+    Returns the per-call readings, the growth over the series and the
+    allocation sites that grew the most.
+    """
+    func = OPERATIONS[name]
+    with _quiet():
+        for _ in range(WARMUP_CALLS):
+            func(ctx)
+
+        first = measure()
+        snapshot_before = _snapshot()
+        samples = []
+        for _ in range(calls):
+            before = measure(count_pdfs=False)
+            func(ctx)
+            samples.append((before, measure(count_pdfs=False)))
+        last = measure()
+        snapshot_after = _snapshot()
+
+    growth = {
+        'traced': _traced_total(snapshot_after) - _traced_total(snapshot_before),
+        'fds': (last['fds'] - first['fds']) if first['fds'] is not None else 0,
+        'pdfs': last['pdfs'] - first['pdfs'],
+        'rss': last['rss'] - first['rss'],
+    }
+    flagged = (growth['traced'] / calls > TRACED_GROWTH_PER_CALL
+               or growth['fds'] > 0 or growth['pdfs'] > 0)
+
+    top = [stat for stat in snapshot_after.compare_to(snapshot_before, 'lineno') if stat.size_diff > 0][:3]
+    return {
+        'name': name,
+        'calls': calls,
+        'samples': samples,
+        'growth': growth,
+        'traced_per_call': growth['traced'] / calls,
+        'flagged': flagged,
+        'top_growth': [str(stat) for stat in top],
+    }
+
+
+def print_profile(results):
+    print(f"\n{'Operation':32s} {'Calls':>6s} {'Traced/call':>12s} {'Handles':>8s} "
+          f"{'Live Pdf':>9s} {'RSS':>9s}  Status")
+    for result in results:
+        growth = result['growth']
+        status = '✗ GROWING' if result['flagged'] else '✓ stable'
+        print(f"{result['name']:32s} {result['calls']:6d} {result['traced_per_call']:+10.0f} B "
+              f"{growth['fds']:+8d} {growth['pdfs']:+9d} {growth['rss'] / 1024:+7.0f} KB  {status}")
+
+    for result in results:
+        if result['flagged'] and result['top_growth']:
+            print(f"\n{result['name']} - largest allocation growth:")
+            for line in result['top_growth']:
+                print(f"  {line}")
+
+
+def soak(ctx, operations=SOAK_OPERATIONS, names=None):
+    """
+    Run operations round-robin and check that memory stays bounded
+
+    Returns (ok, report). Measurements taken after the first 10% of calls
+    (the warm-up) are the reference the end of the run is compared to.
+    """
+    names = names or list(OPERATIONS)
+    warmup = max(len(names), operations // 10)
+    reference = None
+    samples = []
+    start = time.perf_counter()
+
+    with _quiet():
+        for i in range(operations):
+            OPERATIONS[names[i % len(names)]](ctx)
+            done = i + 1
+            if done == warmup:
+                reference = measure()
+                samples.append((done, reference))
+            elif done % SOAK_SAMPLE_EVERY == 0 or done == operations:
+                samples.append((done, measure()))
+                if done % (SOAK_SAMPLE_EVERY * 8) == 0 or done == operations:
+                    sys.__stdout__.write(f"  {done}/{operations} operations "
+                                         f"(RSS {samples[-1][1]['rss'] / (1024 * 1024):.1f} MB)\n")
+                    sys.__stdout__.flush()
+
+    final = samples[-1][1]
+    checks = [
+        ('Traced memory', final['traced'] - reference['traced'], SOAK_TRACED_TOLERANCE),
+        ('RSS', final['rss'] - reference['rss'], max(SOAK_RSS_TOLERANCE, reference['rss'] // 10)),
+        ('Open file descriptors', (final['fds'] or 0) - (reference['fds'] or 0), 0),
+        ('Live pikepdf.Pdf objects', final['pdfs'] - reference['pdfs'], 0),
+    ]
+    report = {
+        'operations': operations,
+        'seconds': time.perf_counter() - start,
+        'reference': reference,
+        'final': final,
+        'peak_rss': max(sample['rss'] for _, sample in samples),
+        'checks': [{'name': name, 'growth': growth, 'limit': limit, 'ok': growth <= limit}
+                   for name, growth, limit in checks],
+    }
+    return all(check['ok'] for check in report['checks']), report
+
+
+def print_soak(ok, report):
+    print(f"\nSoak: {report['operations']} operations in {report['seconds']:.0f}s "
+          f"(peak RSS {report['peak_rss'] / (1024 * 1024):.1f} MB)")
+    for check in report['checks']:
+        mark = '✓' if check['ok'] else '✗'
+        if check['name'] in ('Traced memory', 'RSS'):
+            print(f"{mark} {check['name']}: {check['growth'] / 1024:+.0f} KB after warm-up "
+                  f"(limit {check['limit'] / 1024:.0f} KB)")
+        else:
+            print(f"{mark} {check['name']}: {check['growth']:+d} after warm-up")
+    print(f"\n{'✓ Memory stayed bounded' if ok else '✗ Memory grew during the soak run'}")
+
+
+def take_option(args, name, convert=str, default=None):
+    """Remove `name value` from args and return the converted value"""
+    if name not in args:
+        return default
+    i = args.index(name)
+    try:
+        value = convert(args[i + 1])
+    except (IndexError, ValueError):
+        print(f"Error: {name} needs a {'number' if convert is not str else 'value'}")
+        sys.exit(1)
+    del args[i:i + 2]
+    return value
+
+
+def main():
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print("Usage: python memory_profile.py [--calls N] [--only name,...] [--template file.pdf --data data.json]")
+        print(f"       python memory_profile.py --soak [{SOAK_OPERATIONS}]")
+        print("\nOperations:")
+        for name in OPERATIONS:
+            print(f"  {name}")
+        print("\nExamples:")
+        print("  python memory_profile.py                  # Profile every operation 20 times")
+        print("  python memory_profile.py --soak 10000     # Fail unless memory stays bounded")
+        print("  python memory_profile.py --soak 2000 --only web.fill,web.fill[new data]   # Web path only")
+        sys.exit(0)
+
+    soak_operations = None
+    if '--soak' in args:
+        i = args.index('--soak')
+        soak_operations = SOAK_OPERATIONS
+        if i + 1 < len(args) and args[i + 1].isdigit():
+            soak_operations = int(args.pop(i + 1))
+        args.pop(i)
+
+    calls = take_option(args, '--calls', int, DEFAULT_CALLS)
+    only = take_option(args, '--only')
+    template = take_option(args, '--template')
+    data_path = take_option(args, '--data', default='correct_sample_data.json')
+    if args:
+        print(f"Error: Unknown arguments - {' '.join(args)} (see --help)")
+        sys.exit(1)
+
+    names = None
+    if only:
+        names = [name.strip() for name in only.split(',') if name.strip()]
+        unknown = [name for name in names if name not in OPERATIONS]
+        if unknown:
+            print(f"Error: Unknown operation - {', '.join(unknown)}")
+            sys.exit(1)
+
+    if template and not Path(template).exists():
+        print(f"Error: File not found - {template}")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Keep the web operations' files out of the server's upload directory
+        os.environ['PDFFILL_UPLOAD_DIR'] = os.path.join(workdir, 'uploads')
+        os.environ.setdefault('PDFFILL_FILL_CACHE_MB', str(WEB_FILL_CACHE_MB))
+
+        # Import everything up front so module loading is not counted as growth
+        with _quiet():
+            import app
+            import fill_pdf  # noqa: F401
+            import remove_void  # noqa: F401
+
+        tracemalloc.start(10)
+        ctx = make_context(workdir, template, data_path)
+        try:
+            if soak_operations:
+                print(f"Soak test: {soak_operations} operations on {Path(ctx['form']).name}...")
+                ok, report = soak(ctx, soak_operations, names)
+                print_soak(ok, report)
+                if not ok:
+                    sys.exit(1)
+                return
+
+            print(f"Profiling {Path(ctx['form']).name} ({calls} calls per operation)...")
+            results = [profile_operation(name, ctx, calls) for name in (names or OPERATIONS)]
+            print_profile(results)
+            if any(result['flagged'] for result in results):
+                sys.exit(1)
+        finally:
+            app.sandbox.close()
+
+
+if __name__ == "__main__":
+    main()
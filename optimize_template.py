@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Shrink a PDF template before it is used for filling
+
+Every fill reads and writes the whole template, so dead weight in the
+template is paid on every fill. This script:
+1. Collapses byte-identical streams (appearance streams, images, fonts,
+   metadata) into one shared object
+2. Merges identical font, font descriptor, encoding and graphics state
+   dictionaries, which become identical once their streams are shared
+3. Drops page resources that no content stream uses
+4. Saves with object streams, so unreachable objects are not written
+
+It reports how many objects were merged and dropped and how many bytes
+were saved.
+"""
+
+import sys
+import os
+import hashlib
+from pathlib import Path
+from pdf_template import open_pdf, close_pdf
+
+# Dictionary types that are safe to share between pages / widgets
+SHAREABLE_TYPES = ('/Font', '/FontDescriptor', '/Encoding', '/ExtGState')
+
+# Passes needed to merge dictionaries whose children were merged in the
+# previous pass (stream -> font descriptor -> font)
+MAX_PASSES = 4
+
+
+def _stream_key(stream):
+    import pikepdf
+
+    stream_dict = pikepdf.Dictionary(stream.stream_dict)
+    if '/Length' in stream_dict:
+        del stream_dict['/Length']
+    digest = hashlib.sha256(stream.read_raw_bytes()).digest()
+    return (b'S', digest, stream_dict.unparse())
+
+
+def _dict_key(obj):
+    if str(obj.get('/Type', '')) not in SHAREABLE_TYPES:
+        return None
+    return (b'D', obj.unparse())
+
+
+def _find_duplicates(pdf, merged):
+    """Map objgen of every duplicate object to the first identical object"""
+    import pikepdf
+
+    canonical = {}
+    remap = {}
+    duplicate_bytes = 0
+
+    for obj in pdf.objects:
+        if obj.objgen in merged:
+            continue  # Already unreferenced - dropped at save
+        if isinstance(obj, pikepdf.Stream):
+            key = _stream_key(obj)
+        elif isinstance(obj, pikepdf.Dictionary):
+            key = _dict_key(obj)
+        else:
+            key = None
+        if key is None:
+            continue
+
+        first = canonical.setdefault(key, obj)
+        if first is not obj and first.objgen != obj.objgen:
+            remap[obj.objgen] = first
+            if isinstance(obj, pikepdf.Stream):
+                duplicate_bytes += len(obj.read_raw_bytes())
+
+    return remap, duplicate_bytes
+
+
+def _rewrite_references(obj, remap):
+    """Point every reference inside obj (and its direct children) at canonical objects"""
+    import pikepdf
+
+    if isinstance(obj, (pikepdf.Dictionary, pikepdf.Stream)):
+        keys = list(obj.keys())
+        items = ((key, obj[key]) for key in keys)
+    elif isinstance(obj, pikepdf.Array):
+        items = enumerate(list(obj))
+    else:
+        return
+
+    for key, value in items:
+        if not isinstance(value, pikepdf.Object):
+            continue  # Numbers, booleans and strings come back as Python values
+        if value.is_indirect:
+            target = remap.get(value.objgen)
+            if target is not None:
+                obj[key] = target
+        elif isinstance(value, (pikepdf.Dictionary, pikepdf.Array)):
+            _rewrite_references(value, remap)
+
+
+def optimize_pdf(pdf):
+    """
+    Deduplicate objects and drop unused page resources in an open pikepdf.Pdf
+
+    Returns a report dict. Unreachable objects are dropped when the
+    document is saved.
+    """
+    report = {
+        'objects_before': len(pdf.objects),
+        'objects_merged': 0,
+        'duplicate_stream_bytes': 0,
+    }
+
+    merged = set()
+    for _ in range(MAX_PASSES):
+        remap, duplicate_bytes = _find_duplicates(pdf, merged)
+        if not remap:
+            break
+        merged.update(remap)
+
+        for obj in pdf.objects:
+            if obj.objgen not in merged:
+                _rewrite_references(obj, remap)
+        _rewrite_references(pdf.trailer, remap)
+
+        report['objects_merged'] += len(remap)
+        report['duplicate_stream_bytes'] += duplicate_bytes
+
+    pdf.remove_unreferenced_resources()
+    return report
+
+
+def save_optimized(pdf, output_pdf):
+    """Save with object streams so only reachable objects are written, compactly"""
+    import pikepdf
+
+    pdf.save(output_pdf, object_stream_mode=pikepdf.ObjectStreamMode.generate,
+             compress_streams=True)
+
+
+def optimize_file(input_pdf, output_pdf):
+    """Optimize one template file; returns the report with sizes"""
+    import pikepdf
+
+    pdf = open_pdf(str(input_pdf), writable=True)
+    try:
+        report = optimize_pdf(pdf)
+        save_optimized(pdf, str(output_pdf))
+    finally:
+        close_pdf(pdf)
+
+    with pikepdf.open(str(output_pdf)) as result:
+        report['objects_after'] = len(result.objects)
+    report['objects_dropped'] = report['objects_before'] - report['objects_merged'] - report['objects_after']
+    report['size_before'] = os.path.getsize(input_pdf)
+    report['size_after'] = os.path.getsize(output_pdf)
+    report['bytes_saved'] = report['size_before'] - report['size_after']
+    return report
+
+
+def print_report(report):
+    print(f"  Duplicate objects merged:    {report['objects_merged']} "
+          f"({report['duplicate_stream_bytes'] / 1024:.1f} KB of stream data)")
+    if 'objects_after' in report:
+        print(f"  Unreachable objects dropped: {max(report['objects_dropped'], 0)}")
+        print(f"  Objects: {report['objects_before']} → {report['objects_after']}")
+        saved_pct = 100 * report['bytes_saved'] / report['size_before'] if report['size_before'] else 0
+        print(f"  Size: {report['size_before'] / 1024:.1f} KB → {report['size_after'] / 1024:.1f} KB "
+              f"(saved {report['bytes_saved'] / 1024:.1f} KB, {saved_pct:.1f}%)")
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Optimize a PDF template (dedup streams, prune unused objects)\n")
+        print("Usage: python optimize_template.py <input.pdf> <output.pdf>")
+        print("\nExample:")
+        print("  python optimize_template.py CLEAN_TEMPLATE.pdf CLEAN_TEMPLATE.min.pdf")
+        sys.exit(1)
+
+    input_pdf = sys.argv[1]
+    output_pdf = sys.argv[2]
+
+    if not Path(input_pdf).exists():
+        print(f"Error: File not found - {input_pdf}")
+        sys.exit(1)
+
+    print(f"Optimizing: {input_pdf}\n")
+    report = optimize_file(input_pdf, output_pdf)
+    print_report(report)
+    print(f"\n✓ Saved to: {output_pdf}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,6 @@ Identifies whether a PDF uses XFA (XML Forms Architecture) or AcroForm (traditio
 """
 
 import sys
-import PyPDF2
 from pathlib import Path
 
 
@@ -23,6 +22,8 @@ def detect_form_type(pdf_path):
             - has_xfa: boolean
             - details: additional information
     """
+
+    import PyPDF2
     result = {
         "form_type": "None",
         "has_acroform": False,
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+PDF operations behind the web API
+
+Shared by app.py and asgi_app.py. A source is either an uploaded file's
+path or a RegisteredTemplate. The module has no side effects on import - no
+Flask app, no registry - so sandbox workers (see sandbox.py) can import it
+to run operations on uploads. Operations report failures as return values,
+except MemoryError, which is raised so the sandbox replaces its worker.
+"""
+
+import pikepdf
+
+from pdf_template import Template
+from template_registry import RegisteredTemplate
+from template_manifest import manifest_for_file
+
+
+def get_manifest(source):
+    """
+    Manifest of an uploaded file or a registered template
+
+    An upload is only parsed the first time its contents are seen; the
+    manifest is stored under its content hash (see template_manifest.py).
+    """
+    if isinstance(source, RegisteredTemplate):
+        return source.manifest
+    return manifest_for_file(source)
+
+
+def open_input(source):
+    """Open an uploaded file path, or a fresh copy of a registered template"""
+    if isinstance(source, RegisteredTemplate):
+        return source.open_copy()
+    return pikepdf.open(source)
+
+
+def get_form_fields(source):
+    """Extract all form fields from an uploaded PDF or a registered template"""
+    if isinstance(source, RegisteredTemplate):
+        return source.fields
+
+    try:
+        return get_manifest(source).form_fields
+
+    except MemoryError:
+        raise
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+
+def search_fields(source, search_term):
+    """Search for fields by name or tooltip"""
+    try:
+        return get_manifest(source).search(search_term)
+    except MemoryError:
+        raise
+    except Exception as e:
+        print(f"Error: {e}")
+        return []
+
+
+def invalid_data_message(errors):
+    shown = '; '.join(errors[:5])
+    more = f" (and {len(errors) - 5} more)" if len(errors) > 5 else ''
+    return f"Invalid field data: {shown}{more}"
+
+
+def fill_pdf(input_pdf, output_pdf, field_data):
+    """Fill PDF form fields"""
+    try:
+        # Uploads are filled like registered templates: validated against
+        # the manifest's schema, then filled through its field references
+        registered = isinstance(input_pdf, RegisteredTemplate)
+        template = input_pdf.template if registered else Template(input_pdf)
+        try:
+            with template.fill(field_data) as document:
+                if document:
+                    document.save(output_pdf)
+                report = document.report
+        finally:
+            if not registered:
+                template.close()
+    except MemoryError:
+        raise
+    except Exception as e:
+        return False, str(e)
+
+    if not report:
+        if not report.field_count:
+            return False, "No form fields found"
+        return False, invalid_data_message(report.errors)
+
+    message = f"Filled {len(report.filled)} fields"
+    if report.xfa_updated:
+        message += f" ({len(report.xfa_updated)} XFA data nodes updated)"
+    return True, message
+
+
+def remove_defaults(input_pdf, output_pdf, fields_to_clear=None):
+    """Remove default values from fields"""
+    try:
+        pdf = open_input(input_pdf)
+        try:
+            if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
+                return False, "No form fields found"
+
+            cleared_count = 0
+            fields = pdf.Root.AcroForm.Fields
+
+            for field in fields:
+                if '/T' not in field:
+                    continue
+
+                field_name = str(field['/T'])
+
+                should_clear = False
+                if fields_to_clear is None:
+                    should_clear = '/V' in field
+                else:
+                    should_clear = field_name in fields_to_clear and '/V' in field
+
+                if should_clear:
+                    try:
+                        del field['/V']
+                        if '/AP' in field:
+                            del field['/AP']
+                        cleared_count += 1
+                    except:
+                        pass
+
+            pdf.save(output_pdf)
+
+            return True, f"Cleared {cleared_count} fields"
+        finally:
+            pdf.close()
+
+    except MemoryError:
+        raise
+    except Exception as e:
+        return False, str(e)
+
+
+def remove_void_watermark(input_pdf, output_pdf):
+    """Remove VOID watermark by hiding btnVoid field and clearing appearance streams"""
+    try:
+        pdf = open_input(input_pdf)
+        try:
+            if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
+                return False, "No form fields found"
+
+            fields = pdf.Root.AcroForm.Fields
+            found_btnvoid = False
+            found_h_prop = False
+
+            for field in fields:
+                if '/T' not in field:
+                    continue
+
+                field_name = str(field['/T'])
+
+                # Hide the btnVoid button (the VOID watermark)
+                if field_name == 'btnVoid':
+                    found_btnvoid = True
+
+                    # Set field flags to make it hidden (bit 1 = hidden)
+                    current_flags = int(field.get('/Ff', 0))
+                    new_flags = current_flags | 2
+                    field['/Ff'] = new_flags
+
+                    # Clear caption and appearance streams
+                    if '/Kids' in field:
+                        for kid in field['/Kids']:
+                            if '/MK' in kid:
+                                kid['/MK']['/CA'] = ''
+                            if '/AP' in kid:
+                                del kid['/AP']
+
+                    # Remove parent field appearance
+                    if '/AP' in field:
+                        del field['/AP']
+
+                # Clear H_Proposition field
+                if field_name == 'H_Proposition':
+                    found_h_prop = True
+
+                    # Remove ReadOnly flag
+                    if '/Ff' in field:
+                        current_flags = int(field['/Ff'])
+                        new_flags = current_flags & ~1
+                        field['/Ff'] = new_flags
+
+                    # Set to empty
+                    field['/V'] = ''
+                    field['/DV'] = ''
+
+                    if '/Kids' in field:
+                        for kid in field['/Kids']:
+                            kid['/V'] = ''
+                            if '/AP' in kid:
+                                del kid['/AP']
+
+            if found_btnvoid or found_h_prop:
+                pdf.Root.AcroForm['/NeedAppearances'] = True
+                pdf.save(output_pdf)
+
+                result_msg = "VOID watermark removed successfully!"
+                if found_btnvoid:
+                    result_msg += " (btnVoid field hidden)"
+                if found_h_prop:
+                    result_msg += " (H_Proposition cleared)"
+
+                return True, result_msg
+            else:
+                return False, "btnVoid or H_Proposition field not found"
+        finally:
+            pdf.close()
+
+    except MemoryError:
+        raise
+    except Exception as e:
+        return False, str(e)
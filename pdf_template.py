@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Resident PDF templates
+
+A Template keeps a PDF's bytes and its parsed pikepdf document in memory so
+repeated operations on the same file skip reading and parsing it again. It is
+also the library entry point for filling one form many times in-process:
+
+    from pdf_template import Template
+
+    template = Template("CLEAN_TEMPLATE.pdf")
+    for record in records:
+        with template.fill(record) as document:
+            if document:
+                document.save(f"out/{record['A05t']}.pdf")
+            else:
+                print(document.report.errors)
+
+Each fill works on its own copy of the document, opened from the bytes in
+memory. pikepdf parses lazily, so a copy only parses the objects the fill
+touches; the file is never read again. On Linux the bytes are kept in an
+anonymous memory file (memfd) that pikepdf opens by path, which saves about
+a fifth of the fill time compared with reading them through a BytesIO.
+
+The field lists, schema and field references come from the template's
+manifest (template_manifest.py), so a template that has been seen before is
+not parsed until something reads or copies the document.
+
+Thread safety: one Template can be shared by any number of threads.
+fill(), open_copy(), manifest, schema, field_refs and content_hash are safe
+to call concurrently. The resident `pdf` is not - pikepdf documents are not
+thread-safe even for reads - so code that reads it directly must hold
+`template.lock`. A FilledDocument belongs to the thread that created it.
+
+Scripts open their input with open_pdf() / close_pdf() instead of calling
+pikepdf.open() directly. Normally that is exactly pikepdf.open(); when a
+long-running process (the pdffill daemon) installs a TemplateCache, reads are
+served from the resident document and writes get a fresh in-memory copy.
+Scripts that only need the field model call get_manifest() instead.
+"""
+
+import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+# pikepdf save options for filled documents. A deterministic /ID is derived
+# from the content instead of the clock, so the same data filled into the
+# same template always saves to the same bytes (fill_cache.py relies on it).
+SAVE_OPTIONS = {'deterministic_id': True}
+
+
+def _memory_file(data):
+    """(fd, path) of an anonymous in-memory file holding data, or (None, None)"""
+    if not hasattr(os, 'memfd_create') or not os.path.isdir('/proc/self/fd'):
+        return None, None
+    try:
+        fd = os.memfd_create('pdf-template', os.MFD_CLOEXEC)
+    except OSError:
+        return None, None
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+    return fd, f"/proc/self/fd/{fd}"
+
+
+class Template:
+    """A PDF loaded once and kept in memory"""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.signature = self._stat_signature()
+
+        with open(self.path, 'rb') as f:
+            self.data = f.read()
+        self._memfd, self._memfd_path = _memory_file(self.data)
+
+        self.lock = threading.RLock()
+        self._pdf = None
+        self._manifest = None
+        self._content_hash = None
+
+    def _stat_signature(self):
+        st = os.stat(self.path)
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def is_stale(self):
+        """True when the file on disk changed since it was loaded"""
+        try:
+            return self._stat_signature() != self.signature
+        except OSError:
+            return True
+
+    def open_copy(self):
+        """Open an independent, writable copy of the document from memory"""
+        import pikepdf
+
+        if self._memfd_path is not None:
+            try:
+                return pikepdf.open(self._memfd_path)
+            except pikepdf.PdfError as e:
+                # Name the template in the message, not the memfd
+                raise pikepdf.PdfError(str(e).replace(self._memfd_path, self.path)) from None
+        return pikepdf.open(io.BytesIO(self.data))
+
+    @property
+    def content_hash(self):
+        """Hex SHA-256 of the file's bytes"""
+        if self._content_hash is None:
+            self._content_hash = hashlib.sha256(self.data).hexdigest()
+        return self._content_hash
+
+    @property
+    def pdf(self):
+        """
+        Parsed document shared by read-only callers, opened on first use
+
+        Never save or mutate it, and hold lock while reading it.
+        """
+        if self._pdf is None:
+            with self.lock:
+                if self._pdf is None:
+                    self._pdf = self.open_copy()
+        return self._pdf
+
+    @property
+    def manifest(self):
+        """Field lists, schema and field references (see template_manifest.py)"""
+        if self._manifest is None:
+            from template_manifest import TemplateManifest, load_or_build
+
+            with self.lock:
+                if self._manifest is None:
+                    self._manifest = load_or_build(
+                        self.content_hash, lambda: TemplateManifest.from_pdf(self.pdf, self.content_hash))
+        return self._manifest
+
+    @property
+    def schema(self):
+        """Validation schema for fill data (see fill_schema.py)"""
+        return self.manifest.schema
+
+    @property
+    def field_refs(self):
+        """Field name (see fill_pdf.named_fields) -> (objnum, gen), valid in every copy of the document"""
+        return self.manifest.field_refs
+
+    def fill(self, field_data, validate=True):
+        """
+        Fill a fresh copy of the template; returns a FilledDocument
+
+        Data is checked against the cached schema before any copy is made.
+        When it is invalid, or the template has no form, the FilledDocument
+        is falsy and its report's errors say why.
+        """
+        from fill_pdf import FillReport, fill_document
+
+        report = FillReport(self.path)
+        if validate:
+            report.field_count = len(self.schema.fields)
+            with report.phase('validate'):
+                errors = self.schema.validate(field_data)
+            if errors:
+                report.errors.extend(errors)
+                return FilledDocument(None, report)
+
+        with report.phase('open'):
+            pdf = self.open_copy()
+        try:
+            filled = fill_document(pdf, field_data, report, validate=False, field_refs=self.field_refs)
+        except Exception:
+            pdf.close()
+            raise
+        if not filled:
+            pdf.close()
+            return FilledDocument(None, report)
+        return FilledDocument(pdf, report)
+
+    def close(self):
+        with self.lock:
+            if self._pdf is not None:
+                self._pdf.close()
+                self._pdf = None
+            if self._memfd is not None:
+                # Copies still open hold their own descriptor
+                os.close(self._memfd)
+                self._memfd = self._memfd_path = None
+
+
+class FilledDocument:
+    """
+    A filled, independent copy of a Template
+
+    Falsy when nothing was filled (see report.errors). Use it from one
+    thread only, and close it - or use it as a context manager - when done.
+    """
+
+    def __init__(self, pdf, report):
+        self.pdf = pdf
+        self.report = report
+
+    def __bool__(self):
+        return self.pdf is not None
+
+    def save(self, output):
+        """Save to a path or a writable binary file object"""
+        if self.pdf is None:
+            raise ValueError("Nothing was filled: " + '; '.join(self.report.errors))
+        with self.report.phase('save'):
+            self.pdf.save(output, **SAVE_OPTIONS)
+        self.report.saved = True
+        if isinstance(output, (str, os.PathLike)):
+            self.report.output_pdf = str(output)
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        self.save(buffer)
+        return buffer.getvalue()
+
+    def close(self):
+        if self.pdf is not None:
+            self.pdf.close()
+            self.pdf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TemplateCache:
+    """Least-recently-used set of resident Templates keyed by absolute path"""
+
+    def __init__(self, max_templates=16):
+        self.max_templates = max_templates
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the resident Template for path, reloading it if the file changed"""
+        key = os.path.abspath(path)
+
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None and template.is_stale():
+                self._discard(key)
+                template = None
+
+            if template is None:
+                template = Template(key)
+                self._templates[key] = template
+                while len(self._templates) > self.max_templates:
+                    self._discard(next(iter(self._templates)))
+            else:
+                self._templates.move_to_end(key)
+
+            return template
+
+    def _discard(self, key):
+        self._templates.pop(key).close()
+
+    def is_resident(self, pdf):
+        """True for a template's shared document (compared without opening any)"""
+        with self._lock:
+            return any(template._pdf is pdf for template in self._templates.values())
+
+    def paths(self):
+        with self._lock:
+            return list(self._templates)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._templates):
+                self._discard(key)
+
+
+_cache = None
+
+
+def install_cache(cache):
+    """Serve open_pdf() from cache (None restores plain pikepdf.open)"""
+    global _cache
+    _cache = cache
+
+
+def open_pdf(path, writable=False):
+    """
+    Open a PDF for reading, or for modifying and saving when writable=True
+
+    Always pair with close_pdf(). Without an installed cache this is
+    pikepdf.open(path).
+    """
+    if _cache is None:
+        import pikepdf
+        return pikepdf.open(path)
+
+    template = _cache.get(path)
+    return template.open_copy() if writable else template.pdf
+
+
+def get_manifest(path):
+    """
+    Manifest of the PDF at path (see template_manifest.py)
+
+    Served from the resident template when a cache is installed; otherwise
+    the PDF is only parsed when no manifest is stored for its contents.
+    """
+    if _cache is not None:
+        return _cache.get(path).manifest
+
+    from template_manifest import manifest_for_file
+    return manifest_for_file(path)
+
+
+def close_pdf(pdf):
+    """Close a document from open_pdf(), leaving resident documents open"""
+    if _cache is not None and _cache.is_resident(pdf):
+        return
+    pdf.close()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+pdffill - single command-line entry point for all PDF form tools
+
+Each subcommand runs one of the existing scripts. A script is only imported
+when its subcommand is invoked, and the scripts themselves import pikepdf /
+PyPDF2 inside the functions that need them, so `pdffill --help` and argument
+errors never pay for loading the heavy PDF libraries.
+
+Keep the imports at the top of this file to the standard library modules that
+are already loaded at interpreter start-up - `check-startup` enforces this.
+"""
+
+import sys
+import os
+
+# Subcommand -> (script module, one-line description)
+COMMANDS = {
+    'fill': ('fill_pdf', 'Fill form fields from JSON data'),
+    'list': ('list_fields', 'List all form fields with types and values'),
+    'export': ('export_fields', 'Export current field values to JSON'),
+    'template': ('generate_template', 'Generate a commented JSON template'),
+    'find': ('find_field_by_label', 'Search fields by tooltip/label text'),
+    'map': ('map_fields', 'Detailed field mapping with pages and positions'),
+    'inspect': ('inspect_pdf', 'Deep inspection of the PDF structure'),
+    'detect': ('pdf_form_detector', 'Detect XFA vs AcroForm forms'),
+    'analyze': ('advanced_pdf_analyzer', 'Alternative deep form analyzer'),
+    'xfa': ('check_xfa', 'Check whether a PDF has XFA forms'),
+    'js': ('extract_js', 'Extract document-level JavaScript streams'),
+    'js-all': ('extract_all_javascript', 'Extract ALL document-level JavaScript'),
+    'remove-void': ('remove_void', 'Permanently remove the VOID watermark'),
+    'remove-defaults': ('remove_defaults', 'Remove default values from fields'),
+    'clean': ('create_clean_template', 'Create a clean production template'),
+    'sanitize': ('sanitize', 'Apply a sanitization rule file to a PDF or directory'),
+    'optimize': ('optimize_template', 'Merge duplicate streams and prune unused objects'),
+    'schema': ('fill_schema', 'Show a template\'s validation schema or validate records'),
+    'manifest': ('template_manifest', 'Build or show a template\'s stored field manifest (--clear)'),
+    'batch': ('batch_fill', 'Fill a template once per JSON/CSV record (--merge for one PDF)'),
+    'extract': ('bulk_extract', 'Extract field values of many PDFs into one CSV/Parquet table'),
+    'benchmark': ('benchmark', 'Benchmark the core operations (--save to record a baseline)'),
+    'perf-gate': ('perf_gate', 'Fail when benchmarks regress against the stored baseline'),
+    'memory': ('memory_profile', 'Profile memory / open handles per operation (--soak N)'),
+    'serve': ('serve', 'Start the web UI (gunicorn workers; --debug for the dev server)'),
+    'loadtest': ('loadtest', 'Load test the web API (upload -> fields -> fill -> download)'),
+    'daemon': ('pdffill_daemon', 'Run the warm resident daemon (--stop, --status)'),
+}
+
+# Subcommands forwarded to a running `pdffill daemon` (in-process otherwise)
+DAEMON_COMMANDS = ('fill', 'list', 'export', 'remove-void', 'remove-defaults', 'clean', 'sanitize',
+                   'optimize', 'batch')
+
+# Seconds to reach the daemon, and to wait for its answer
+# ($PDFFILL_DAEMON_TIMEOUT) before running the command in-process instead
+DAEMON_CONNECT_TIMEOUT = 2.0
+DEFAULT_DAEMON_TIMEOUT = 600.0
+
+# Subcommands that do real work when run without arguments - check-startup
+# checks their --help instead
+RUN_WITHOUT_ARGS_COMMANDS = ('loadtest', 'benchmark', 'perf-gate', 'memory')
+
+# Modules that must never be loaded just to print help or a usage error
+HEAVY_MODULES = ('pikepdf', 'PyPDF2', 'flask', 'werkzeug')
+
+# Budget for `import pdffill` itself, in microseconds (cumulative, -X importtime)
+IMPORT_BUDGET_US = 10000
+
+
+def print_help():
+    print("Usage: pdffill <command> [args...]")
+    print("\nCommands:")
+    for name, (module, description) in COMMANDS.items():
+        print(f"  {name:16s} {description}")
+    print(f"  {'check-startup':16s} Verify start-up stays within the import budget")
+    print("\nRun 'pdffill <command>' without arguments to see its usage.")
+
+
+def run_command(name, args):
+    """Run a subcommand's script as if it had been invoked directly"""
+    import runpy
+
+    module, _ = COMMANDS[name]
+    sys.argv = [f"{module}.py"] + list(args)
+    runpy.run_module(module, run_name='__main__', alter_sys=True)
+
+
+def default_socket_path():
+    """Daemon socket from $PDFFILL_SOCKET, else a per-user path in the temp dir"""
+    path = os.environ.get('PDFFILL_SOCKET')
+    if path:
+        return path
+    tmpdir = os.environ.get('TMPDIR', '/tmp')
+    return os.path.join(tmpdir, f"pdffill-{os.getuid()}.sock")
+
+
+def send_to_daemon(request, socket_path=None):
+    """
+    Send one request to a running daemon
+
+    Returns the response dict, or None when no daemon answers: none is
+    listening, the socket cannot be used (stale permissions, say) or the
+    daemon does not respond in time. The socket module is only imported once
+    a socket file exists.
+    """
+    socket_path = socket_path or default_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+
+    import json
+    import socket
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(DAEMON_CONNECT_TIMEOUT)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            sock.settimeout(float(os.environ.get('PDFFILL_DAEMON_TIMEOUT', DEFAULT_DAEMON_TIMEOUT)))
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+    except OSError:
+        # Includes timeouts (socket.timeout is an OSError)
+        return None
+
+    return json.loads(line) if line else None
+
+
+def run_via_daemon(name, args):
+    """Run a subcommand in the daemon; returns its exit code, or None if no daemon"""
+    response = send_to_daemon({'command': name, 'args': list(args), 'cwd': os.getcwd()})
+    if response is None:
+        return None
+
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    return response['exit_code']
+
+
+def _import_times(args):
+    """Run a Python child with -X importtime and return {module: cumulative_us}"""
+    import subprocess
+
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def check_startup():
+    """
+    Verify that help and usage-error paths stay light
+
+    Fails when `import pdffill` exceeds IMPORT_BUDGET_US, or when printing help
+    or a subcommand's usage error loads any of HEAVY_MODULES.
+    """
+
+    failures = []
+
+    times = _import_times(['-c', 'import pdffill'])
+    own = times.get('pdffill', 0)
+    status = "✓" if own <= IMPORT_BUDGET_US else "✗"
+    print(f"{status} import pdffill: {own / 1000:.1f} ms (budget {IMPORT_BUDGET_US / 1000:.1f} ms)")
+    if own > IMPORT_BUDGET_US:
+        failures.append('import pdffill')
+
+    runs = [('--help', ['pdffill.py', '--help'])]
+    runs += [(name, ['pdffill.py', name] + (['--help'] if name in RUN_WITHOUT_ARGS_COMMANDS else []))
+             for name in COMMANDS if name not in ('serve', 'daemon')]
+
+    for label, args in runs:
+        loaded = [m for m in _import_times(args) if m.split('.')[0] in HEAVY_MODULES]
+        if loaded:
+            print(f"✗ pdffill {label}: loaded {', '.join(sorted(set(m.split('.')[0] for m in loaded)))}")
+            failures.append(label)
+        else:
+            print(f"✓ pdffill {label}: no heavy imports")
+
+    if failures:
+        print(f"\n✗ Start-up check failed: {', '.join(failures)}")
+        return False
+
+    print("\n✓ Start-up check passed")
+    return True
+
+
+def main():
+    import signal
+
+    args = sys.argv[1:]
+
+    # Exit quietly when piped into `head` and friends instead of raising
+    # BrokenPipeError from deep inside a script
+    if hasattr(signal, 'SIGPIPE'):
+        signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+
+    if not args or args[0] in ('-h', '--help', 'help'):
+        print_help()
+        sys.exit(0 if args else 1)
+
+    command, rest = args[0], args[1:]
+
+    if command == 'check-startup':
+        sys.exit(0 if check_startup() else 1)
+
+    if command not in COMMANDS:
+        print(f"Error: Unknown command - {command}\n")
+        print_help()
+        sys.exit(1)
+
+    if command in DAEMON_COMMANDS and not os.environ.get('PDFFILL_NO_DAEMON'):
+        exit_code = run_via_daemon(command, rest)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    run_command(command, rest)
+
+
+if __name__ == "__main__":
+    main()
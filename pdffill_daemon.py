@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+pdffill daemon - keeps parsed templates resident between CLI calls
+
+The daemon listens on a Unix domain socket and runs the fill, list, export and
+clean subcommands in a warm interpreter, with every template it has seen kept
+parsed in memory (see pdf_template.TemplateCache). `pdffill` forwards these
+subcommands to the daemon when it is running and runs them in-process when it
+is not, so scripts do not need to know whether it is up.
+
+Protocol: the client sends one JSON line
+    {"command": "fill", "args": [...], "cwd": "/path"}
+and receives one JSON line
+    {"stdout": "...", "stderr": "...", "exit_code": 0}
+
+Requests are handled one at a time, in arrival order.
+"""
+
+import sys
+import os
+import io
+import json
+import traceback
+import importlib
+import threading
+import socketserver
+from contextlib import redirect_stdout, redirect_stderr
+
+import pdf_template
+from pdffill import COMMANDS, DAEMON_COMMANDS, default_socket_path, send_to_daemon
+
+
+def run_request(request):
+    """Run one subcommand in this process and capture its output"""
+    command = request.get('command')
+    args = request.get('args', [])
+    cwd = request.get('cwd') or os.getcwd()
+
+    if command not in DAEMON_COMMANDS:
+        return {'stdout': '', 'stderr': f"Error: Unsupported command - {command}\n", 'exit_code': 1}
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code = 0
+    saved_argv, saved_cwd = sys.argv, os.getcwd()
+
+    try:
+        os.chdir(cwd)
+        module = importlib.import_module(COMMANDS[command][0])
+        sys.argv = [f"{module.__name__}.py"] + list(args)
+
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                module.main()
+            except SystemExit as e:
+                if isinstance(e.code, int):
+                    exit_code = e.code
+                elif e.code is not None:
+                    print(e.code, file=sys.stderr)
+                    exit_code = 1
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+    finally:
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+
+    return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'exit_code': exit_code}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            response = {'stdout': '', 'stderr': f"Error: Invalid request - {e}\n", 'exit_code': 1}
+        else:
+            if request.get('command') == 'shutdown':
+                response = {'stdout': "✓ Daemon stopped\n", 'stderr': '', 'exit_code': 0}
+                # shutdown() blocks until serve_forever() returns, so it must
+                # not run on the serving thread
+                threading.Thread(target=self.server.shutdown).start()
+            elif request.get('command') == 'status':
+                paths = self.server.cache.paths()
+                lines = [f"✓ Daemon running (pid {os.getpid()})", f"  Resident templates: {len(paths)}"]
+                lines += [f"    - {p}" for p in paths]
+                response = {'stdout': '\n'.join(lines) + '\n', 'stderr': '', 'exit_code': 0}
+            else:
+                response = run_request(request)
+
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    def __init__(self, socket_path, cache):
+        self.cache = cache
+        super().__init__(socket_path, RequestHandler)
+
+
+def serve(socket_path=None, max_templates=16):
+    socket_path = socket_path or default_socket_path()
+
+    if send_to_daemon({'command': 'status'}, socket_path) is not None:
+        print(f"Error: A daemon is already listening on {socket_path}")
+        sys.exit(1)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # Stale socket from a daemon that died
+
+    cache = pdf_template.TemplateCache(max_templates=max_templates)
+    pdf_template.install_cache(cache)
+
+    old_umask = os.umask(0o077)  # Socket is private to this user
+    try:
+        server = DaemonServer(socket_path, cache)
+    finally:
+        os.umask(old_umask)
+
+    print(f"✓ pdffill daemon listening on {socket_path} (pid {os.getpid()})")
+    sys.stdout.flush()
+
+    try:
+        server.serve_forever(poll_interval=0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        cache.clear()
+        pdf_template.install_cache(None)
+
+
+def main():
+    args = sys.argv[1:]
+    socket_path = None
+    action = 'start'
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--socket' and i + 1 < len(args):
+            socket_path = args[i + 1]
+            i += 2
+        elif args[i] in ('--stop', '--status'):
+            action = args[i][2:]
+            i += 1
+        else:
+            print("Usage: python pdffill.py daemon [--socket PATH] [--stop | --status]")
+            print("\nExamples:")
+            print("  python pdffill.py daemon &           # Start in the background")
+            print("  python pdffill.py daemon --status    # Show resident templates")
+            print("  python pdffill.py daemon --stop      # Stop the daemon")
+            sys.exit(1)
+
+    if action == 'start':
+        serve(socket_path)
+        return
+
+    response = send_to_daemon({'command': 'shutdown' if action == 'stop' else 'status'}, socket_path)
+    if response is None:
+        print("✗ No daemon running")
+        sys.exit(1)
+    sys.stdout.write(response['stdout'])
+
+
+if __name__ == "__main__":
+    main()
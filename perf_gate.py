@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Performance regression gate
+
+Runs the benchmark suite (benchmark.py) and compares every operation with a
+committed baseline. A metric only counts as a regression when the slowdown is
+both larger than the threshold and statistically clear: the 95% confidence
+interval of the difference between the current and baseline means (Welch's
+t-interval over the repeats) must lie entirely above threshold x baseline.
+Noisy runs therefore report "~" instead of failing, and rerunning with more
+--repeats narrows the interval.
+
+Output size is deterministic and is compared directly.
+
+Exits with status 1 when any benchmark regresses.
+"""
+
+import sys
+import json
+import math
+import statistics
+from pathlib import Path
+from benchmark import (BENCHMARKS, DEFAULT_BASELINE, DEFAULT_TEMPLATE, DEFAULT_DATA,
+                       DEFAULT_REPEATS, DEFAULT_MEMORY_REPEATS, run_suite, t_critical,
+                       parse_names, take_option)
+
+# Allowed growth before a change counts as a regression
+DEFAULT_THRESHOLDS = {'time': 0.10, 'peak_memory': 0.10, 'size': 0.02}
+
+METRIC_UNITS = {'time': (1000, 'ms'), 'peak_memory': (1 / (1024 * 1024), 'MB'), 'size': (1 / 1024, 'KB')}
+
+
+def welch_interval(current, baseline):
+    """95% confidence interval of mean(current) - mean(baseline)"""
+    diff = statistics.fmean(current) - statistics.fmean(baseline)
+    if len(current) < 2 or len(baseline) < 2:
+        return diff, diff
+
+    a = statistics.variance(current) / len(current)
+    b = statistics.variance(baseline) / len(baseline)
+    if a + b == 0:
+        return diff, diff
+
+    df = (a + b) ** 2 / (a ** 2 / (len(current) - 1) + b ** 2 / (len(baseline) - 1))
+    half_width = t_critical(df) * math.sqrt(a + b)
+    return diff - half_width, diff + half_width
+
+
+def compare_samples(current, baseline, threshold):
+    """Return (status, change, (low, high)) with change and interval relative to the baseline mean"""
+    base_mean = statistics.fmean(baseline)
+    if base_mean == 0:
+        return '~', 0.0, (0.0, 0.0)
+
+    low, high = welch_interval(current, baseline)
+    change = (statistics.fmean(current) - base_mean) / base_mean
+    interval = (low / base_mean, high / base_mean)
+
+    if interval[0] > threshold:
+        status = 'REGRESSED'
+    elif interval[1] < -threshold:
+        status = 'improved'
+    else:
+        status = '~'
+    return status, change, interval
+
+
+def compare_size(current, baseline, threshold):
+    if current is None or baseline is None or baseline == 0:
+        return '~', 0.0, None
+    change = (current - baseline) / baseline
+    if change > threshold:
+        return 'REGRESSED', change, None
+    if change < -threshold:
+        return 'improved', change, None
+    return '~', change, None
+
+
+def compare_results(current, baseline, thresholds):
+    """One row per benchmark and metric"""
+    rows = []
+    for name, result in current['benchmarks'].items():
+        base = baseline['benchmarks'].get(name)
+        if base is None:
+            rows.append({'benchmark': name, 'metric': '-', 'status': 'new'})
+            continue
+
+        for metric in ('time', 'peak_memory', 'size'):
+            if metric == 'size':
+                if result['size'] is None and base.get('size') is None:
+                    continue
+                status, change, interval = compare_size(result['size'], base.get('size'),
+                                                        thresholds['size'])
+                base_value, current_value = base.get('size'), result['size']
+            else:
+                if not result[metric] or not base.get(metric):
+                    continue
+                status, change, interval = compare_samples(result[metric], base[metric],
+                                                           thresholds[metric])
+                base_value = statistics.fmean(base[metric])
+                current_value = statistics.fmean(result[metric])
+
+            rows.append({
+                'benchmark': name,
+                'metric': metric,
+                'baseline': base_value,
+                'current': current_value,
+                'change': change,
+                'interval': interval,
+                'status': status,
+            })
+    return rows
+
+
+def _format_value(metric, value):
+    if value is None:
+        return '-'
+    scale, unit = METRIC_UNITS[metric]
+    return f"{value * scale:.1f} {unit}"
+
+
+def print_table(rows):
+    print(f"\n{'Benchmark':18s} {'Metric':12s} {'Baseline':>12s} {'Current':>12s} "
+          f"{'Change':>8s} {'95% CI':>18s}  Status")
+    for row in rows:
+        if row['status'] == 'new':
+            print(f"{row['benchmark']:18s} {'-':12s} {'-':>12s} {'-':>12s} {'-':>8s} {'-':>18s}  "
+                  f"new (not in baseline)")
+            continue
+        interval = row['interval']
+        ci = f"[{interval[0] * 100:+.1f}%, {interval[1] * 100:+.1f}%]" if interval else '-'
+        mark = '✗ ' if row['status'] == 'REGRESSED' else ('✓ ' if row['status'] == 'improved' else '')
+        print(f"{row['benchmark']:18s} {row['metric']:12s} "
+              f"{_format_value(row['metric'], row['baseline']):>12s} "
+              f"{_format_value(row['metric'], row['current']):>12s} "
+              f"{row['change'] * 100:+7.1f}% {ci:>18s}  {mark}{row['status']}")
+
+
+def main():
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print("Usage: python perf_gate.py [--baseline perf_baseline.json] [--only name,...]")
+        print("                           [--repeats N] [--memory-repeats N] [--threshold FRACTION]")
+        print("                           [--time-threshold F] [--memory-threshold F] [--size-threshold F]")
+        print("\nDefault thresholds: " + ', '.join(f"{metric} {value:.0%}"
+                                                    for metric, value in DEFAULT_THRESHOLDS.items()))
+        print("--threshold sets the time and memory thresholds together.")
+        print("\nExamples:")
+        print("  python perf_gate.py")
+        print("  python perf_gate.py --only fill_pdf,get_form_fields --repeats 10")
+        sys.exit(0)
+
+    baseline_path = take_option(args, '--baseline', default=DEFAULT_BASELINE)
+    only = take_option(args, '--only')
+    repeats = take_option(args, '--repeats', int, DEFAULT_REPEATS)
+    memory_repeats = take_option(args, '--memory-repeats', int, DEFAULT_MEMORY_REPEATS)
+    template = take_option(args, '--template', default=DEFAULT_TEMPLATE)
+    data_path = take_option(args, '--data', default=DEFAULT_DATA)
+
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    threshold = take_option(args, '--threshold', float)
+    if threshold is not None:
+        thresholds['time'] = thresholds['peak_memory'] = threshold
+    thresholds['time'] = take_option(args, '--time-threshold', float, thresholds['time'])
+    thresholds['peak_memory'] = take_option(args, '--memory-threshold', float, thresholds['peak_memory'])
+    thresholds['size'] = take_option(args, '--size-threshold', float, thresholds['size'])
+
+    if args:
+        print(f"Error: Unknown arguments - {' '.join(args)} (see --help)")
+        sys.exit(1)
+
+    if not Path(baseline_path).exists():
+        print(f"Error: Baseline not found - {baseline_path}")
+        print(f"Record one with: python benchmark.py --save {baseline_path}")
+        sys.exit(1)
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+
+    names = parse_names(only) if only else [name for name in BENCHMARKS]
+    print(f"Comparing against {baseline_path} (recorded {baseline.get('created', '?')} "
+          f"on {baseline.get('platform', '?')})")
+    print(f"Running benchmarks ({repeats} repeats)...")
+    current = run_suite(names, template, data_path, repeats, memory_repeats)
+
+    rows = compare_results(current, baseline, thresholds)
+    print_table(rows)
+
+    regressed = [row for row in rows if row['status'] == 'REGRESSED']
+    if regressed:
+        print(f"\n✗ {len(regressed)} regression(s): "
+              + ', '.join(f"{row['benchmark']} {row['metric']}" for row in regressed))
+        sys.exit(1)
+    print("\n✓ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ Useful for removing watermarks like "VOID"
 
 import sys
 from pathlib import Path
-import pikepdf
+from pdf_template import open_pdf, close_pdf
 
 
 def remove_default_values(input_pdf, output_pdf, fields_to_clear=None):
@@ -19,12 +19,14 @@ def remove_default_values(input_pdf, output_pdf, fields_to_clear=None):
         fields_to_clear: List of field names to clear, or None for all fields
     """
 
+    import pikepdf
+
     print(f"Opening: {input_pdf}")
-    pdf = pikepdf.open(input_pdf)
+    pdf = open_pdf(input_pdf, writable=True)
 
     if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
         print("✗ No form fields found")
-        pdf.close()
+        close_pdf(pdf)
         return False
 
     fields = pdf.Root.AcroForm.Fields
@@ -73,7 +75,7 @@ def remove_default_values(input_pdf, output_pdf, fields_to_clear=None):
     print(f"Saving to: {output_pdf}")
 
     pdf.save(output_pdf)
-    pdf.close()
+    close_pdf(pdf)
 
     print("✓ Done!")
     return True
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Run PDF operations on untrusted files in isolated worker processes
+
+A malformed or hostile PDF can make pikepdf loop or allocate without bound.
+Run in the web process, that stalls a server thread and can take the whole
+process - every other request with it - down. A Sandbox keeps a few worker
+processes and runs each operation in one of them:
+- every worker's address space is capped with RLIMIT_AS, so a runaway
+  allocation fails with MemoryError (or kills only that worker)
+- each operation gets a wall-clock timeout; a worker that has not answered
+  by then is killed
+- a worker that timed out, crashed or ran out of memory is discarded, and a
+  fresh one is started the next time a worker is needed
+
+Failures are counted, printed to stderr (the server's error log) and kept
+in stats() - which file, which operation, why.
+
+Workers are separate interpreters (python sandbox.py --worker) that import
+pdf_operations and pikepdf but not the web app, so a replacement is ready
+in a fraction of a second. Operations and their arguments are pickled:
+operations must be module-level functions, e.g. those in pdf_operations.py.
+
+Configured from PDFFILL_SANDBOX_TIMEOUT (seconds, default 30),
+PDFFILL_SANDBOX_MEMORY (MB, default 1024) and PDFFILL_SANDBOX=0, which runs
+operations in-process instead (for debugging; always so on Windows).
+
+    python sandbox.py suspicious.pdf    # List a file's fields within the limits
+"""
+
+import os
+import sys
+import time
+import socket
+import threading
+import subprocess
+from collections import deque
+from multiprocessing.connection import Connection
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MEMORY_MB = 1024
+
+# Failures kept for stats()
+RECENT_FAILURES = 50
+
+
+class SandboxError(Exception):
+    """An operation did not finish in its worker; reason is 'timeout', 'memory' or 'crashed'"""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+
+
+def _worker_main(fd, memory_limit):
+    """Worker loop: receive (operation, args), send back ('ok', result) or ('raise', exception)"""
+    if memory_limit and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    import pdf_operations  # noqa: F401 - loaded before the first job arrives
+
+    conn = Connection(fd)
+    while True:
+        try:
+            operation, args = conn.recv()
+        except (EOFError, OSError):
+            return
+
+        try:
+            reply = ('ok', operation(*args))
+        except BaseException as e:
+            reply = ('raise', e)
+
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Unpicklable result or exception
+            conn.send(('raise', RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    def __init__(self, memory_limit):
+        parent_sock, child_sock = socket.socketpair()
+        with child_sock:
+            self.process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--worker',
+                 str(child_sock.fileno()), str(memory_limit or 0)],
+                pass_fds=[child_sock.fileno()], stdin=subprocess.DEVNULL)
+        self.conn = Connection(parent_sock.detach())
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+        self.conn.close()
+
+
+class Sandbox:
+    """A pool of worker processes with per-operation time and memory limits"""
+
+    def __init__(self, workers, timeout=DEFAULT_TIMEOUT, memory_mb=DEFAULT_MEMORY_MB, enabled=True):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_limit = memory_mb * 1024 * 1024 if memory_mb else None
+        self.enabled = enabled
+
+        # Workers are started on first use, so a Sandbox can be created
+        # before a pre-fork and each server worker gets its own
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Lock()
+        self._idle = []
+        self.started = 0
+        self.failures = {'timeout': 0, 'memory': 0, 'crashed': 0}
+        self.recent_failures = deque(maxlen=RECENT_FAILURES)
+
+    @classmethod
+    def from_env(cls, workers):
+        """Sandbox configured from PDFFILL_SANDBOX* variables"""
+        return cls(workers,
+                   float(os.environ.get('PDFFILL_SANDBOX_TIMEOUT', DEFAULT_TIMEOUT)),
+                   int(os.environ.get('PDFFILL_SANDBOX_MEMORY', DEFAULT_MEMORY_MB)),
+                   os.name == 'posix' and os.environ.get('PDFFILL_SANDBOX', '1') != '0')
+
+    def _checkout(self):
+        self._slots.acquire()
+        try:
+            with self._lock:
+                if self._idle:
+                    return self._idle.pop()
+                self.started += 1
+            return _Worker(self.memory_limit)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _checkin(self, worker):
+        if worker is not None:
+            with self._lock:
+                self._idle.append(worker)
+        self._slots.release()
+
+    def _record(self, reason, operation, args, detail):
+        with self._lock:
+            self.failures[reason] += 1
+            self.recent_failures.append({
+                'time': time.time(),
+                'reason': reason,
+                'operation': operation.__name__,
+                'file': str(args[0]) if args else None,
+                'detail': detail,
+            })
+        print(f"⚠️  Sandbox: {operation.__name__}({args[0] if args else ''}) {detail}",
+              file=sys.stderr, flush=True)
+
+    def run(self, operation, *args):
+        """
+        Run operation(*args) in a worker and return its result
+
+        Exceptions raised by the operation are re-raised here. Raises
+        SandboxError when the worker timed out, ran out of memory or died;
+        that worker is replaced.
+        """
+        if not self.enabled:
+            return operation(*args)
+
+        worker = self._checkout()
+        try:
+            try:
+                worker.conn.send((operation, args))
+                if not worker.conn.poll(self.timeout):
+                    worker.kill()
+                    worker = None
+                    self._record('timeout', operation, args, f"killed after {self.timeout:g}s")
+                    raise SandboxError('timeout', f"Processing this PDF took longer than "
+                                                  f"{self.timeout:g}s and was stopped")
+                status, value = worker.conn.recv()
+            except (EOFError, OSError):
+                try:
+                    exitcode = worker.process.wait(1)
+                except subprocess.TimeoutExpired:
+                    exitcode = None
+                worker.kill()
+                worker = None
+                self._record('crashed', operation, args, f"worker died (exit code {exitcode})")
+                raise SandboxError('crashed', "Processing this PDF crashed its worker process")
+
+            if status == 'ok':
+                return value
+            if isinstance(value, MemoryError):
+                # The worker's heap is suspect after a failed allocation
+                worker.kill()
+                worker = None
+                self._record('memory', operation, args,
+                             f"exceeded {self.memory_limit // (1024 * 1024)} MB")
+                raise SandboxError('memory', "Processing this PDF needed more memory than allowed")
+            raise value
+        finally:
+            self._checkin(worker)
+
+    def close(self):
+        """Stop the idle workers"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.kill()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'workers': self.workers,
+                'idle': len(self._idle),
+                'started': self.started,
+                'timeout': self.timeout,
+                'memory_limit': self.memory_limit,
+                'failures': dict(self.failures),
+                'recent_failures': list(self.recent_failures),
+            }
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ['--worker']:
+        _worker_main(int(args[1]), int(args[2]))
+        return
+
+    if len(args) != 1 or args[0] in ('--help', '-h'):
+        print("Usage: python sandbox.py <pdf_file>")
+        print("\nLists the file's fields in a sandbox worker, with the web app's limits")
+        print(f"(PDFFILL_SANDBOX_TIMEOUT={DEFAULT_TIMEOUT:g}s, PDFFILL_SANDBOX_MEMORY={DEFAULT_MEMORY_MB} MB by default).")
+        sys.exit(0 if args else 1)
+
+    from pdf_operations import get_form_fields
+
+    sandbox = Sandbox.from_env(workers=1)
+    try:
+        fields = sandbox.run(get_form_fields, args[0])
+    except SandboxError as e:
+        print(f"✗ {e.message}")
+        sys.exit(1)
+    finally:
+        sandbox.close()
+
+    if fields is None:
+        print("✗ No form fields found")
+        sys.exit(1)
+    print(f"✓ {len(fields)} fields, within {sandbox.timeout:g}s and "
+          f"{(sandbox.memory_limit or 0) // (1024 * 1024)} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Rule-driven template sanitizer
+
+Applies a declarative rule file to a PDF in a single open / save, replacing
+the one-off passes of remove_void.py, remove_defaults.py and
+create_clean_template.py. A whole directory of templates can be processed
+in parallel.
+
+Rule file (JSON):
+    {
+      "rules": [
+        {"action": "hide_field", "fields": ["btnVoid"]},
+        {"action": "clear_value", "fields": ["H_Proposition"]},
+        {"action": "unset_readonly", "fields": ["H_Proposition"]},
+        {"action": "drop_images", "width_over": 500, "height_over": 500, "match": "any"}
+      ],
+      "need_appearances": true,
+      "optimize": true
+    }
+
+With "optimize" set, duplicate streams and font dictionaries are merged and
+unreferenced objects dropped after the rules run (see optimize_template.py).
+
+Field names are top-level field names and may use shell wildcards
+("A0*", "*"). See clean_template_rules.json for the rules that produce
+CLEAN_TEMPLATE.pdf.
+"""
+
+import sys
+import os
+import json
+import fnmatch
+from pathlib import Path
+from pdf_template import open_pdf, close_pdf
+from fill_pdf import field_widgets
+
+FIELD_ACTIONS = ('hide_field', 'clear_value', 'unset_readonly')
+PAGE_ACTIONS = ('drop_images',)
+
+# Annotation flag bit 2 (/F) - the widget is not displayed or printed
+ANNOT_HIDDEN = 2
+# Field flag bit 1 (/Ff) - the user may not change the value
+FIELD_READONLY = 1
+
+
+def load_rules(rules_path):
+    """Load and validate a rule file; raises ValueError on bad rules"""
+    with open(rules_path, 'r') as f:
+        config = json.load(f)
+
+    rules = config.get('rules')
+    if not isinstance(rules, list):
+        raise ValueError("Rule file must contain a \"rules\" list")
+
+    for i, rule in enumerate(rules, 1):
+        action = rule.get('action')
+        if action in FIELD_ACTIONS:
+            if not isinstance(rule.get('fields'), list):
+                raise ValueError(f"Rule {i} ({action}) needs a \"fields\" list")
+        elif action in PAGE_ACTIONS:
+            if 'width_over' not in rule and 'height_over' not in rule:
+                raise ValueError(f"Rule {i} ({action}) needs width_over and/or height_over")
+            if rule.get('match', 'any') not in ('any', 'all'):
+                raise ValueError(f"Rule {i} ({action}): match must be \"any\" or \"all\"")
+        else:
+            raise ValueError(f"Rule {i}: unknown action {action!r}")
+
+    return config
+
+
+def _hide_field(field):
+    for widget in field_widgets(field):
+        widget['/F'] = int(widget.get('/F', 0)) | ANNOT_HIDDEN
+        if '/MK' in widget and '/CA' in widget['/MK']:
+            widget['/MK']['/CA'] = ''
+        if '/AP' in widget:
+            del widget['/AP']
+    if '/AP' in field:
+        del field['/AP']
+
+
+def _clear_value(field):
+    for key in ('/V', '/DV', '/AP'):
+        if key in field:
+            del field[key]
+    if '/Kids' in field:
+        for kid in field['/Kids']:
+            for key in ('/V', '/AP'):
+                if key in kid:
+                    del kid[key]
+
+
+def _unset_readonly(field):
+    if '/Ff' in field:
+        field['/Ff'] = int(field['/Ff']) & ~FIELD_READONLY
+
+
+_FIELD_HANDLERS = {
+    'hide_field': _hide_field,
+    'clear_value': _clear_value,
+    'unset_readonly': _unset_readonly,
+}
+
+
+def _image_matches(xobj, rule):
+    width = int(xobj.get('/Width', 0))
+    height = int(xobj.get('/Height', 0))
+
+    checks = []
+    if 'width_over' in rule:
+        checks.append(width > rule['width_over'])
+    if 'height_over' in rule:
+        checks.append(height > rule['height_over'])
+    return all(checks) if rule.get('match', 'any') == 'all' else any(checks)
+
+
+def sanitize_pdf(pdf, config):
+    """
+    Apply all rules to an open pikepdf.Pdf in place
+
+    Returns a report dict with per-action counts and the field patterns that
+    matched nothing.
+    """
+    from pikepdf import Name
+
+    rules = config['rules']
+    report = {action: 0 for action in FIELD_ACTIONS + PAGE_ACTIONS}
+    report['unmatched'] = []
+
+    field_rules = [r for r in rules if r['action'] in FIELD_ACTIONS]
+    if field_rules and '/AcroForm' in pdf.Root and '/Fields' in pdf.Root.AcroForm:
+        fields = {}
+        for field in pdf.Root.AcroForm.Fields:
+            if '/T' in field:
+                fields.setdefault(str(field['/T']), field)
+
+        for rule in field_rules:
+            handler = _FIELD_HANDLERS[rule['action']]
+            for pattern in rule['fields']:
+                matched = fnmatch.filter(fields, pattern) if any(c in pattern for c in '*?[') else \
+                    [pattern] if pattern in fields else []
+                if not matched:
+                    report['unmatched'].append(pattern)
+                for name in matched:
+                    handler(fields[name])
+                    report[rule['action']] += 1
+    elif field_rules:
+        for rule in field_rules:
+            report['unmatched'].extend(rule['fields'])
+
+    image_rules = [r for r in rules if r['action'] == 'drop_images']
+    if image_rules:
+        for page in pdf.pages:
+            if '/Resources' not in page or '/XObject' not in page.Resources:
+                continue
+            xobjects = page.Resources.XObject
+            for xobj_name in list(xobjects.keys()):
+                xobj = xobjects[xobj_name]
+                if xobj.get('/Subtype') != Name('/Image'):
+                    continue
+                if any(_image_matches(xobj, rule) for rule in image_rules):
+                    del xobjects[xobj_name]
+                    report['drop_images'] += 1
+
+    if config.get('need_appearances', True) and '/AcroForm' in pdf.Root:
+        pdf.Root.AcroForm['/NeedAppearances'] = True
+
+    return report
+
+
+def sanitize_file(input_pdf, output_pdf, config):
+    """Sanitize one file: one open, one pass over the rules, one save"""
+    pdf = open_pdf(str(input_pdf), writable=True)
+    try:
+        report = sanitize_pdf(pdf, config)
+        if config.get('optimize'):
+            from optimize_template import optimize_pdf, save_optimized
+            report['optimize'] = optimize_pdf(pdf)
+            save_optimized(pdf, str(output_pdf))
+        else:
+            pdf.save(str(output_pdf))
+    finally:
+        close_pdf(pdf)
+
+    report['input'] = str(input_pdf)
+    report['output'] = str(output_pdf)
+    report['bytes_saved'] = os.path.getsize(input_pdf) - os.path.getsize(output_pdf)
+    return report
+
+
+def _sanitize_job(args):
+    input_pdf, output_pdf, config = args
+    try:
+        return sanitize_file(input_pdf, output_pdf, config)
+    except Exception as e:
+        return {'input': str(input_pdf), 'output': str(output_pdf), 'error': str(e)}
+
+
+def sanitize_directory(input_dir, output_dir, config, workers=None):
+    """Sanitize every PDF in input_dir into output_dir using a process pool"""
+    from concurrent.futures import ProcessPoolExecutor
+    import pdf_template
+
+    input_dir, output_dir = Path(input_dir), Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = [(path, output_dir / path.name, config)
+            for path in sorted(input_dir.iterdir())
+            if path.is_file() and path.suffix.lower() == '.pdf']
+    if not jobs:
+        return []
+
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers == 1:
+        return [_sanitize_job(job) for job in jobs]
+
+    # Workers open files from disk - never from a resident daemon cache
+    with ProcessPoolExecutor(max_workers=workers, initializer=pdf_template.install_cache,
+                             initargs=(None,)) as pool:
+        return list(pool.map(_sanitize_job, jobs))
+
+
+def print_report(report):
+    if 'error' in report:
+        print(f"✗ {report['input']}: {report['error']}")
+        return
+
+    changes = [f"{report[action]} {action.replace('_', ' ')}" for action in FIELD_ACTIONS + PAGE_ACTIONS
+               if report[action]]
+    print(f"✓ {report['input']} → {report['output']}")
+    print(f"    {', '.join(changes) if changes else 'no changes'}")
+    if 'optimize' in report:
+        print(f"    {report['optimize']['objects_merged']} duplicate objects merged")
+    print(f"    {report['bytes_saved'] / 1024:.1f} KB saved")
+    if report['unmatched']:
+        print(f"    ⚠️  Not found: {', '.join(report['unmatched'])}")
+
+
+def main():
+    args = sys.argv[1:]
+    workers = None
+    if '--workers' in args:
+        i = args.index('--workers')
+        try:
+            workers = int(args[i + 1])
+        except (IndexError, ValueError):
+            print("Error: --workers needs a number")
+            sys.exit(1)
+        del args[i:i + 2]
+
+    if len(args) < 3:
+        print("Usage: python sanitize.py <rules.json> <input.pdf|input_dir> <output.pdf|output_dir> [--workers N]")
+        print("\nExamples:")
+        print('  python sanitize.py clean_template_rules.json original.pdf clean.pdf')
+        print('  python sanitize.py clean_template_rules.json originals/ cleaned/ --workers 8')
+        sys.exit(1)
+
+    rules_path, input_path, output_path = args[:3]
+
+    if not Path(rules_path).exists():
+        print(f"Error: Rule file not found - {rules_path}")
+        sys.exit(1)
+    if not Path(input_path).exists():
+        print(f"Error: Input not found - {input_path}")
+        sys.exit(1)
+
+    try:
+        config = load_rules(rules_path)
+    except (ValueError, json.JSONDecodeError) as e:
+        print(f"Error: Invalid rule file - {e}")
+        sys.exit(1)
+
+    if Path(input_path).is_dir():
+        reports = sanitize_directory(input_path, output_path, config, workers)
+        for report in reports:
+            print_report(report)
+        failed = sum(1 for r in reports if 'error' in r)
+        print(f"\n{'='*60}")
+        print(f"Sanitized {len(reports) - failed}/{len(reports)} templates")
+        if failed:
+            sys.exit(1)
+    else:
+        print_report(sanitize_file(input_path, output_path, config))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Start the web UI
+
+By default this runs the production server: gunicorn with gunicorn.conf.py,
+i.e. N pre-forked worker processes that share the registered templates
+loaded before the fork and are recycled after --max-requests requests.
+--asgi serves the ASGI variant (asgi_app.py) from the same kind of workers,
+each running an event loop (uvicorn) instead of threads. --debug runs
+Flask's single-process debug server instead, exactly like `python app.py`.
+
+Gunicorn runs on Linux and macOS only (pip install gunicorn, plus
+uvicorn-worker for --asgi).
+"""
+
+import sys
+import os
+import importlib.util
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(APP_DIR, 'gunicorn.conf.py')
+ASGI_WORKER = 'uvicorn_worker.UvicornWorker'
+
+
+def take_option(args, name, convert=str, default=None):
+    """Remove `name value` from args and return the converted value"""
+    if name not in args:
+        return default
+    i = args.index(name)
+    try:
+        value = convert(args[i + 1])
+    except (IndexError, ValueError):
+        print(f"Error: {name} needs a {'number' if convert is not str else 'value'}")
+        sys.exit(1)
+    del args[i:i + 2]
+    return value
+
+
+def gunicorn_command(bind=None, workers=None, threads=None, max_requests=None, asgi=False):
+    """Command line running the app under gunicorn; None keeps the config file's value"""
+    command = [sys.executable, '-m', 'gunicorn', '--config', CONFIG_FILE, '--chdir', APP_DIR]
+    if asgi:
+        command += ['--worker-class', ASGI_WORKER]
+    if bind is not None:
+        command += ['--bind', bind]
+    if workers is not None:
+        command += ['--workers', str(workers)]
+    if threads is not None:
+        command += ['--threads', str(threads)]
+    if max_requests is not None:
+        command += ['--max-requests', str(max_requests),
+                    '--max-requests-jitter', str(max_requests // 10)]
+    return command + ['asgi_app:app' if asgi else 'app:app']
+
+
+def main():
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print("Usage: python serve.py [--asgi] [--workers N] [--threads N] [--bind HOST:PORT] [--max-requests N]")
+        print("       python serve.py --debug [--port PORT]")
+        print("\nDefaults come from gunicorn.conf.py: one worker per CPU, 12 threads each,")
+        print("127.0.0.1:5000, workers recycled after ~1000 requests.")
+        print("\nExamples:")
+        print("  python serve.py --workers 4")
+        print("  python serve.py --bind 0.0.0.0:8000 --max-requests 500")
+        print("  python serve.py --asgi --workers 2    # asgi_app.py, async uploads/downloads")
+        print("  python serve.py --debug              # Flask debug server with reloader")
+        sys.exit(0)
+
+    if '--debug' in args:
+        args.remove('--debug')
+        port = take_option(args, '--port', int, 5000)
+        if args:
+            print(f"Error: Unknown arguments - {' '.join(args)} (see --help)")
+            sys.exit(1)
+        from app import app
+        app.run(debug=True, port=port)
+        return
+
+    asgi = '--asgi' in args
+    if asgi:
+        args.remove('--asgi')
+    workers = take_option(args, '--workers', int)
+    threads = take_option(args, '--threads', int)
+    bind = take_option(args, '--bind')
+    max_requests = take_option(args, '--max-requests', int)
+    if args:
+        print(f"Error: Unknown arguments - {' '.join(args)} (see --help)")
+        sys.exit(1)
+
+    if importlib.util.find_spec('gunicorn') is None:
+        print("Error: gunicorn is not installed - pip install gunicorn")
+        print("       (or run the single-process debug server: python serve.py --debug)")
+        sys.exit(1)
+    if asgi and importlib.util.find_spec(ASGI_WORKER.split('.')[0]) is None:
+        print("Error: uvicorn-worker is not installed - pip install quart uvicorn-worker")
+        print("       (or run one ASGI process: python asgi_app.py)")
+        sys.exit(1)
+
+    command = gunicorn_command(bind, workers, threads, max_requests, asgi)
+    sys.stdout.flush()
+    # Replace this process, so its pid is the gunicorn master's
+    os.execv(command[0], command)
+
+
+if __name__ == "__main__":
+    main()
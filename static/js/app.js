@@ -1,12 +1,266 @@
 // Global state
 let currentFileId = null;
+let currentContentHash = null;
 let currentFields = [];
+let currentFieldIndex = null;
 let fillFields = [];
 let currentTemplateData = null;
 
+// Browser-side field cache, keyed by the PDF's content hash
+const FIELD_CACHE_DB = 'pdf-form-filler';
+const FIELD_CACHE_STORE = 'fields';
+const FIELD_CACHE_VERSION = 1;
+
+// Larger files are uploaded in chunks, which resume after a failure
+const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+const CHUNK_RETRIES = 3;
+
+// Larger files are not hashed for the pre-upload check: Web Crypto needs
+// the whole file in memory
+const MAX_HASHED_FILE_SIZE = 64 * 1024 * 1024;
+
+// Virtualized views (created on first use)
+let fieldListView = null;
+let searchResultsView = null;
+let templateView = null;
+
+// Row heights in px - must match .virtual-list rows in style.css
+const FIELD_ROW_HEIGHT = 104;
+const SECTION_ROW_HEIGHT = 40;
+const TEMPLATE_LINE_HEIGHT = 20;
+
+// Extra rows rendered above and below the visible window
+const OVERSCAN_ROWS = 8;
+
+// Windowed list: only the rows inside the visible area (plus OVERSCAN_ROWS)
+// exist in the DOM, so rendering cost stays flat however many rows there are
+class VirtualList {
+    constructor(container, renderRow, rowHeight) {
+        this.container = container;
+        this.renderRow = renderRow;
+        this.rowHeight = rowHeight;
+        this.rows = [];
+        this.offsets = [0];
+        this.frame = null;
+
+        this.spacer = document.createElement('div');
+        this.spacer.className = 'virtual-spacer';
+        this.container.classList.add('virtual-list');
+        this.container.addEventListener('scroll', () => this.scheduleRender());
+    }
+
+    setRows(rows, keepScroll = false) {
+        // Status messages may have replaced the spacer
+        if (this.spacer.parentNode !== this.container) {
+            this.container.replaceChildren(this.spacer);
+        }
+
+        this.rows = rows;
+        this.offsets = new Array(rows.length + 1);
+        this.offsets[0] = 0;
+        for (let i = 0; i < rows.length; i++) {
+            this.offsets[i + 1] = this.offsets[i] + this.rowHeight(rows[i]);
+        }
+        this.spacer.style.height = `${this.offsets[rows.length]}px`;
+
+        if (!keepScroll) this.container.scrollTop = 0;
+        this.render();
+    }
+
+    scheduleRender() {
+        if (this.frame !== null) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+        });
+    }
+
+    // Index of the row containing vertical position y
+    rowAt(y) {
+        let low = 0;
+        let high = this.rows.length - 1;
+        while (low < high) {
+            const mid = (low + high + 1) >> 1;
+            if (this.offsets[mid] <= y) low = mid;
+            else high = mid - 1;
+        }
+        return Math.max(low, 0);
+    }
+
+    render() {
+        const top = this.container.scrollTop;
+        // Hidden tabs report no height - render one screenful anyway
+        const height = this.container.clientHeight || window.innerHeight;
+
+        const first = Math.max(0, this.rowAt(top) - OVERSCAN_ROWS);
+        const last = Math.min(this.rows.length, this.rowAt(top + height) + OVERSCAN_ROWS + 1);
+
+        const fragment = document.createDocumentFragment();
+        for (let i = first; i < last; i++) {
+            const element = this.renderRow(this.rows[i]);
+            element.classList.add('virtual-row');
+            element.style.top = `${this.offsets[i]}px`;
+            element.style.height = `${this.offsets[i + 1] - this.offsets[i]}px`;
+            fragment.appendChild(element);
+        }
+        this.spacer.replaceChildren(fragment);
+    }
+}
+
+// Sections are named after the first letter of the field name (A04t -> A)
+function sectionOf(name) {
+    return name ? name.charAt(0).toUpperCase() : '?';
+}
+
+// Flatten items into section header rows followed by their item rows,
+// leaving out the items of collapsed sections
+function groupRows(items, nameOf, collapsed) {
+    const sections = new Map();
+    items.forEach(item => {
+        const section = sectionOf(nameOf(item));
+        if (!sections.has(section)) sections.set(section, []);
+        sections.get(section).push(item);
+    });
+
+    const rows = [];
+    sections.forEach((sectionItems, section) => {
+        rows.push({ section, count: sectionItems.length, collapsed: collapsed.has(section) });
+        if (!collapsed.has(section)) {
+            sectionItems.forEach(item => rows.push({ item }));
+        }
+    });
+    return rows;
+}
+
+// A grouped, collapsible, virtualized view over a list of items.
+// Optional before / after items are shown ungrouped around the sections.
+function createSectionedView(container, renderItem, itemHeight, nameOf, renderHeader) {
+    const collapsed = new Set();
+    let items = [];
+    let before = [];
+    let after = [];
+    let view = null;
+
+    const refresh = (keepScroll) => view.setRows([
+        ...before.map(item => ({ item })),
+        ...groupRows(items, nameOf, collapsed),
+        ...after.map(item => ({ item }))
+    ], keepScroll);
+
+    const renderRow = (row) => {
+        if (row.item !== undefined) return renderItem(row.item);
+
+        const header = renderHeader(row);
+        header.addEventListener('click', () => {
+            if (collapsed.has(row.section)) collapsed.delete(row.section);
+            else collapsed.add(row.section);
+            refresh(true);
+        });
+        return header;
+    };
+
+    view = new VirtualList(container, renderRow,
+        row => row.item !== undefined ? itemHeight : SECTION_ROW_HEIGHT);
+
+    return {
+        show(newItems, newBefore = [], newAfter = []) {
+            items = newItems;
+            before = newBefore;
+            after = newAfter;
+            refresh(false);
+        }
+    };
+}
+
+function createSectionHeader(row) {
+    const header = document.createElement('div');
+    header.className = 'section-header';
+    header.textContent = `${row.collapsed ? '▸' : '▾'} Section ${row.section} (${row.count} fields)`;
+    return header;
+}
+
+function createFieldItem(field) {
+    const item = document.createElement('div');
+    item.className = 'field-item';
+
+    const info = document.createElement('div');
+    info.className = 'field-info';
+
+    const name = document.createElement('h4');
+    name.textContent = field.name;
+    info.appendChild(name);
+
+    if (field.tooltip) {
+        const tooltip = document.createElement('p');
+        tooltip.textContent = field.tooltip;
+        tooltip.title = field.tooltip;
+        info.appendChild(tooltip);
+    }
+
+    const type = document.createElement('span');
+    type.className = `field-type ${field.type}`;
+    type.textContent = field.type;
+    info.appendChild(type);
+
+    const addBtn = document.createElement('button');
+    addBtn.className = 'btn btn-secondary';
+    addBtn.textContent = '+ Add';
+    addBtn.addEventListener('click', () => addToFillForm(field.name, field.type));
+
+    item.appendChild(info);
+    item.appendChild(addBtn);
+    return item;
+}
+
+// One line of the template JSON, with the field description as a comment
+function templateLine(field, isLast) {
+    const description = field.description ? ` // ${field.description}` : '';
+    return `  "${field.name}": ${JSON.stringify(field.value)}${isLast ? '' : ','}${description}`;
+}
+
+// Template JSON with descriptions as inline comments
+function buildTemplateJSON(fields) {
+    const lines = fields.map((field, index) => templateLine(field, index === fields.length - 1));
+    return ['{', ...lines, '}'].join('\n');
+}
+
+function createTemplateLine(line) {
+    const element = document.createElement('div');
+    element.className = 'template-line';
+    element.textContent = line.text;
+    return element;
+}
+
+function createTemplateSectionHeader(row) {
+    const header = createTemplateLine({
+        text: `  // ${row.collapsed ? '▸' : '▾'} Section ${row.section} (${row.count} fields)`
+    });
+    header.classList.add('template-section');
+    return header;
+}
+
+function displayTemplate(fields) {
+    if (!templateView) {
+        templateView = createSectionedView(document.getElementById('template-output'),
+            createTemplateLine, TEMPLATE_LINE_HEIGHT, line => line.name, createTemplateSectionHeader);
+    }
+
+    const lines = fields.map((field, index) => ({
+        name: field.name,
+        text: templateLine(field, index === fields.length - 1)
+    }));
+    templateView.show(lines, [{ text: '{' }], [{ text: '}' }]);
+}
+
+function createFieldView(container) {
+    return createSectionedView(container, createFieldItem, FIELD_ROW_HEIGHT,
+        field => field.name, createSectionHeader);
+}
+
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     setupEventListeners();
+    loadRegisteredTemplates();
 });
 
 function setupEventListeners() {
@@ -72,28 +326,237 @@ function setupEventListeners() {
     document.getElementById('start-over-btn').addEventListener('click', startOver);
 }
 
-async function handleFileUpload(file) {
-    if (!file.name.endsWith('.pdf')) {
-        showStatus('error', 'Please upload a PDF file');
-        return;
+// IndexedDB is optional - every cache helper resolves to null / does nothing
+// when it is unavailable (private browsing, old browsers)
+let fieldCacheDb = null;
+
+function openFieldCache() {
+    if (fieldCacheDb) return fieldCacheDb;
+
+    fieldCacheDb = new Promise(resolve => {
+        if (!window.indexedDB) return resolve(null);
+
+        const request = indexedDB.open(FIELD_CACHE_DB, FIELD_CACHE_VERSION);
+        request.onupgradeneeded = () => {
+            request.result.createObjectStore(FIELD_CACHE_STORE, { keyPath: 'hash' });
+        };
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => resolve(null);
+        request.onblocked = () => resolve(null);
+    });
+    return fieldCacheDb;
+}
+
+async function getCachedFields(hash) {
+    const db = await openFieldCache();
+    if (!db || !hash) return null;
+
+    return new Promise(resolve => {
+        const request = db.transaction(FIELD_CACHE_STORE).objectStore(FIELD_CACHE_STORE).get(hash);
+        request.onsuccess = () => resolve(request.result ? request.result.fields : null);
+        request.onerror = () => resolve(null);
+    });
+}
+
+async function putCachedFields(hash, fields) {
+    const db = await openFieldCache();
+    if (!db || !hash) return;
+
+    try {
+        db.transaction(FIELD_CACHE_STORE, 'readwrite')
+            .objectStore(FIELD_CACHE_STORE)
+            .put({ hash, fields, stored: Date.now() });
+    } catch (error) {
+        // Quota exceeded etc. - the server stays the source of truth
     }
+}
+
+// Built once per field list: lowercased search text per field and the
+// fields of each section, so search and filtering never rescan raw fields
+function buildFieldIndex(fields) {
+    const entries = fields.map(field => ({
+        field,
+        name: field.name.toLowerCase(),
+        tooltip: (field.tooltip || '').toLowerCase()
+    }));
+
+    // Keyed by first character, matching the server's startsWith(section)
+    const sections = new Map();
+    entries.forEach(entry => {
+        const section = entry.field.name.charAt(0);
+        if (!sections.has(section)) sections.set(section, []);
+        sections.get(section).push(entry);
+    });
 
-    const formData = new FormData();
-    formData.append('file', file);
+    return { entries, sections };
+}
 
-    showStatus('info', 'Uploading PDF...');
+// Same matching as the server's /api/search: name or tooltip contains the text
+function queryFields(index, text = '', section = '') {
+    if (!index) return [];
+
+    let entries = section ? (index.sections.get(section.toUpperCase()) || []) : index.entries;
+
+    const term = text.toLowerCase();
+    if (term) {
+        entries = entries.filter(entry => entry.name.includes(term) || entry.tooltip.includes(term));
+    }
+    return entries.map(entry => entry.field);
+}
+
+// Same output as the server's /api/template
+function buildTemplate(fields) {
+    return fields.map(field => ({
+        name: field.name,
+        value: field.type !== 'checkbox' ? '' : 'Off',
+        type: field.type,
+        description: field.tooltip
+    }));
+}
+
+// SHA-256 as lowercase hex, or null where Web Crypto is unavailable
+// (it needs a secure context: HTTPS or localhost)
+async function sha256Hex(buffer) {
+    if (!window.crypto || !window.crypto.subtle) return null;
 
     try {
-        const response = await fetch('/api/upload', {
+        const digest = await window.crypto.subtle.digest('SHA-256', buffer);
+        return Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+    } catch (error) {
+        return null;
+    }
+}
+
+async function hashFile(file) {
+    if (file.size > MAX_HASHED_FILE_SIZE) return null;
+    return sha256Hex(await file.arrayBuffer());
+}
+
+// Ask whether the server already has these bytes; resolves to an upload
+// response when it does, null when the file has to be sent
+async function checkUpload(file, hash) {
+    if (!hash) return null;
+
+    try {
+        const response = await fetch('/api/upload/check', {
             method: 'POST',
-            body: formData
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ content_hash: hash, filename: file.name })
         });
-
         const data = await response.json();
+        return data.success && data.exists ? data : null;
+    } catch (error) {
+        // The handshake is an optimization - fall back to uploading
+        return null;
+    }
+}
+
+// localStorage key under which an unfinished chunked upload of file is kept
+function chunkedUploadKey(file) {
+    return `upload:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+// Resume the unfinished upload of this file, or start a new one
+async function startChunkedUpload(file, hash) {
+    const key = chunkedUploadKey(file);
+    const uploadId = localStorage.getItem(key);
+    if (uploadId) {
+        const response = await fetch(`/api/upload/chunked/${uploadId}`);
+        if (response.ok) return response.json();
+        localStorage.removeItem(key);
+    }
+
+    const response = await fetch('/api/upload/chunked', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size, content_hash: hash || undefined })
+    });
+    const data = await response.json();
+    if (data.success) localStorage.setItem(key, data.upload_id);
+    return data;
+}
+
+// Send one chunk, retrying with backoff; resolves to the server's received count
+async function sendChunk(uploadId, offset, chunk) {
+    const body = await chunk.arrayBuffer();
+    const headers = { 'Content-Type': 'application/octet-stream' };
+    const checksum = await sha256Hex(body);
+    if (checksum) headers['X-Chunk-SHA256'] = checksum;
+
+    for (let attempt = 0; ; attempt++) {
+        let error;
+        try {
+            const response = await fetch(`/api/upload/chunked/${uploadId}?offset=${offset}`, {
+                method: 'PUT',
+                headers,
+                body
+            });
+            const data = await response.json();
+            // 409: the server has a different count (e.g. an earlier attempt
+            // did arrive) - carry on from there
+            if (response.ok || response.status === 409) return data.received;
+            error = new Error(data.error);
+            // Expired or aborted - retrying cannot help
+            if (response.status === 404) attempt = CHUNK_RETRIES;
+        } catch (e) {
+            // Network error or a proxy's non-JSON error page
+            error = e;
+        }
+
+        if (attempt >= CHUNK_RETRIES) throw error;
+        await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** attempt));
+    }
+}
+
+async function uploadInChunks(file, hash) {
+    const upload = await startChunkedUpload(file, hash);
+    if (!upload.success) return upload;
+
+    let offset = upload.received;
+    while (offset < file.size) {
+        showStatus('info', `Uploading PDF... ${Math.floor(offset * 100 / file.size)}%`);
+        offset = await sendChunk(upload.upload_id, offset, file.slice(offset, offset + upload.chunk_size));
+    }
+
+    showStatus('info', 'Uploading PDF... 100%');
+    const response = await fetch(`/api/upload/chunked/${upload.upload_id}/complete`, { method: 'POST' });
+    const data = await response.json();
+    if (response.status !== 409) localStorage.removeItem(chunkedUploadKey(file));
+    return data;
+}
+
+async function handleFileUpload(file) {
+    if (!file.name.endsWith('.pdf')) {
+        showStatus('error', 'Please upload a PDF file');
+        return;
+    }
+
+    showStatus('info', 'Checking PDF...');
+
+    try {
+        const hash = await hashFile(file);
+        let data = await checkUpload(file, hash);
+        const alreadyStored = data !== null;
+
+        if (!alreadyStored && file.size > CHUNKED_UPLOAD_THRESHOLD) {
+            data = await uploadInChunks(file, hash);
+        } else if (!alreadyStored) {
+            const formData = new FormData();
+            formData.append('file', file);
+
+            showStatus('info', 'Uploading PDF...');
+            const response = await fetch('/api/upload', {
+                method: 'POST',
+                body: formData
+            });
+            data = await response.json();
+        }
 
         if (data.success) {
             currentFileId = data.file_id;
-            showStatus('success', `Uploaded: ${data.filename}`);
+            currentContentHash = data.content_hash;
+            showStatus('success', alreadyStored ? `Ready: ${data.filename} (already on the server)`
+                                                : `Uploaded: ${data.filename}`);
             await loadFields();
             showTools();
         } else {
@@ -104,15 +567,54 @@ async function handleFileUpload(file) {
     }
 }
 
+async function loadRegisteredTemplates() {
+    try {
+        const response = await fetch('/api/templates');
+        const data = await response.json();
+
+        if (!data.success || data.count === 0) return;
+
+        const list = document.getElementById('registered-template-list');
+        list.innerHTML = '';
+
+        data.templates.forEach(template => {
+            const btn = document.createElement('button');
+            btn.className = 'btn btn-secondary';
+            btn.textContent = `${template.name} (${template.field_count} fields)`;
+            btn.addEventListener('click', () => useRegisteredTemplate(template));
+            list.appendChild(btn);
+        });
+
+        document.getElementById('registered-templates').classList.remove('hidden');
+    } catch (error) {
+        // Registered templates are optional - uploading still works
+    }
+}
+
+async function useRegisteredTemplate(template) {
+    currentFileId = template.id;
+    currentContentHash = template.content_hash;
+    showStatus('success', `Using registered template: ${template.name}`);
+    await loadFields();
+    showTools();
+}
+
 async function loadFields() {
+    // Same content as a PDF seen before - no need to ask the server
+    const cached = await getCachedFields(currentContentHash);
+    if (cached) {
+        setCurrentFields(cached);
+        return;
+    }
+
     try {
         const response = await fetch(`/api/fields/${currentFileId}`);
         const data = await response.json();
 
         if (data.success) {
-            currentFields = data.fields;
-            displayFields(currentFields);
-            updateFieldStats(data.count);
+            currentContentHash = data.content_hash;
+            setCurrentFields(data.fields);
+            putCachedFields(data.content_hash, data.fields);
         } else {
             showStatus('error', data.error);
         }
@@ -121,41 +623,25 @@ async function loadFields() {
     }
 }
 
+function setCurrentFields(fields) {
+    currentFields = fields;
+    currentFieldIndex = buildFieldIndex(fields);
+    displayFields(currentFields);
+    updateFieldStats(currentFields.length);
+}
+
 function displayFields(fields) {
-    const fieldList = document.getElementById('field-list');
-    fieldList.innerHTML = '';
-
-    fields.forEach(field => {
-        const item = document.createElement('div');
-        item.className = 'field-item';
-        item.innerHTML = `
-            <div class="field-info">
-                <h4>${field.name}</h4>
-                ${field.tooltip ? `<p>${field.tooltip}</p>` : ''}
-                <span class="field-type ${field.type}">${field.type}</span>
-            </div>
-            <button class="btn btn-secondary" onclick="addToFillForm('${field.name}', '${field.type}')">+ Add</button>
-        `;
-        fieldList.appendChild(item);
-    });
+    if (!fieldListView) {
+        fieldListView = createFieldView(document.getElementById('field-list'));
+    }
+    fieldListView.show(fields);
 }
 
 function filterFields() {
-    const filterText = document.getElementById('field-filter').value.toLowerCase();
+    const filterText = document.getElementById('field-filter').value;
     const section = document.getElementById('section-filter').value;
 
-    let filtered = currentFields;
-
-    if (section) {
-        filtered = filtered.filter(f => f.name.startsWith(section));
-    }
-
-    if (filterText) {
-        filtered = filtered.filter(f =>
-            f.name.toLowerCase().includes(filterText) ||
-            f.tooltip.toLowerCase().includes(filterText)
-        );
-    }
+    const filtered = queryFields(currentFieldIndex, filterText, section);
 
     displayFields(filtered);
     updateFieldStats(filtered.length, currentFields.length);
@@ -170,88 +656,39 @@ function updateFieldStats(count, total = null) {
     }
 }
 
-async function performSearch() {
+function performSearch() {
     const searchTerm = document.getElementById('search-input').value.trim();
     if (!searchTerm) return;
 
     const resultsDiv = document.getElementById('search-results');
-    resultsDiv.innerHTML = '<p>Searching...</p>';
-
-    try {
-        const response = await fetch(`/api/search/${currentFileId}?q=${encodeURIComponent(searchTerm)}`);
-        const data = await response.json();
+    const results = queryFields(currentFieldIndex, searchTerm);
 
-        if (data.success) {
-            if (data.count === 0) {
-                resultsDiv.innerHTML = '<p>No fields found matching your search.</p>';
-            } else {
-                resultsDiv.innerHTML = '<div class="field-list"></div>';
-                const fieldList = resultsDiv.querySelector('.field-list');
-
-                data.results.forEach(field => {
-                    const item = document.createElement('div');
-                    item.className = 'field-item';
-                    item.innerHTML = `
-                        <div class="field-info">
-                            <h4>${field.name}</h4>
-                            ${field.tooltip ? `<p>${field.tooltip}</p>` : ''}
-                            <span class="field-type ${field.type}">${field.type}</span>
-                        </div>
-                        <button class="btn btn-secondary" onclick="addToFillForm('${field.name}', '${field.type}')">+ Add</button>
-                    `;
-                    fieldList.appendChild(item);
-                });
-            }
-        } else {
-            resultsDiv.innerHTML = `<p class="error">${data.error}</p>`;
-        }
-    } catch (error) {
-        resultsDiv.innerHTML = `<p class="error">Search failed: ${error.message}</p>`;
+    if (results.length === 0) {
+        resultsDiv.innerHTML = '<p>No fields found matching your search.</p>';
+    } else {
+        resultsDiv.innerHTML = '<div class="field-list"></div>';
+        searchResultsView = createFieldView(resultsDiv.querySelector('.field-list'));
+        searchResultsView.show(results);
     }
 }
 
-async function generateTemplate() {
+function generateTemplate() {
     const section = document.querySelector('input[name="template-section"]:checked').value;
     const output = document.getElementById('template-output');
     const saveBtn = document.getElementById('save-template-json-btn');
 
-    output.textContent = 'Generating template...';
-    saveBtn.disabled = true;
-
-    try {
-        const url = `/api/template/${currentFileId}${section ? '?section=' + section : ''}`;
-        const response = await fetch(url);
-        const data = await response.json();
-
-        if (data.success) {
-            // Store template data for saving
-            currentTemplateData = data.template;
-
-            // Build JSON with descriptions as inline comments
-            let jsonLines = ['{\n'];
-            const fields = data.template;
-
-            fields.forEach((field, index) => {
-                const isLast = index === fields.length - 1;
-                const description = field.description ? ` // ${field.description}` : '';
-                const fieldValue = JSON.stringify(field.value);
-
-                jsonLines.push(`  "${field.name}": ${fieldValue}${isLast ? '' : ','}${description}\n`);
-            });
-
-            jsonLines.push('}');
-            output.textContent = jsonLines.join('');
-
-            // Enable save button
-            saveBtn.disabled = false;
-        } else {
-            output.textContent = `Error: ${data.error}`;
-            currentTemplateData = null;
-        }
-    } catch (error) {
-        output.textContent = `Error: ${error.message}`;
+    const fields = queryFields(currentFieldIndex, '', section);
+    if (fields.length === 0) {
+        output.textContent = 'Error: No form fields found';
         currentTemplateData = null;
+        saveBtn.disabled = true;
+        return;
     }
+
+    // Store template data for saving
+    currentTemplateData = buildTemplate(fields);
+    displayTemplate(currentTemplateData);
+    saveBtn.disabled = false;
 }
 
 function saveTemplateAsJSON() {
@@ -261,20 +698,7 @@ function saveTemplateAsJSON() {
     }
 
     try {
-        // Build JSON with descriptions as inline comments
-        let jsonLines = ['{\n'];
-        const fields = currentTemplateData;
-
-        fields.forEach((field, index) => {
-            const isLast = index === fields.length - 1;
-            const description = field.description ? ` // ${field.description}` : '';
-            const fieldValue = JSON.stringify(field.value);
-
-            jsonLines.push(`  "${field.name}": ${fieldValue}${isLast ? '' : ','}${description}\n`);
-        });
-
-        jsonLines.push('}');
-        const jsonString = jsonLines.join('');
+        const jsonString = buildTemplateJSON(currentTemplateData);
 
         // Create and download file
         const blob = new Blob([jsonString], { type: 'application/json' });
@@ -450,36 +874,17 @@ async function removeDefaults(fields, successMessage) {
     }
 }
 
-async function exportTemplate() {
+function exportTemplate() {
     try {
-        const response = await fetch(`/api/template/${currentFileId}`);
-        const data = await response.json();
-
-        if (data.success) {
-            // Build JSON with descriptions as inline comments
-            let jsonLines = ['{\n'];
-            const fields = data.template;
-
-            fields.forEach((field, index) => {
-                const isLast = index === fields.length - 1;
-                const description = field.description ? ` // ${field.description}` : '';
-                const fieldValue = JSON.stringify(field.value);
+        const jsonString = buildTemplateJSON(buildTemplate(currentFields));
 
-                jsonLines.push(`  "${field.name}": ${fieldValue}${isLast ? '' : ','}${description}\n`);
-            });
-
-            jsonLines.push('}');
-            const jsonString = jsonLines.join('');
-
-            const blob = new Blob([jsonString], { type: 'application/json' });
-            const url = URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = 'template.json';
-            a.click();
-        } else {
-            alert('Error: ' + data.error);
-        }
+        const blob = new Blob([jsonString], { type: 'application/json' });
+        const url = URL.createObjectURL(blob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = 'template.json';
+        a.click();
+        URL.revokeObjectURL(url);
     } catch (error) {
         alert('Failed to export: ' + error.message);
     }
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Garbage collection for the web UI's uploads and outputs
+
+Every upload and every _filled.pdf, _clean.pdf and _no_void.pdf output is
+written to one directory ($PDFFILL_UPLOAD_DIR, default <tmp>/pdffill), and
+cached fills to its fill-cache subdirectory (fill_cache.py). A TempSweeper
+keeps that directory, subdirectories included, bounded:
+- files not written or used for longer than the TTL are deleted (the web
+  app touches an upload whenever an operation uses it)
+- when the directory is over its quota, the oldest files are deleted
+  first until it fits
+- before new work writes to it, make_room() checks that the quota can hold
+  the new file, evicting old files if needed; when even that cannot make
+  room it raises QuotaExceeded, which the web API answers with 507
+
+Hard links (a cached fill and the output it came from share their bytes)
+count once toward the quota, and their bytes count as freed only when the
+last link is deleted.
+
+Files younger than MIN_AGE are never evicted for the quota: they belong to
+requests in flight or results about to be downloaded. A background thread
+sweeps every interval seconds; each server process runs its own, and they
+share the directory safely.
+
+Configured from PDFFILL_TEMP_TTL (seconds, default 7200), PDFFILL_TEMP_QUOTA
+(MB, default 1024, 0 = no quota) and PDFFILL_SWEEP_INTERVAL (seconds,
+default 60).
+
+Usage:
+    python temp_sweeper.py                        # Sweep once with the app's settings
+    python temp_sweeper.py --ttl 600 --quota 200  # Override them
+"""
+
+import sys
+import os
+import time
+import tempfile
+import threading
+
+DEFAULT_TTL = 2 * 60 * 60
+DEFAULT_QUOTA_MB = 1024
+DEFAULT_INTERVAL = 60
+
+# Files this young are never evicted for the quota
+MIN_AGE = 60
+
+# How old the last scan may be before a quota check rescans the directory
+USAGE_MAX_AGE = 1.0
+
+
+class QuotaExceeded(Exception):
+    """The upload directory cannot hold a new file, even after evicting old ones"""
+
+    def __init__(self, message, retry_after=MIN_AGE):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+def default_upload_dir():
+    return os.environ.get('PDFFILL_UPLOAD_DIR') or os.path.join(tempfile.gettempdir(), 'pdffill')
+
+
+def _scan_into(directory, entries):
+    try:
+        it = os.scandir(directory)
+    except FileNotFoundError:
+        return
+    with it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    _scan_into(entry.path, entries)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    entries.append((stat.st_mtime, stat.st_size, entry.path, (stat.st_dev, stat.st_ino)))
+            except FileNotFoundError:
+                # Deleted by another process's sweep meanwhile
+                continue
+
+
+def scan(directory):
+    """
+    (mtime, size, path, inode) of every file in directory and its
+    subdirectories, oldest first; inode is (st_dev, st_ino), the same for
+    every hard link to one file
+    """
+    entries = []
+    _scan_into(directory, entries)
+    entries.sort()
+    return entries
+
+
+def link_counts(entries):
+    """Number of scanned links to each inode"""
+    counts = {}
+    for _, _, _, inode in entries:
+        counts[inode] = counts.get(inode, 0) + 1
+    return counts
+
+
+def total_size(entries):
+    """Bytes used by scanned files, counting hard-linked files once"""
+    return sum({inode: size for _, size, _, inode in entries}.values())
+
+
+class TempSweeper:
+    """TTL and quota enforcement for one directory"""
+
+    def __init__(self, directory, ttl=DEFAULT_TTL, quota_mb=DEFAULT_QUOTA_MB, interval=DEFAULT_INTERVAL):
+        """
+        Args:
+            ttl: Seconds a file is kept (0 = forever)
+            quota_mb: Total size the directory may reach (0 = unlimited)
+            interval: Seconds between background sweeps
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.quota = quota_mb * 1024 * 1024 if quota_mb else None
+        self.interval = interval
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._files = 0
+        self._bytes = 0
+        self._scanned_at = None
+        self._thread_pid = None
+        self.last_sweep = None
+        self.expired = {'files': 0, 'bytes': 0}
+        self.evicted = {'files': 0, 'bytes': 0}
+        self.refused = 0
+
+    @classmethod
+    def from_env(cls, directory):
+        """Sweeper configured from PDFFILL_TEMP_* / PDFFILL_SWEEP_INTERVAL"""
+        return cls(directory,
+                   int(os.environ.get('PDFFILL_TEMP_TTL', DEFAULT_TTL)),
+                   int(os.environ.get('PDFFILL_TEMP_QUOTA', DEFAULT_QUOTA_MB)),
+                   float(os.environ.get('PDFFILL_SWEEP_INTERVAL', DEFAULT_INTERVAL)))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def sweep(self, needed=0):
+        """
+        Delete expired files, then the oldest files until `needed` more
+        bytes fit in the quota; returns whether they fit
+        """
+        now = time.time()
+        with self._lock:
+            entries = scan(self.directory)
+            links = link_counts(entries)
+            kept = []
+            for mtime, size, path, inode in entries:
+                if self.ttl and now - mtime > self.ttl:
+                    links[inode] -= 1
+                    if self._remove(path):
+                        self.expired['files'] += 1
+                        if not links[inode]:
+                            self.expired['bytes'] += size
+                else:
+                    kept.append((mtime, size, path, inode))
+
+            total = total_size(kept)
+            count = len(kept)
+            if self.quota:
+                for mtime, size, path, inode in kept:
+                    if total + needed <= self.quota or now - mtime < MIN_AGE:
+                        break
+                    links[inode] -= 1
+                    if self._remove(path):
+                        self.evicted['files'] += 1
+                        if not links[inode]:
+                            self.evicted['bytes'] += size
+                    if not links[inode]:
+                        # The last link: only now are the bytes freed
+                        total -= size
+                    count -= 1
+
+            self._files = count
+            self._bytes = total
+            self._scanned_at = time.monotonic()
+            self.last_sweep = now
+            return not self.quota or total + needed <= self.quota
+
+    def make_room(self, nbytes):
+        """
+        Call before writing a file of about nbytes; raises QuotaExceeded
+        when the quota cannot hold it
+        """
+        self._ensure_thread()
+        if not self.quota:
+            return
+
+        with self._lock:
+            fresh = self._scanned_at is not None and time.monotonic() - self._scanned_at < USAGE_MAX_AGE
+            if fresh and self._bytes + nbytes <= self.quota:
+                self._bytes += nbytes
+                self._files += 1
+                return
+
+        if not self.sweep(nbytes):
+            with self._lock:
+                self.refused += 1
+            raise QuotaExceeded("Temporary storage is full, try again later")
+
+        with self._lock:
+            self._bytes += nbytes
+            self._files += 1
+
+    def _ensure_thread(self):
+        """Start the background sweep in this process (threads do not survive a pre-fork)"""
+        if self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name='pdffill-sweeper', daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                self.sweep()
+            except OSError as e:
+                print(f"⚠️  Temp sweeper: {e}", file=sys.stderr, flush=True)
+            time.sleep(self.interval)
+
+    def usage(self):
+        self._ensure_thread()
+        if self._scanned_at is None:
+            self.sweep()
+        with self._lock:
+            return {
+                'directory': self.directory,
+                'files': self._files,
+                'bytes': self._bytes,
+                'quota_bytes': self.quota,
+                'ttl_seconds': self.ttl,
+                'last_sweep': self.last_sweep,
+                'expired': dict(self.expired),
+                'evicted': dict(self.evicted),
+                'refused': self.refused,
+            }
+
+
+def main():
+    from serve import take_option
+
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print("Usage: python temp_sweeper.py [--dir DIR] [--ttl SECONDS] [--quota MB]")
+        print(f"\nDefaults: {default_upload_dir()}, PDFFILL_TEMP_TTL or {DEFAULT_TTL}s, "
+              f"PDFFILL_TEMP_QUOTA or {DEFAULT_QUOTA_MB} MB")
+        sys.exit(0)
+
+    sweeper = TempSweeper.from_env(take_option(args, '--dir', default=default_upload_dir()))
+    sweeper.ttl = take_option(args, '--ttl', int, sweeper.ttl)
+    quota_mb = take_option(args, '--quota', int)
+    if quota_mb is not None:
+        sweeper.quota = quota_mb * 1024 * 1024 if quota_mb else None
+    if args:
+        print(f"Error: Unknown arguments - {' '.join(args)} (see --help)")
+        sys.exit(1)
+
+    fits = sweeper.sweep()
+    usage = sweeper.usage()
+    print(f"{usage['directory']}: {usage['files']} files, {usage['bytes'] / (1024 * 1024):.1f} MB")
+    print(f"  Expired: {usage['expired']['files']} files ({usage['expired']['bytes'] / (1024 * 1024):.1f} MB)")
+    print(f"  Evicted: {usage['evicted']['files']} files ({usage['evicted']['bytes'] / (1024 * 1024):.1f} MB)")
+    if fits:
+        print("✓ Within quota")
+    else:
+        print(f"⚠️  Still over quota - the rest is younger than {MIN_AGE}s")
+
+
+if __name__ == "__main__":
+    main()
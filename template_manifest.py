@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Persistent template manifests
+
+Listing a template's fields, compiling its schema and mapping field names to
+objects all mean parsing the PDF and walking every field - paid again by
+every restart and every new worker. A manifest stores the results in a JSON
+file keyed by the SHA-256 of the PDF's bytes:
+- fields: every top-level field as list_fields.py / generate_template.py
+  show it (name, type, tooltip, value, default, number of kids)
+- form_fields: the web UI's field list, including named children, which is
+  also what tooltip searches run over
+- schema: the compiled fill schema (see fill_schema.py)
+- field_refs: field name (top-level or fully-qualified, as in the schema)
+  -> object reference, used by pdf_template.Template.fill() to find fields
+  without walking the form
+
+Later processes answer from the manifest without parsing the PDF. The same
+bytes always produce the same manifest, so entries never go stale; one
+written by another MANIFEST_VERSION is ignored and rebuilt.
+
+Manifests are stored in $PDFFILL_MANIFEST_DIR (default
+~/.cache/pdffill/manifests), one <content hash>.json per template. Set
+PDFFILL_NO_MANIFEST=1 to build them in memory without reading or writing
+the store.
+
+Usage:
+    python template_manifest.py form.pdf              # Build (or load) and summarize
+    python template_manifest.py form.pdf --rebuild    # Ignore the stored manifest
+    python template_manifest.py --clear               # Delete every stored manifest
+"""
+
+import sys
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from pdf_template import open_pdf, close_pdf
+
+# Bump when the manifest layout or the way any part of it is computed changes
+MANIFEST_VERSION = 2
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract_form_fields(pdf):
+    """Extract all form fields from an open PDF (including children)"""
+    import pikepdf
+
+    try:
+        if '/AcroForm' not in pdf.Root or '/Fields' not in pdf.Root.AcroForm:
+            return None
+
+        fields = []
+
+        def extract_field_info(field, parent_name=''):
+            """Recursively extract field information"""
+            field_info = {
+                'name': '',
+                'type': '',
+                'tooltip': '',
+                'value': ''
+            }
+
+            # Get field name
+            if '/T' in field:
+                field_name = str(field['/T'])
+                field_info['name'] = f"{parent_name}.{field_name}" if parent_name else field_name
+            elif parent_name:
+                # Child widget without its own name
+                return None
+
+            # Get tooltip
+            if '/TU' in field:
+                field_info['tooltip'] = str(field['/TU'])
+
+            # Get field type
+            if '/FT' in field:
+                ft = str(field['/FT'])
+                type_map = {'/Tx': 'text', '/Btn': 'checkbox', '/Ch': 'choice', '/Sig': 'signature'}
+                field_info['type'] = type_map.get(ft, 'unknown')
+
+            # Get value
+            if '/V' in field:
+                val = field['/V']
+                if isinstance(val, pikepdf.Name):
+                    field_info['value'] = str(val).lstrip('/')
+                else:
+                    field_info['value'] = str(val)
+
+            # Check if this field has children
+            has_children = '/Kids' in field and len(field['/Kids']) > 0
+
+            # If field has /FT, it's a terminal field - add it
+            if '/FT' in field:
+                fields.append(field_info)
+
+            # Recursively process children
+            if has_children:
+                for kid in field['/Kids']:
+                    try:
+                        child_info = extract_field_info(kid, field_info['name'])
+                        if child_info:
+                            fields.append(child_info)
+                    except:
+                        pass
+
+        # Process all top-level fields
+        for field in pdf.Root.AcroForm.Fields:
+            try:
+                extract_field_info(field)
+            except Exception as e:
+                print(f"Error processing field: {e}")
+
+        return fields
+
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+
+def describe_field(field):
+    """
+    Summary of one top-level field
+
+    ft is the field's /FT, or its first kid's for a field whose type lives
+    on the widget; kids is None when the field has no /Kids array.
+    """
+    entry = {'name': str(field['/T']) if '/T' in field else None,
+             'ft': None, 'tooltip': '', 'value': None, 'default': None, 'kids': None}
+
+    if '/FT' in field:
+        entry['ft'] = str(field['/FT'])
+    elif '/Kids' in field:
+        try:
+            first_kid = field['/Kids'][0]
+            if '/FT' in first_kid:
+                entry['ft'] = str(first_kid['/FT'])
+        except Exception:
+            pass
+
+    if '/TU' in field:
+        entry['tooltip'] = str(field['/TU'])
+    if '/V' in field:
+        entry['value'] = str(field['/V'])
+    if '/DV' in field:
+        entry['default'] = str(field['/DV'])
+    if '/Kids' in field:
+        entry['kids'] = len(field['/Kids'])
+    return entry
+
+
+class TemplateManifest:
+    """Everything the tools need to know about a template's form, without the PDF"""
+
+    def __init__(self, content_hash, has_acroform, fields, form_fields, schema, field_refs):
+        """
+        Args:
+            has_acroform: False when the PDF has no /AcroForm at all
+            fields: describe_field() of every top-level field, or None when
+                    the AcroForm has no /Fields
+            form_fields: extract_form_fields() result (None without a form)
+            schema: FillSchema
+            field_refs: Field name (see fill_pdf.named_fields) -> (objnum, gen)
+        """
+        self.content_hash = content_hash
+        self.has_acroform = has_acroform
+        self.fields = fields
+        self.form_fields = form_fields
+        self.schema = schema
+        self.field_refs = field_refs
+        self._search_index = None
+
+    @classmethod
+    def from_pdf(cls, pdf, content_hash):
+        """Build the manifest of an open pikepdf.Pdf whose bytes hash to content_hash"""
+        from fill_schema import FillSchema
+        from fill_pdf import named_fields
+
+        acroform = pdf.Root.get('/AcroForm')
+        fields = None
+        field_refs = {}
+        if acroform is not None and '/Fields' in acroform:
+            fields = [describe_field(field) for field in acroform.Fields]
+            for name, field in named_fields(acroform.Fields):
+                if field.is_indirect:
+                    field_refs.setdefault(name, field.objgen)
+
+        return cls(content_hash, acroform is not None, fields, extract_form_fields(pdf),
+                   FillSchema.from_pdf(pdf), field_refs)
+
+    @classmethod
+    def from_dict(cls, data):
+        from fill_schema import FillSchema
+
+        field_refs = {name: tuple(ref) for name, ref in data['field_refs'].items()}
+        return cls(data['content_hash'], data['has_acroform'], data['fields'], data['form_fields'],
+                   FillSchema(data['schema']), field_refs)
+
+    def to_dict(self):
+        return {
+            'version': MANIFEST_VERSION,
+            'content_hash': self.content_hash,
+            'has_acroform': self.has_acroform,
+            'fields': self.fields,
+            'form_fields': self.form_fields,
+            'schema': self.schema.to_dict(),
+            'field_refs': {name: list(ref) for name, ref in self.field_refs.items()},
+        }
+
+    def search(self, search_term):
+        """form_fields whose name or tooltip contains search_term (case-insensitive)"""
+        if not self.form_fields:
+            return []
+        if self._search_index is None:
+            self._search_index = [(field['name'].lower(), field['tooltip'].lower(), field)
+                                  for field in self.form_fields]
+
+        search_lower = search_term.lower()
+        return [field for name, tooltip, field in self._search_index
+                if search_lower in name or search_lower in tooltip]
+
+
+def manifest_dir():
+    """Directory of the manifest store, or None when it is disabled"""
+    if os.environ.get('PDFFILL_NO_MANIFEST'):
+        return None
+    configured = os.environ.get('PDFFILL_MANIFEST_DIR')
+    if configured:
+        return configured
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'pdffill', 'manifests')
+
+
+def manifest_path(content_hash):
+    directory = manifest_dir()
+    return os.path.join(directory, f"{content_hash}.json") if directory else None
+
+
+def load_manifest(content_hash):
+    """The stored manifest for content_hash, or None if there is no usable one"""
+    path = manifest_path(content_hash)
+    if path is None:
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != MANIFEST_VERSION or data.get('content_hash') != content_hash:
+            return None
+        return TemplateManifest.from_dict(data)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_manifest(manifest):
+    """
+    Store a manifest; returns its path, or None when the store is disabled
+    or not writable
+
+    Written to a temporary file and renamed, so concurrent workers never
+    read a partial manifest.
+    """
+    path = manifest_path(manifest.content_hash)
+    if path is None:
+        return None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(manifest.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        return None
+    return path
+
+
+def load_or_build(content_hash, build):
+    """The stored manifest for content_hash, else build() one and store it"""
+    manifest = load_manifest(content_hash)
+    if manifest is None:
+        manifest = build()
+        save_manifest(manifest)
+    return manifest
+
+
+def manifest_for_file(pdf_path, rebuild=False):
+    """Manifest of a PDF file; the PDF is only parsed when none is stored"""
+    content_hash = file_sha256(pdf_path)
+
+    def build():
+        pdf = open_pdf(str(pdf_path))
+        try:
+            return TemplateManifest.from_pdf(pdf, content_hash)
+        finally:
+            close_pdf(pdf)
+
+    if rebuild:
+        manifest = build()
+        save_manifest(manifest)
+        return manifest
+    return load_or_build(content_hash, build)
+
+
+def clear_manifests():
+    """Delete every stored manifest; returns how many were removed"""
+    directory = manifest_dir()
+    if directory is None or not os.path.isdir(directory):
+        return 0
+    removed = 0
+    for path in Path(directory).glob('*.json'):
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or '--help' in args or '-h' in args:
+        print("Usage: python template_manifest.py <pdf_file> [--rebuild]")
+        print("       python template_manifest.py --clear")
+        print(f"\nStore: {manifest_dir() or 'disabled (PDFFILL_NO_MANIFEST is set)'}")
+        sys.exit(0 if args else 1)
+
+    if '--clear' in args:
+        print(f"✓ Removed {clear_manifests()} manifest(s)")
+        return
+
+    rebuild = '--rebuild' in args
+    args = [arg for arg in args if arg != '--rebuild']
+    if len(args) != 1:
+        print(f"Error: Unknown arguments - {' '.join(args[1:])} (see --help)")
+        sys.exit(1)
+
+    pdf_path = args[0]
+    if not Path(pdf_path).exists():
+        print(f"Error: File not found - {pdf_path}")
+        sys.exit(1)
+
+    content_hash = file_sha256(pdf_path)
+    stored = not rebuild and load_manifest(content_hash) is not None
+    try:
+        manifest = manifest_for_file(pdf_path, rebuild)
+    except Exception as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    print(f"{Path(pdf_path).name}: {content_hash}")
+    if manifest.fields is None:
+        print("✗ No form fields found")
+    else:
+        print(f"  Top-level fields: {len(manifest.fields)}")
+        print(f"  Form fields:      {len(manifest.form_fields or [])}")
+        print(f"  With tooltips:    {sum(1 for f in manifest.form_fields or [] if f['tooltip'])}")
+
+    path = manifest_path(content_hash)
+    if path is None:
+        print("⚠️  Manifest store disabled (PDFFILL_NO_MANIFEST is set)")
+    elif stored:
+        print(f"✓ Loaded from: {path}")
+    elif os.path.exists(path):
+        print(f"✓ Saved to: {path}")
+    else:
+        print(f"⚠️  Could not write: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Registry of preloaded PDF templates for the web UI
+
+Templates listed in the registry config are loaded and analyzed once at
+start-up, then served from memory. Each entry wraps a pdf_template.Template
+whose manifest (template_manifest.py) holds the field list the web UI shows,
+the schema and the name -> object reference map, so fills start from an
+in-memory copy instead of re-reading and re-walking the file. A restarted
+server or a new worker loads the stored manifest instead of parsing the
+PDF. An entry is reloaded automatically the first time it is used after
+its file changes.
+
+Config file (JSON) maps a template id to its file:
+    {
+      "clean": {"path": "CLEAN_TEMPLATE.pdf", "name": "Clean iA Financial template"}
+    }
+Relative paths are resolved against the config file's directory.
+"""
+
+import os
+import json
+import threading
+
+from pdf_template import Template
+
+
+class RegisteredTemplate:
+    """A loaded template plus the metadata compiled from it"""
+
+    def __init__(self, template_id, path, name):
+        self.id = template_id
+        self.name = name
+        self.template = Template(path)
+
+        # Load (or build) the manifest now rather than on the first request.
+        # Full field list in the same shape as app.get_form_fields()
+        self.fields = self.template.manifest.form_fields or []
+
+    @property
+    def path(self):
+        return self.template.path
+
+    @property
+    def content_hash(self):
+        return self.template.content_hash
+
+    @property
+    def schema(self):
+        return self.template.schema
+
+    @property
+    def manifest(self):
+        return self.template.manifest
+
+    def open_copy(self):
+        """Writable copy of the template, independent of other requests"""
+        return self.template.open_copy()
+
+    def fill(self, field_data):
+        """Fill a copy of the template; see pdf_template.Template.fill()"""
+        return self.template.fill(field_data)
+
+    def info(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'filename': os.path.basename(self.path),
+            'size': len(self.template.data),
+            'field_count': len(self.fields),
+            'content_hash': self.content_hash
+        }
+
+
+class TemplateRegistry:
+    """Thread-safe id -> RegisteredTemplate map with reload on file change"""
+
+    def __init__(self, config, base_dir='.'):
+        """
+        Args:
+            config: Dict of template id -> {"path": ..., "name": ...}
+            base_dir: Directory that relative template paths are resolved against
+        """
+        self._config = {}
+        for template_id, entry in config.items():
+            if isinstance(entry, str):
+                entry = {'path': entry}
+            path = os.path.join(base_dir, entry['path'])
+            self._config[template_id] = (path, entry.get('name', template_id))
+
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, config_path):
+        """Build a registry from a JSON config file (empty if the file is missing)"""
+        if not config_path or not os.path.exists(config_path):
+            return cls({})
+
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+
+        base_dir = os.path.dirname(os.path.abspath(config_path))
+        return cls(config, base_dir)
+
+    def preload(self):
+        """Load every configured template; returns a list of (id, error) failures"""
+        failures = []
+        for template_id in self._config:
+            try:
+                self.get(template_id)
+            except Exception as e:
+                failures.append((template_id, str(e)))
+        return failures
+
+    def _load(self, template_id):
+        path, name = self._config[template_id]
+        return RegisteredTemplate(template_id, path, name)
+
+    def get(self, template_id):
+        """Return the RegisteredTemplate for an id, or None if it is not registered"""
+        if template_id not in self._config:
+            return None
+
+        template = self._templates.get(template_id)
+        if template is not None and not template.template.is_stale():
+            return template
+
+        with self._lock:
+            template = self._templates.get(template_id)
+            if template is None or template.template.is_stale():
+                old = template
+                template = self._load(template_id)
+                self._templates[template_id] = template
+                # Requests already holding the old entry only use copies of
+                # its bytes, so closing its resident document is safe
+                if old is not None:
+                    old.template.close()
+            return template
+
+    def __contains__(self, template_id):
+        return template_id in self._config
+
+    def find_by_hash(self, content_hash):
+        """The loaded template whose file has exactly these bytes, or None"""
+        for template_id, template in list(self._templates.items()):
+            if template.content_hash == content_hash:
+                # Reload first if the file changed since it was loaded
+                template = self.get(template_id)
+                if template.content_hash == content_hash:
+                    return template
+        return None
+
+    def list(self):
+        """Info for every template that loads successfully"""
+        infos = []
+        for template_id in self._config:
+            try:
+                infos.append(self.get(template_id).info())
+            except Exception:
+                continue
+        return infos
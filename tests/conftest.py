@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app.py creates its upload directory and sweeper on import; keep the
+# tests' files out of the real one
+os.environ.setdefault('PDFFILL_UPLOAD_DIR', tempfile.mkdtemp(prefix='pdffill-tests-'))
+
+CLEAN_TEMPLATE = os.path.join(ROOT, 'CLEAN_TEMPLATE.pdf')
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from admission import AdmissionController, Rejected
+
+
+def test_client_over_its_limit_gets_429():
+    admission = AdmissionController(max_active=4, per_client=1)
+    admission.acquire('bulk')
+
+    with pytest.raises(Rejected) as error:
+        admission.acquire('bulk')
+    assert error.value.status == 429
+    # Other clients are still let in
+    admission.acquire('interactive')
+
+
+def test_full_queue_gets_503():
+    admission = AdmissionController(max_active=1, max_queue=0, per_client=0)
+    admission.acquire('a')
+
+    with pytest.raises(Rejected) as error:
+        admission.acquire('b')
+    assert error.value.status == 503
+    assert error.value.retry_after >= 1
+    assert admission.stats()['rejected'] == {503: 1, 429: 0}
+
+
+def test_queue_timeout_gets_503_and_leaves_the_queue():
+    admission = AdmissionController(max_active=1, max_queue=1, per_client=0, queue_timeout=0.1)
+    admission.acquire('a')
+
+    with pytest.raises(Rejected) as error:
+        admission.acquire('b')
+    assert error.value.status == 503
+    assert admission.stats()['queued'] == 0
+
+
+def test_release_hands_the_slot_to_the_queue():
+    admission = AdmissionController(max_active=1, max_queue=1, per_client=0)
+    admission.acquire('a')
+    admitted = threading.Event()
+
+    def queued():
+        with admission.slot('b'):
+            admitted.set()
+
+    thread = threading.Thread(target=queued)
+    thread.start()
+    assert not admitted.wait(0.1)
+    admission.release('a')
+    assert admitted.wait(5)
+    thread.join()
+    assert admission.stats()['active'] == 0
+
+
+def test_web_api_answers_with_retry_after(monkeypatch):
+    import app
+
+    admission = AdmissionController(max_active=1, max_queue=0, per_client=1)
+    monkeypatch.setattr(app, 'admission', admission)
+    client = app.app.test_client()
+
+    admission.acquire('someone else')
+    response = client.get('/api/fields/clean')
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    admission.release('someone else')
+
+    admission.acquire('127.0.0.1')
+    response = client.get('/api/fields/clean')
+    assert response.status_code == 429
+    assert 'Retry-After' in response.headers
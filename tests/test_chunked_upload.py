@@ -0,0 +1,64 @@
+import io
+import hashlib
+
+import pytest
+
+from chunked_upload import ChunkedUploads, UploadError
+
+DATA = bytes(range(256)) * 64
+
+
+class DisconnectingStream(io.BytesIO):
+    """A request body whose client goes away after sending 1000 bytes"""
+
+    def read(self, size=-1):
+        if self.tell():
+            raise ConnectionResetError("client disconnected")
+        return super().read(min(size, 1000))
+
+
+@pytest.fixture
+def uploads(tmp_path):
+    return ChunkedUploads(str(tmp_path), chunk_size=len(DATA) // 2)
+
+
+def write(uploads, upload_id, offset, data, checksum=None):
+    if checksum is None:
+        checksum = hashlib.sha256(data).hexdigest()
+    return uploads.write_chunk(upload_id, offset, io.BytesIO(data), len(data), checksum)
+
+
+def test_wrong_offset_is_409_with_received(uploads):
+    upload_id = uploads.start('form.pdf', len(DATA))['upload_id']
+    half = len(DATA) // 2
+    assert write(uploads, upload_id, 0, DATA[:half]) == half
+
+    with pytest.raises(UploadError) as error:
+        write(uploads, upload_id, 0, DATA[:half])
+    assert error.value.status == 409
+    assert error.value.received == half
+
+
+def test_checksum_mismatch_is_cut_off(uploads):
+    upload_id = uploads.start('form.pdf', len(DATA))['upload_id']
+    half = len(DATA) // 2
+
+    with pytest.raises(UploadError) as error:
+        write(uploads, upload_id, 0, DATA[:half], checksum='0' * 64)
+    assert error.value.status == 400
+    assert uploads.status(upload_id)['received'] == 0
+
+
+def test_failed_read_leaves_no_unverified_bytes(uploads):
+    uploads.chunk_size = len(DATA)
+    upload_id = uploads.start('form.pdf', len(DATA))['upload_id']
+
+    with pytest.raises(ConnectionResetError):
+        uploads.write_chunk(upload_id, 0, DisconnectingStream(DATA), len(DATA),
+                            hashlib.sha256(DATA).hexdigest())
+    assert uploads.status(upload_id)['received'] == 0
+
+    # The retry starts over from 0 and the whole file checks out
+    assert write(uploads, upload_id, 0, DATA) == len(DATA)
+    _, content_hash, _ = uploads.complete(upload_id)
+    assert content_hash == hashlib.sha256(DATA).hexdigest()
@@ -0,0 +1,75 @@
+import os
+import time
+
+import pytest
+
+from fill_cache import FillCache
+from temp_sweeper import TempSweeper, QuotaExceeded, MIN_AGE
+
+ENTRY_SIZE = 600 * 1024
+
+
+def cache_one_fill(upload_dir):
+    """Cache a fill of ENTRY_SIZE bytes, keeping no other copy of it"""
+    cache = FillCache(os.path.join(upload_dir, 'fill-cache'))
+    output = os.path.join(upload_dir, 'result_filled.pdf')
+    with open(output, 'wb') as f:
+        f.write(b'%' * ENTRY_SIZE)
+    cache.put('0' * 64, output, 'Filled 1 fields')
+    os.unlink(output)
+    return cache
+
+
+def test_quota_counts_cached_fills(tmp_path):
+    sweeper = TempSweeper(str(tmp_path), quota_mb=1)
+    cache_one_fill(str(tmp_path))
+
+    sweeper.sweep()
+    assert sweeper.usage()['bytes'] >= ENTRY_SIZE
+    # The cached fill is too young to evict, so a second one does not fit
+    with pytest.raises(QuotaExceeded):
+        sweeper.make_room(ENTRY_SIZE)
+
+
+def test_quota_evicts_old_cached_fills(tmp_path):
+    sweeper = TempSweeper(str(tmp_path), quota_mb=1)
+    cache = cache_one_fill(str(tmp_path))
+    old = time.time() - MIN_AGE - 10
+    for path in cache._paths('0' * 64):
+        os.utime(path, (old, old))
+
+    sweeper.make_room(ENTRY_SIZE)
+    assert cache.get('0' * 64, str(tmp_path / 'again_filled.pdf')) is None
+
+
+def test_quota_counts_hard_links_once(tmp_path):
+    sweeper = TempSweeper(str(tmp_path), quota_mb=1)
+    cache = FillCache(os.path.join(str(tmp_path), 'fill-cache'))
+    output = os.path.join(str(tmp_path), 'result_filled.pdf')
+    with open(output, 'wb') as f:
+        f.write(b'%' * ENTRY_SIZE)
+    # The output stays: it and the cached fill are two links to one file
+    cache.put('0' * 64, output, 'Filled 1 fields')
+
+    sweeper.sweep()
+    assert ENTRY_SIZE <= sweeper.usage()['bytes'] < 2 * ENTRY_SIZE
+    sweeper.make_room(ENTRY_SIZE // 2)
+
+
+def test_hits_do_not_extend_the_ttl(tmp_path):
+    cache = cache_one_fill(str(tmp_path))
+    cache.ttl = 100
+    pdf_path, _ = cache._paths('0' * 64)
+    cached_at = time.time() - 90
+    os.utime(pdf_path, (cached_at, cached_at))
+
+    output = str(tmp_path / 'again_filled.pdf')
+    assert cache.get('0' * 64, output) == 'Filled 1 fields'
+    assert os.path.getmtime(pdf_path) == cached_at
+    # The result served is a file of its own, fresh for its download
+    assert os.stat(output).st_ino != os.stat(pdf_path).st_ino
+    assert time.time() - os.path.getmtime(output) < 5
+
+    expired = time.time() - 110
+    os.utime(pdf_path, (time.time(), expired))
+    assert cache.get('0' * 64, str(tmp_path / 'late_filled.pdf')) is None
@@ -0,0 +1,89 @@
+import pikepdf
+import pytest
+
+from fill_pdf import fill_pdf
+from fill_schema import FillSchema, FLAG_COMBO, FLAG_MULTISELECT
+
+COLOURS = ['Red', 'Green', 'Blue']
+
+
+def make_form(path):
+    """Name (text), Agree (checkbox with on-state Choice2), Colours (multi-select list), Size (combo)"""
+    pdf = pikepdf.new()
+    pdf.add_blank_page()
+
+    def widget(**entries):
+        return pdf.make_indirect(pikepdf.Dictionary(
+            Type=pikepdf.Name.Annot, Subtype=pikepdf.Name.Widget, Rect=[0, 0, 100, 20], **entries))
+
+    appearance = pdf.make_stream(b'')
+    fields = [
+        widget(FT=pikepdf.Name.Tx, T=pikepdf.String('Name')),
+        widget(FT=pikepdf.Name.Btn, T=pikepdf.String('Agree'), AS=pikepdf.Name.Off,
+               AP=pikepdf.Dictionary(N=pikepdf.Dictionary(Choice2=appearance, Off=appearance))),
+        widget(FT=pikepdf.Name.Ch, T=pikepdf.String('Colours'), Ff=FLAG_MULTISELECT,
+               Opt=pikepdf.Array([pikepdf.String(c) for c in COLOURS])),
+        widget(FT=pikepdf.Name.Ch, T=pikepdf.String('Size'), Ff=FLAG_COMBO,
+               Opt=pikepdf.Array([pikepdf.Array([pikepdf.String('S'), pikepdf.String('Small')]),
+                                  pikepdf.Array([pikepdf.String('L'), pikepdf.String('Large')])])),
+    ]
+    pdf.pages[0]['/Annots'] = pikepdf.Array(fields)
+    pdf.Root['/AcroForm'] = pikepdf.Dictionary(Fields=pikepdf.Array(fields))
+    pdf.save(path)
+
+
+@pytest.fixture
+def form(tmp_path):
+    path = tmp_path / 'form.pdf'
+    make_form(path)
+    return path
+
+
+@pytest.fixture
+def schema(form):
+    return FillSchema.from_file(form)
+
+
+def test_unknown_name_is_rejected(form, tmp_path, schema):
+    assert schema.validate({'Nmae': 'Smith'}) == ['Nmae: unknown field']
+
+    output = tmp_path / 'filled.pdf'
+    report = fill_pdf(form, output, {'Name': 'Smith', 'Nmae': 'Smith'})
+    assert not report
+    assert report.errors == ['Nmae: unknown field']
+    assert not output.exists()
+
+
+def test_declared_on_state(form, tmp_path, schema):
+    assert schema.fields['Agree']['states'] == ['Choice2']
+    assert schema.validate({'Agree': 'Choice2'}) == []
+    assert schema.validate({'Agree': 'Choice3'}) != []
+
+    for value in ('Choice2', True, 'Yes'):
+        output = tmp_path / 'filled.pdf'
+        assert fill_pdf(form, output, {'Agree': value})
+        with pikepdf.open(output) as pdf:
+            field = pdf.Root.AcroForm.Fields[1]
+            # The declared state, never the /Yes the widget has no appearance for
+            assert field.V == pikepdf.Name('/Choice2')
+            assert field.AS == pikepdf.Name('/Choice2')
+
+
+def test_list_values_of_a_multiselect(form, tmp_path, schema):
+    assert schema.validate({'Colours': ['Red', 'Blue']}) == []
+    assert schema.validate({'Colours': ['Red', 'Purple']}) == \
+        ["Colours: 'Purple' is not one of the choices (Red, Green, Blue)"]
+
+    output = tmp_path / 'filled.pdf'
+    assert fill_pdf(form, output, {'Colours': ['Red', 'Blue']})
+    with pikepdf.open(output) as pdf:
+        value = pdf.Root.AcroForm.Fields[2].V
+        assert isinstance(value, pikepdf.Array)
+        assert [str(v) for v in value] == ['Red', 'Blue']
+
+
+def test_single_choice_takes_export_values_not_lists(schema):
+    assert schema.fields['Size']['options'] == ['S', 'L']
+    assert schema.validate({'Size': 'L'}) == []
+    assert schema.validate({'Size': 'Large'}) != []
+    assert schema.validate({'Size': ['S']}) == ['Size: expects one choice, got a list']
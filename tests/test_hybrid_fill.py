@@ -0,0 +1,78 @@
+import pikepdf
+
+from fill_pdf import fill_pdf
+from xfa_fill import XfaDatasets
+
+DATASETS = b'''<xfa:datasets xmlns:xfa="http://www.xfa.org/schema/xfa-data/1.0/">
+<xfa:data><form1><LastName/><Colour/></form1></xfa:data>
+</xfa:datasets>'''
+
+
+def make_hybrid_form(path):
+    """form1[0] with a text field LastName[0] and a radio group Colour[0] (Choice1/Choice2)"""
+    pdf = pikepdf.new()
+    pdf.add_blank_page()
+    page = pdf.pages[0]
+
+    parent = pdf.make_indirect(pikepdf.Dictionary(T=pikepdf.String('form1[0]')))
+    last_name = pdf.make_indirect(pikepdf.Dictionary(
+        Type=pikepdf.Name.Annot, Subtype=pikepdf.Name.Widget, Rect=[0, 0, 100, 20],
+        FT=pikepdf.Name.Tx, T=pikepdf.String('LastName[0]'), Parent=parent))
+
+    colour = pdf.make_indirect(pikepdf.Dictionary(
+        FT=pikepdf.Name.Btn, Ff=1 << 15, T=pikepdf.String('Colour[0]'), Parent=parent))
+    buttons = []
+    for state in ('Choice1', 'Choice2'):
+        appearance = pdf.make_stream(b'')
+        buttons.append(pdf.make_indirect(pikepdf.Dictionary(
+            Type=pikepdf.Name.Annot, Subtype=pikepdf.Name.Widget, Rect=[0, 30, 20, 50], Parent=colour,
+            AP=pikepdf.Dictionary(N=pikepdf.Dictionary({'/' + state: appearance, '/Off': appearance})))))
+    colour['/Kids'] = pikepdf.Array(buttons)
+
+    parent['/Kids'] = pikepdf.Array([last_name, colour])
+    page['/Annots'] = pikepdf.Array([last_name] + buttons)
+    pdf.Root['/AcroForm'] = pikepdf.Dictionary(
+        Fields=pikepdf.Array([parent]),
+        XFA=pikepdf.Array([pikepdf.String('datasets'), pdf.make_stream(DATASETS)]))
+    pdf.save(path)
+
+
+def test_fully_qualified_names_fill_both_layers(tmp_path):
+    source, output = tmp_path / 'hybrid.pdf', tmp_path / 'filled.pdf'
+    make_hybrid_form(source)
+
+    report = fill_pdf(source, output, {'form1[0].LastName[0]': 'Smith', 'form1[0].Colour[0]': 'Choice2'})
+    assert report, report.errors
+    assert report.not_found == []
+    assert len(report.xfa_updated) == 2
+
+    with pikepdf.open(output) as pdf:
+        parent = pdf.Root.AcroForm.Fields[0]
+        assert str(parent.Kids[0].V) == 'Smith'
+        assert parent.Kids[1].V == pikepdf.Name('/Choice2')
+        datasets = XfaDatasets(pdf)
+        assert datasets.find('form1[0].LastName[0]').text == 'Smith'
+        # The radio group's on-state, not the checkbox default
+        assert datasets.find('form1[0].Colour[0]').text == 'Choice2'
+
+
+def test_xfa_skips_fields_not_written(tmp_path):
+    source, output = tmp_path / 'hybrid.pdf', tmp_path / 'filled.pdf'
+    make_hybrid_form(source)
+
+    # No AcroForm field is called LastName[0], so the XFA node is left alone too
+    report = fill_pdf(source, output, {'LastName[0]': 'Smith'}, validate=False)
+    assert report.not_found == ['LastName[0]']
+    assert report.xfa_updated == []
+
+    with pikepdf.open(output) as pdf:
+        assert not XfaDatasets(pdf).find('form1[0].LastName[0]').text
+
+
+def test_unknown_short_name_rejected(tmp_path):
+    source, output = tmp_path / 'hybrid.pdf', tmp_path / 'filled.pdf'
+    make_hybrid_form(source)
+
+    report = fill_pdf(source, output, {'LastName[0]': 'Smith'})
+    assert not report
+    assert report.errors == ['LastName[0]: unknown field']
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+import pytest
+
+from sandbox import Sandbox, SandboxError
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason="the sandbox runs in-process off POSIX")
+
+
+@pytest.fixture
+def sandbox():
+    sandbox = Sandbox(workers=1, timeout=5, memory_mb=512)
+    yield sandbox
+    sandbox.close()
+
+
+def test_results_and_exceptions_come_back(sandbox):
+    assert sandbox.run(abs, -3) == 3
+    with pytest.raises(ValueError):
+        sandbox.run(int, 'not a number')
+    # An exception does not cost the worker
+    assert sandbox.stats()['started'] == 1
+
+
+def test_timeout_kills_the_worker(sandbox):
+    sandbox.run(abs, 0)  # Start the worker outside the timed operation
+    sandbox.timeout = 0.5
+
+    started = time.monotonic()
+    with pytest.raises(SandboxError) as error:
+        sandbox.run(time.sleep, 30)
+    assert error.value.reason == 'timeout'
+    assert time.monotonic() - started < 5
+    assert sandbox.stats()['failures']['timeout'] == 1
+
+    # A fresh worker takes the next operation
+    sandbox.timeout = 5
+    assert sandbox.run(abs, -1) == 1
+    assert sandbox.stats()['started'] == 2
+
+
+@pytest.mark.skipif(sys.platform == 'darwin', reason="RLIMIT_AS is not enforced on macOS")
+def test_memory_limit(sandbox):
+    with pytest.raises(SandboxError) as error:
+        sandbox.run(bytearray, 4 * 1024 * 1024 * 1024)
+    assert error.value.reason == 'memory'
+    assert sandbox.stats()['failures']['memory'] == 1
+    assert sandbox.run(abs, -2) == 2
+
+
+def test_crashed_worker_is_replaced(sandbox):
+    with pytest.raises(SandboxError) as error:
+        sandbox.run(os._exit, 3)
+    assert error.value.reason == 'crashed'
+    assert sandbox.run(abs, -4) == 4
@@ -0,0 +1,11 @@
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def test_check_startup_passes():
+    # The import-time budget and the no-heavy-imports rule of pdffill.py
+    result = subprocess.run([sys.executable, 'pdffill.py', 'check-startup'],
+                            capture_output=True, text=True, cwd=ROOT)
+    assert result.returncode == 0, result.stdout + result.stderr
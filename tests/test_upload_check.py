@@ -0,0 +1,57 @@
+import io
+import hashlib
+
+from conftest import CLEAN_TEMPLATE
+
+
+def unregistered_pdf(marker):
+    """CLEAN_TEMPLATE's bytes plus a trailing comment, so it is not a registered template"""
+    with open(CLEAN_TEMPLATE, 'rb') as f:
+        return f.read() + b'\n%' + marker
+
+
+def upload(client, data):
+    response = client.post('/api/upload', data={'file': (io.BytesIO(data), 'form.pdf')})
+    assert response.status_code == 200
+    return response.json
+
+
+def check(client, data):
+    return client.post('/api/upload/check', json={
+        'content_hash': hashlib.sha256(data).hexdigest(),
+        'filename': 'form.pdf'
+    }).json
+
+
+def test_check_reuses_own_session_upload():
+    import app
+
+    data = unregistered_pdf(b'own session')
+    client = app.app.test_client()
+    upload(client, data)
+
+    result = check(client, data)
+    assert result['exists'] is True
+    assert client.get(f"/api/fields/{result['file_id']}").status_code == 200
+
+
+def test_check_does_not_open_another_sessions_upload():
+    import app
+
+    data = unregistered_pdf(b'other session')
+    owner = app.app.test_client()
+    upload(owner, data)
+
+    stranger = app.app.test_client()
+    result = check(stranger, data)
+    assert result == {'success': True, 'exists': False}
+
+
+def test_check_finds_registered_template():
+    import app
+
+    with open(CLEAN_TEMPLATE, 'rb') as f:
+        data = f.read()
+    result = check(app.app.test_client(), data)
+    assert result['exists'] is True
+    assert result['file_id'] == 'clean'
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Fill the XFA datasets packet of hybrid (XFA + AcroForm) PDFs
+
+Viewers that prefer XFA read field values from the <xfa:datasets> packet and
+ignore the AcroForm /V entries, so a hybrid form has to be updated in both
+places. Only the datasets packet is parsed and rewritten - the template,
+config and other packets are left untouched as raw bytes.
+
+Field names are matched the way AcroForm names map onto XFA data:
+"form1[0].Page1[0].LastName[0]" is looked up as the data path
+form1/Page1/LastName, falling back to shorter suffixes of the path (down to
+just "LastName") when the data hierarchy skips unnamed subforms. A suffix
+that names more than one node is treated as not found. All paths are indexed
+in a single walk of the data tree, so each lookup is a dict hit.
+"""
+
+import re
+import zlib
+
+XFA_DATA_NS = 'http://www.xfa.org/schema/xfa-data/1.0/'
+
+_SOM_PART = re.compile(r'^(.*?)(?:\[(\d+)\])?$')
+_DATASETS = re.compile(rb'<(?:[\w.-]+:)?datasets\b.*?</(?:[\w.-]+:)?datasets\s*>', re.S)
+
+# XFA checkButton default on/off values
+CHECKED_VALUE = '1'
+UNCHECKED_VALUE = '0'
+
+
+def parse_som_name(name):
+    """Split "a[0].b.c[2]" into (("a", 0), ("b", 0), ("c", 2))"""
+    parts = []
+    for part in name.split('.'):
+        m = _SOM_PART.match(part)
+        parts.append((m.group(1), int(m.group(2) or 0)))
+    return tuple(parts)
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else None
+
+
+class XfaDatasets:
+    """The parsed <xfa:datasets> packet of one document"""
+
+    def __init__(self, pdf):
+        """
+        Locate and parse the datasets packet of pdf
+
+        Raises LookupError when the document has no XFA datasets packet.
+        """
+        import pikepdf
+        from lxml import etree
+
+        self._etree = etree
+        self._stream = None
+        self._span = None  # (start, end) of the packet inside a single-stream XDP
+        self._raw = None
+
+        xfa = pdf.Root.AcroForm.XFA if '/AcroForm' in pdf.Root and '/XFA' in pdf.Root.AcroForm else None
+        if xfa is None:
+            raise LookupError("No XFA in this PDF")
+
+        if isinstance(xfa, pikepdf.Stream):
+            # Whole XDP in one stream - parse only the datasets slice of it
+            self._stream = xfa
+            self._raw = xfa.read_bytes()
+            m = _DATASETS.search(self._raw)
+            if m is None:
+                raise LookupError("XFA has no datasets packet")
+            self._span = m.span()
+            packet = m.group(0)
+        else:
+            for i in range(0, len(xfa) - 1, 2):
+                if str(xfa[i]) == 'datasets':
+                    self._stream = xfa[i + 1]
+                    break
+            if self._stream is None:
+                raise LookupError("XFA has no datasets packet")
+            packet = self._stream.read_bytes()
+
+        parser = etree.XMLParser(remove_blank_text=False, resolve_entities=False, no_network=True)
+        self.root = etree.fromstring(packet.strip(), parser)
+
+        self.data = None
+        for child in self.root:
+            if _local_name(child.tag) == 'data':
+                self.data = child
+                break
+        if self.data is None:
+            self.data = etree.SubElement(self.root, f'{{{XFA_DATA_NS}}}data')
+
+        self._index = None
+        self.modified = False
+
+    def _build_index(self):
+        """Map every suffix of every data node's path to the nodes it names"""
+        index = {}
+
+        def walk(node, path):
+            counts = {}
+            for child in node:
+                name = _local_name(child.tag)
+                if name is None:
+                    continue  # Comments and processing instructions
+                occurrence = counts.get(name, 0)
+                counts[name] = occurrence + 1
+                child_path = path + ((name, occurrence),)
+
+                for start in range(len(child_path)):
+                    index.setdefault(child_path[start:], []).append(child)
+                walk(child, child_path)
+
+        walk(self.data, ())
+        self._index = index
+
+    def find(self, field_name):
+        """Return the data node for an AcroForm/SOM field name, or None"""
+        if self._index is None:
+            self._build_index()
+
+        parts = parse_som_name(field_name)
+        # Longest suffix first: the full path is the most specific match
+        for start in range(len(parts)):
+            nodes = self._index.get(parts[start:])
+            if nodes is not None:
+                return nodes[0] if len(nodes) == 1 else None
+        return None
+
+    def set_value(self, field_name, value):
+        """Set a data node's text; returns False when the name is not in the data"""
+        node = self.find(field_name)
+        if node is None or len(node):
+            return False  # Unknown, ambiguous, or a data group rather than a value
+
+        node.text = '' if value is None else str(value)
+        self.modified = True
+        return True
+
+    def save(self):
+        """Write the datasets packet back into the PDF if anything changed"""
+        if not self.modified:
+            return
+
+        import pikepdf
+
+        packet = self._etree.tostring(self.root, encoding='UTF-8', xml_declaration=False)
+
+        if self._span is not None:
+            start, end = self._span
+            self._raw = self._raw[:start] + packet + self._raw[end:]
+            self._span = (start, start + len(packet))
+            packet = self._raw
+
+        self._stream.write(zlib.compress(packet), filter=pikepdf.Name('/FlateDecode'))
+        self.modified = False
+
+
+def xfa_value(value, field_type=None):
+    """
+    Convert a fill value to its XFA data representation
+
+    For checkboxes and radio groups, value is the state the AcroForm field
+    was set to: a generic checked value becomes CHECKED_VALUE, any other
+    on-state (a radio button's export value, say) is written as is.
+    """
+    # Imported here - fill_pdf imports this module
+    from fill_pdf import CHECKED_VALUES
+
+    if field_type == '/Btn':
+        if value in (None, False, 'Off'):
+            return UNCHECKED_VALUE
+        return CHECKED_VALUE if value in CHECKED_VALUES else str(value)
+    return '' if value is None else str(value)
+
+
+def fill_xfa_datasets(pdf, field_data, field_types=None):
+    """
+    Update the XFA datasets packet of a hybrid form in place
+
+    Args:
+        pdf: Open pikepdf.Pdf (saved by the caller)
+        field_data: Dictionary mapping field names to the values written into
+                    their AcroForm fields (FillReport.written)
+        field_types: Optional dictionary of field name -> AcroForm /FT
+                     ("/Btn", "/Tx", ...) used to convert checkbox values
+
+    Returns:
+        (updated, not_found) - list of names written to the datasets packet
+        and list of names with no matching data node. Both are empty when the
+        PDF has no XFA.
+    """
+    try:
+        datasets = XfaDatasets(pdf)
+    except LookupError:
+        return [], []
+
+    field_types = field_types or {}
+    updated, not_found = [], []
+
+    for name, value in field_data.items():
+        if datasets.set_value(name, xfa_value(value, field_types.get(name))):
+            updated.append(name)
+        else:
+            not_found.append(name)
+
+    datasets.save()
+    return updated, not_found